@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from models import AccessLog
+
+logger = logging.getLogger(__name__)
+
+
+def session_fingerprint(session_id: str) -> str:
+    """Short hash of a session id or token: lets logs correlate a session without being able to replay it"""
+    if not session_id:
+        return ""
+    return hashlib.blake2b(session_id.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class JsonlSink:
+    """Append access logs to a JSON Lines file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def _write(self, logs: List[AccessLog]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(log.model_dump_json() + "\n" for log in logs))
+
+    async def write(self, logs: List[AccessLog]) -> None:
+        await asyncio.to_thread(self._write, logs)
+
+    async def close(self) -> None:
+        pass
+
+
+class SqliteSink:
+    """Insert access logs into a local SQLite table"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS access_logs ("
+                "id TEXT PRIMARY KEY, kind TEXT, session_id TEXT, access_granted INTEGER, "
+                "ip_address TEXT, user_agent TEXT, created_at TEXT)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS access_logs_created_at ON access_logs(created_at)")
+        return self._connection
+
+    def _write(self, logs: List[AccessLog]) -> None:
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT INTO access_logs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (log.id, log.kind, log.session_id, int(log.access_granted),
+                     log.ip_address, log.user_agent, log.created_at.isoformat())
+                    for log in logs
+                ],
+            )
+
+    async def write(self, logs: List[AccessLog]) -> None:
+        await asyncio.to_thread(self._write, logs)
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class MongoSink:
+    """Insert access logs into the Mongo access_logs collection"""
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    async def write(self, logs: List[AccessLog]) -> None:
+        await self.repository.insert_access_logs(logs)
+
+    async def close(self) -> None:
+        pass
+
+
+def make_sink(spec: str, default_directory: Path):
+    """Build a sink from "jsonl[:path]", "sqlite[:path]", "mongo" or "none" """
+    kind, _, location = spec.partition(":")
+    if kind == "jsonl":
+        return JsonlSink(Path(location) if location else default_directory / "access_log.jsonl")
+    if kind == "sqlite":
+        return SqliteSink(Path(location) if location else default_directory / "access_log.sqlite3")
+    if kind == "mongo":
+        from database import repository
+        return MongoSink(repository)
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown access log sink: {spec}")
+
+
+class AccessLogPipeline:
+    """Non-blocking access-log pipeline
+
+    Requests only enqueue records on a bounded queue; when it is full the
+    record is dropped and counted rather than making the request wait. A
+    background writer flushes batches to the sink when `batch_size` records are
+    ready or `flush_interval` seconds after the first one was queued.
+    Session ids are stored as `session_fingerprint`s, never as is.
+    """
+
+    def __init__(self, sink, max_queue: int = 10000, batch_size: int = 200, flush_interval: float = 1.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._batch: List[AccessLog] = []
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.sink_errors = 0
+        self.lost = 0
+        self.max_depth = 0
+
+    def record(self, kind: str, session_id: str, access_granted: bool,
+               ip_address: Optional[str], user_agent: Optional[str]) -> bool:
+        """Queue one access log; never blocks"""
+        if self.sink is None:
+            return False
+        log = AccessLog(
+            kind=kind,
+            session_id=session_fingerprint(session_id),
+            access_granted=access_granted,
+            ip_address=ip_address,
+            user_agent=user_agent,
+        )
+        try:
+            self._queue.put_nowait(log)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return True
+
+    async def _next_batch(self) -> List[AccessLog]:
+        # Le lot en cours reste visible pour drain() si la tâche est annulée
+        batch = self._batch
+        batch.append(await self._queue.get())
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: List[AccessLog]) -> None:
+        try:
+            await self.sink.write(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.sink_errors += 1
+            self.lost += len(batch)
+            logger.error(f"Error writing access logs: {e}")
+
+    async def run(self) -> None:
+        """Flush batches to the sink until cancelled"""
+        if self.sink is None:
+            return
+        while True:
+            batch = await self._next_batch()
+            self._batch = []
+            await self._write(batch)
+
+    async def drain(self) -> None:
+        """Write whatever is still queued (used at shutdown)"""
+        if self.sink is None:
+            return
+        batch, self._batch = self._batch, []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+            if len(batch) >= self.batch_size:
+                await self._write(batch)
+                batch = []
+        if batch:
+            await self._write(batch)
+        await self.sink.close()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "sink_errors": self.sink_errors,
+            "lost": self.lost,
+        }
@@ -0,0 +1,87 @@
+"""Minimal in-process ASGI driver used by the benchmarks (no network, no httpx)"""
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+
+class ASGIDriver:
+    """Call an ASGI app directly and time each request"""
+
+    def __init__(self, app, client_host: str = "127.0.0.1"):
+        self.app = app
+        self.client_host = client_host
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None,
+                      headers: Optional[Dict[str, str]] = None, query: Optional[dict] = None,
+                      client_host: Optional[str] = None) -> Tuple[int, bytes, Dict[str, str]]:
+        raw_body = json.dumps(body).encode() if body is not None else b""
+        raw_headers = [(b"host", b"bench")]
+        if body is not None:
+            raw_headers.append((b"content-type", b"application/json"))
+            raw_headers.append((b"content-length", str(len(raw_body)).encode()))
+        for name, value in (headers or {}).items():
+            raw_headers.append((name.lower().encode(), value.encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(query or {}).encode(),
+            "root_path": "",
+            "headers": raw_headers,
+            "client": (client_host or self.client_host, 50000),
+            "server": ("bench", 80),
+        }
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": raw_body, "more_body": False}
+            await asyncio.Event().wait()
+
+        status = 0
+        chunks: List[bytes] = []
+        response_headers: Dict[str, str] = {}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for name, value in message.get("headers", []):
+                    response_headers[name.decode().lower()] = value.decode()
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks), response_headers
+
+    async def timed(self, *args, **kwargs) -> Tuple[int, int]:
+        """Run one request; returns (status, elapsed nanoseconds)"""
+        start = time.perf_counter_ns()
+        status, _, _ = await self.request(*args, **kwargs)
+        return status, time.perf_counter_ns() - start
+
+
+def percentile(sorted_values: List[int], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return float(sorted_values[index])
+
+
+def summarize(latencies_ns: List[int], elapsed_s: float) -> dict:
+    ordered = sorted(latencies_ns)
+    return {
+        "requests": len(ordered),
+        "throughput": len(ordered) / elapsed_s if elapsed_s else 0.0,
+        "p50_us": percentile(ordered, 0.50) / 1000,
+        "p95_us": percentile(ordered, 0.95) / 1000,
+        "p99_us": percentile(ordered, 0.99) / 1000,
+    }
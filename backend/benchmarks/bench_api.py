@@ -0,0 +1,337 @@
+"""In-process load benchmark for every API route
+
+Usage (from backend/):
+    python -m benchmarks.bench_api                     # default content size
+    python -m benchmarks.bench_api --sweep             # sweep content size and session count
+    python -m benchmarks.bench_api --save-baseline     # record benchmarks/baseline.json
+    python -m benchmarks.bench_api --check             # exit 1 on regression vs the baseline
+
+The `app` object from server.py is driven directly over ASGI: no sockets, no
+HTTP client, so the numbers measure the application itself. Each scenario
+reports throughput and p50/p95/p99 latency. Rate limits are lifted, access
+logging is disabled and the journal writes to a temporary directory.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("ACCESS_LOG_SINK", "none")
+os.environ.setdefault("JOURNAL_DIR", tempfile.mkdtemp(prefix="embruns-bench-"))
+for _name in ("ACCESS_RATE_PER_MINUTE", "ACCESS_BURST", "ACCESS_GLOBAL_RATE_PER_SECOND", "ACCESS_GLOBAL_BURST",
+              "ADMIN_RATE_PER_MINUTE", "ADMIN_BURST", "ADMIN_GLOBAL_RATE_PER_SECOND", "ADMIN_GLOBAL_BURST"):
+    os.environ.setdefault(_name, "1e12")
+os.environ.setdefault("MAX_ACCESS_SESSIONS", "1000000")
+
+import logging  # noqa: E402
+
+import server  # noqa: E402
+from benchmarks.asgi import ASGIDriver, summarize  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_SIZE = {"menu_items": 8, "gallery_items": 4, "sessions": 1000}
+SWEEP_CONTENT = [(10, 4), (100, 100), (1000, 1000)]
+SWEEP_SESSIONS = [100, 10000, 100000]
+
+
+# Contenu synthétique
+
+def make_menu(item_count: int) -> list:
+    categories = [("entrees", "Entrées"), ("plats", "Plats"), ("desserts", "Desserts")]
+    menu = [{"id": cid, "name": name, "order": n + 1, "items": []} for n, (cid, name) in enumerate(categories)]
+    for n in range(item_count):
+        menu[n % len(menu)]["items"].append({
+            "name": f"Huîtres de Marennes-Oléron n°{n}",
+            "description": "Servies nature ou gratinées au beurre d'algues, pain de seigle et beurre demi-sel",
+            "price": f"{n % 40 + 10}€",
+        })
+    return menu
+
+
+def make_gallery(item_count: int) -> list:
+    images = server.content_file.current.document["gallery"]
+    base = images[0]["image"] if images else "https://images.unsplash.com/photo"
+    return [
+        {
+            "id": str(n + 1),
+            "image": f"{base}&sig={n}",
+            "alt": f"Photo {n + 1} du restaurant",
+            "category": ("food", "interior", "view")[n % 3],
+            "order": n + 1,
+        }
+        for n in range(item_count)
+    ]
+
+
+class Fixture:
+    """Server state for one benchmark configuration"""
+
+    def __init__(self, menu_items: int, gallery_items: int, sessions: int):
+        self.menu_items = menu_items
+        self.gallery_items = gallery_items
+        self.sessions = sessions
+        server.menu_store.load(make_menu(menu_items))
+        server.gallery_store.load(make_gallery(gallery_items))
+        server.SITE_SETTINGS["is_locked"] = True
+        server.active_sessions.clear()
+        server.admin_sessions.clear()
+        for n in range(sessions):
+            server.active_sessions.create(f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}", "bench")
+        self.session_ids = list(server.active_sessions._sessions)
+        self.admin_session = server.admin_sessions.create("127.0.0.1", "bench")
+        self.auth = {"Authorization": f"Bearer {self.admin_session}"}
+        server.content_cache.invalidate("restaurant_info", "menu", "gallery", "site_settings")
+        self.rng = random.Random(1234)
+        self.etags = {}
+        self.gallery_cursors = None
+
+    def label(self) -> str:
+        return f"items={self.menu_items},gallery={self.gallery_items},sessions={self.sessions}"
+
+
+# Scénarios : chacun renvoie les arguments de la prochaine requête
+
+def public_get(path):
+    def scenario(fx, n):
+        return ("GET", path), {}
+    return scenario
+
+
+def conditional_get(path):
+    def scenario(fx, n):
+        return ("GET", path), {"headers": {"if-none-match": fx.etags.get(path, ""), "accept-encoding": "gzip, br"}}
+    return scenario
+
+
+def check_session(fx, n):
+    return ("GET", f"/api/access/check/{fx.session_ids[n % len(fx.session_ids)] if fx.session_ids else 'none'}"), {}
+
+
+def check_admin_session(fx, n):
+    return ("GET", f"/api/admin/check/{fx.admin_session}"), {}
+
+
+def verify_access(fx, n):
+    code = "2108" if n % 4 == 0 else "0000"
+    return ("POST", "/api/access/verify"), {"body": {"code": code}, "client_host": f"192.168.{n >> 8 & 255}.{n & 255}"}
+
+
+def gallery_page(fx, n):
+    if fx.gallery_cursors is None:
+        # Curseurs des premières pages de la catégorie "food"
+        fx.gallery_cursors, after = [None], None
+        for _ in range(19):
+            page = server.gallery_store.page(("food",), after, 24)
+            if page["next_cursor"] is None:
+                break
+            fx.gallery_cursors.append(page["next_cursor"])
+            after = server.gallery_store.decode_cursor(page["next_cursor"])
+    cursor = fx.gallery_cursors[n % len(fx.gallery_cursors)]
+    query = {"category": "food", "limit": 24, **({"cursor": cursor} if cursor else {})}
+    return ("GET", "/api/gallery"), {"query": query}
+
+
+def menu_delta(fx, n):
+    # Client à jour qui relève les changements : réponse proportionnelle aux changements, pas au menu
+    return ("GET", "/api/menu"), {"query": {"since": server.menu_versions.token()}}
+
+
+SEARCH_QUERIES = ["huîtres", "huitre gratinée", "beurre demi-sel", "marennes", "algu", "seigle"]
+
+
+def search_menu(fx, n):
+    return ("GET", "/api/menu/search"), {"query": {"q": SEARCH_QUERIES[n % len(SEARCH_QUERIES)]}}
+
+
+def bootstrap(fx, n):
+    session_id = fx.session_ids[n % len(fx.session_ids)] if fx.session_ids else ""
+    return ("GET", "/api/bootstrap"), {"query": {"session_id": session_id}, "headers": {"accept-encoding": "gzip"}}
+
+
+def admin_add_item(fx, n):
+    return ("POST", "/api/admin/menu/plats/items"), {
+        "body": {"name": f"Plat du jour {n}", "description": "Selon la marée", "price": "29€"},
+        "headers": fx.auth,
+    }
+
+
+def admin_update_item(fx, n):
+    item_id = server.menu_store.category_view("entrees").items[0].id
+    return ("PATCH", f"/api/admin/menu/entrees/items/{item_id}"), {
+        "body": {"name": f"Huîtres {n}", "description": "Servies nature", "price": "18€"},
+        "headers": fx.auth,
+    }
+
+
+def admin_batch(fx, n):
+    # Ajoute trois plats et retire ceux du lot précédent : la taille du menu reste stable
+    operations = [
+        {"op": "add", "category_id": "desserts", "item_id": f"bench-{n}-{k}",
+         "item": {"name": f"Tarte {n}-{k}", "description": "Figues", "price": "12€"}}
+        for k in range(3)
+    ]
+    if server.menu_store.has_item(f"bench-{n - 1}-0"):
+        operations += [{"op": "delete", "category_id": "desserts", "item_id": f"bench-{n - 1}-{k}"} for k in range(3)]
+    operations.append({"op": "update", "category_id": "entrees", "item_id": "entrees-1",
+                       "item": {"name": f"Huîtres {n}", "description": "Servies nature", "price": "18€"}})
+    return ("POST", "/api/admin/menu/batch"), {"body": {"operations": operations}, "headers": fx.auth}
+
+
+MIXED_WEIGHTS = [
+    (conditional_get("/api/menu"), 25),
+    (public_get("/api/menu"), 10),
+    (conditional_get("/api/restaurant/info"), 20),
+    (public_get("/api/gallery"), 10),
+    (public_get("/api/site/settings"), 8),
+    (bootstrap, 7),
+    (check_session, 15),
+    (verify_access, 3),
+    (check_admin_session, 1),
+    (admin_update_item, 1),
+]
+
+
+def mixed(fx, n):
+    scenario = fx.rng.choices([s for s, _ in MIXED_WEIGHTS], weights=[w for _, w in MIXED_WEIGHTS])[0]
+    return scenario(fx, n)
+
+
+SCENARIOS = {
+    "get_restaurant_info": public_get("/api/restaurant/info"),
+    "get_menu": public_get("/api/menu"),
+    "get_gallery": public_get("/api/gallery"),
+    "get_gallery_page": gallery_page,
+    "get_site_settings": public_get("/api/site/settings"),
+    "get_menu_304": conditional_get("/api/menu"),
+    "get_menu_delta": menu_delta,
+    "search_menu": search_menu,
+    "get_bootstrap": bootstrap,
+    "check_session": check_session,
+    "check_admin_session": check_admin_session,
+    "verify_access": verify_access,
+    "admin_add_item": admin_add_item,
+    "admin_update_item": admin_update_item,
+    "admin_batch": admin_batch,
+    "mixed": mixed,
+}
+# Scénarios sensibles au nombre de sessions actives
+SESSION_SCENARIOS = {"check_session", "verify_access", "get_bootstrap", "mixed"}
+
+
+async def run_scenario(driver: ASGIDriver, fx: Fixture, scenario, requests: int, warmup: int) -> dict:
+    for path in ("/api/menu", "/api/restaurant/info"):
+        _, _, headers = await driver.request("GET", path, headers={"accept-encoding": "gzip, br"})
+        fx.etags[path] = headers.get("etag", "")
+
+    for n in range(warmup):
+        args, kwargs = scenario(fx, n)
+        await driver.request(*args, **kwargs)
+
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for n in range(warmup, warmup + requests):
+        args, kwargs = scenario(fx, n)
+        status, elapsed = await driver.timed(*args, **kwargs)
+        latencies.append(elapsed)
+        if status >= 400:
+            errors += 1
+    result = summarize(latencies, time.perf_counter() - start)
+    result["errors"] = errors
+    return result
+
+
+async def run_all(args) -> dict:
+    driver = ASGIDriver(server.app)
+    names = args.scenarios or list(SCENARIOS)
+    if args.sweep:
+        configurations = [(m, g, DEFAULT_SIZE["sessions"]) for m, g in SWEEP_CONTENT]
+        configurations += [(DEFAULT_SIZE["menu_items"], DEFAULT_SIZE["gallery_items"], s) for s in SWEEP_SESSIONS]
+    else:
+        configurations = [(DEFAULT_SIZE["menu_items"], DEFAULT_SIZE["gallery_items"], DEFAULT_SIZE["sessions"])]
+
+    results = {}
+    for (menu_items, gallery_items, sessions), name in itertools.product(configurations, names):
+        if args.sweep and sessions != DEFAULT_SIZE["sessions"] and name not in SESSION_SCENARIOS:
+            continue
+        # Meilleur de plusieurs passes : limite le bruit de la machine
+        runs = []
+        for _ in range(args.repeat):
+            fx = Fixture(menu_items, gallery_items, sessions)
+            runs.append(await run_scenario(driver, fx, SCENARIOS[name], args.requests, args.warmup))
+        key = f"{name}@{fx.label()}"
+        r = results[key] = {
+            **max(runs, key=lambda run: run["throughput"]),
+            "p50_us": min(run["p50_us"] for run in runs),
+            "p95_us": min(run["p95_us"] for run in runs),
+            "p99_us": min(run["p99_us"] for run in runs),
+        }
+        print(f"{key:<62} {r['throughput']:>10.0f} req/s  p50 {r['p50_us']:>8.1f}us  "
+              f"p95 {r['p95_us']:>8.1f}us  p99 {r['p99_us']:>8.1f}us  errors {r['errors']}")
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Scenarios whose throughput dropped or p95 grew by more than `tolerance`"""
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        if current["throughput"] < reference["throughput"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {current['throughput']:.0f} < baseline {reference['throughput']:.0f}")
+        if current["p95_us"] > reference["p95_us"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {current['p95_us']:.1f}us > baseline {reference['p95_us']:.1f}us")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run (default: all): {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=1000, help="measured requests per scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="passes per scenario, best one is kept")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--sweep", action="store_true", help="sweep content size and active session count")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="fail when slower than the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.35, help="allowed relative regression")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run_all(args))
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+    if args.check:
+        if not args.baseline.exists():
+            sys.exit(f"No baseline at {args.baseline}; run with --save-baseline first")
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regression against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Encode time and memory per item: typed content vs the previous dict path
+
+Usage (from backend/):
+    python -m benchmarks.bench_content [--sizes 10 100 1000 10000]
+
+The previous path held the menu as nested dicts and encoded it with FastAPI's
+jsonable_encoder followed by json.dumps. The current one keeps MenuSection /
+MenuEntry slotted structures and encodes them with serialization.encode_json
+(orjson when installed). Both produce the same bytes; this measures how long
+that takes and how much memory each item record costs (strings are shared
+and not counted, only the containers).
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from content import MenuEntry  # noqa: E402
+from menu_store import MenuStore  # noqa: E402
+from serialization import encode_json, orjson  # noqa: E402
+
+
+def legacy_encode(content) -> bytes:
+    """Encoder used before typed content (FastAPI JSONResponse semantics)"""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def make_menu(item_count: int, categories: int = 3) -> list:
+    menu = [{"id": f"cat-{c}", "name": f"Catégorie {c}", "order": c + 1, "items": []} for c in range(categories)]
+    for n in range(item_count):
+        menu[n % categories]["items"].append({
+            "name": f"Huîtres de Marennes-Oléron n°{n}",
+            "description": "Servies nature ou gratinées au beurre d'algues, pain de seigle et beurre demi-sel",
+            "price": f"{n % 40 + 10}€",
+        })
+    return menu
+
+
+def legacy_view(menu: list) -> list:
+    """Dict view as the previous MenuStore.public_view built it"""
+    return [
+        {
+            "id": category["id"],
+            "name": category["name"],
+            "order": category["order"],
+            "items": [
+                {"id": f"{category['id']}-{n + 1}", "name": item["name"], "description": item["description"],
+                 "price": item["price"], "order": n + 1}
+                for n, item in enumerate(category["items"])
+            ],
+        }
+        for category in menu
+    ]
+
+
+def legacy_records(view: list) -> list:
+    """One dict per item, as the previous MenuStore kept them"""
+    return [
+        {**item, "category_id": category["id"]}
+        for category in view
+        for item in category["items"]
+    ]
+
+
+def typed_records(view: list) -> list:
+    """One slotted MenuEntry per item (the category lives in the store's index)"""
+    return [
+        MenuEntry(item["id"], item["name"], item["description"], item["price"], item["order"])
+        for category in view
+        for item in category["items"]
+    ]
+
+
+def best_time(encode, content, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        encode(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def allocated(build) -> int:
+    """Bytes still allocated by the object `build` returns"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def bench(item_count: int, rounds: int) -> dict:
+    menu = make_menu(item_count)
+    legacy = legacy_view(menu)
+    typed = MenuStore(menu).public_view()
+    assert legacy_encode(legacy) == encode_json(typed), "encoders disagree"
+
+    return {
+        "items": item_count,
+        "legacy_us": best_time(legacy_encode, legacy, rounds) * 1e6,
+        "typed_us": best_time(encode_json, typed, rounds) * 1e6,
+        "legacy_bytes": allocated(lambda: legacy_records(legacy)) / item_count,
+        "typed_bytes": allocated(lambda: typed_records(legacy)) / item_count,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson is not None else 'json (stdlib)'}")
+    print(f"{'items':>7} {'legacy us':>10} {'typed us':>9} {'speedup':>8} {'legacy B/item':>14} {'typed B/item':>13}")
+    for size in args.sizes:
+        r = bench(size, args.rounds)
+        print(f"{r['items']:>7} {r['legacy_us']:>10.1f} {r['typed_us']:>9.1f} {r['legacy_us'] / r['typed_us']:>7.1f}x "
+              f"{r['legacy_bytes']:>14.0f} {r['typed_bytes']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
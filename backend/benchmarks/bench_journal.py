@@ -0,0 +1,116 @@
+"""Journal replay time against journal length
+
+Usage (from backend/):
+    python -m benchmarks.bench_journal [--lengths 1000 10000 100000]
+
+For each length a journal of realistic admin mutations is written to a
+temporary directory, then replayed into a fresh MenuStore. Replay from a
+compacted snapshot is measured too, which is what a restart sees once the
+journal has passed JOURNAL_COMPACT_EVERY records.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from content_source import decode_document  # noqa: E402
+from journal import Journal  # noqa: E402
+from menu_store import MenuError, MenuStore  # noqa: E402
+
+DATA_FILE = Path(__file__).resolve().parent.parent / "data" / "content.json"
+MENU_DATA = decode_document(DATA_FILE.read_bytes(), DATA_FILE)["menu"]
+
+
+def generate_operations(store: MenuStore, count: int, seed: int = 42):
+    """Yield `count` valid menu operations, applying them to `store`"""
+    rng = random.Random(seed)
+    categories = store.category_ids()
+    for n in range(count):
+        category_id = rng.choice(categories)
+        item_ids = [item.id for item in store.category_view(category_id).items]
+        roll = rng.random()
+        if roll < 0.5 or len(item_ids) < 3:
+            operation = {
+                "op": "add",
+                "category_id": category_id,
+                "item": {"name": f"Plat {n}", "description": "Beurre blanc et salicorne", "price": f"{n % 40 + 10}€"},
+            }
+        elif roll < 0.8:
+            operation = {
+                "op": "update",
+                "category_id": category_id,
+                "item_id": rng.choice(item_ids),
+                "item": {"name": f"Plat {n}", "description": "Jus corsé", "price": "24€"},
+            }
+        else:
+            operation = {"op": "delete", "category_id": category_id, "item_id": rng.choice(item_ids)}
+        store.apply(operation)
+        yield operation
+
+
+def replay_into(journal: Journal) -> MenuStore:
+    store = MenuStore(MENU_DATA)
+    state, records = journal.replay()
+    if state is not None:
+        store.load(state["menu"])
+    for record in records:
+        for operation in record["ops"]:
+            try:
+                store.apply(operation)
+            except MenuError:
+                pass
+    return store
+
+
+def bench(length: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        writer_store = MenuStore(MENU_DATA)
+        journal = Journal(Path(directory), lambda: {"menu": writer_store.snapshot()}, compact_every=length + 1)
+        journal.open()
+        start = time.perf_counter()
+        for operation in generate_operations(writer_store, length):
+            journal.append({"type": "menu", "ops": [operation]})
+        journal.flush()
+        write_time = time.perf_counter() - start
+        size = journal.journal_path.stat().st_size
+
+        start = time.perf_counter()
+        replayed = replay_into(Journal(Path(directory), lambda: {}))
+        replay_time = time.perf_counter() - start
+        assert replayed.snapshot() == writer_store.snapshot(), "replay diverged"
+
+        journal.compact()
+        journal.close()
+        start = time.perf_counter()
+        replay_into(Journal(Path(directory), lambda: {}))
+        snapshot_time = time.perf_counter() - start
+
+    return {
+        "records": length,
+        "items": len(writer_store),
+        "journal_kb": size / 1024,
+        "write_ms": write_time * 1000,
+        "replay_ms": replay_time * 1000,
+        "snapshot_ms": snapshot_time * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'records':>9} {'items':>7} {'journal KB':>11} {'write ms':>9} {'replay ms':>10} "
+          f"{'us/record':>10} {'snapshot ms':>12}")
+    for length in args.lengths:
+        r = bench(length)
+        print(f"{r['records']:>9} {r['items']:>7} {r['journal_kb']:>11.1f} {r['write_ms']:>9.1f} "
+              f"{r['replay_ms']:>10.1f} {r['replay_ms'] * 1000 / r['records']:>10.2f} {r['snapshot_ms']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
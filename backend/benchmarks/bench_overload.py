@@ -0,0 +1,131 @@
+"""Public and admin latency when public traffic exceeds what a worker can serve
+
+Usage (from backend/):
+    python -m benchmarks.bench_overload [--loads 0.5 1 2 4] [--duration 3]
+
+Requests arrive open-loop, as uvicorn creates them: one task per request
+at a fixed rate, whether or not earlier ones are done. Public requests are
+/api/menu/search against a 2000-item menu; the rates are multiples of the
+measured capacity for that route. An admin session check arrives every
+10 ms. Latency is counted from arrival. Each load runs without the limiter
+and then with the settings from the environment (MAX_CONCURRENT_REQUESTS,
+RESERVED_PRIORITY_REQUESTS, MAX_QUEUED_REQUESTS, QUEUE_TIMEOUT,
+MAX_EVENT_LOOP_LAG). "backlog" counts the requests still unserved when
+the run ends.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("ACCESS_LOG_SINK", "none")
+os.environ.setdefault("JOURNAL_DIR", tempfile.mkdtemp(prefix="embruns-bench-"))
+for _name in ("ACCESS_RATE_PER_MINUTE", "ACCESS_BURST", "ACCESS_GLOBAL_RATE_PER_SECOND", "ACCESS_GLOBAL_BURST",
+              "ADMIN_RATE_PER_MINUTE", "ADMIN_BURST", "ADMIN_GLOBAL_RATE_PER_SECOND", "ADMIN_GLOBAL_BURST"):
+    os.environ.setdefault(_name, "1e12")
+
+import logging  # noqa: E402
+
+import server  # noqa: E402
+from benchmarks.asgi import ASGIDriver, percentile  # noqa: E402
+from benchmarks.bench_search import make_menu  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+QUERIES = ["huîtres", "homard grillé", "beurre blanc", "langou", "cèpe poêlé", "caviar"]
+ADMIN_INTERVAL = 0.01
+
+
+async def capacity(driver: ASGIDriver, requests: int = 500) -> float:
+    started = time.perf_counter()
+    for n in range(requests):
+        await driver.request("GET", "/api/menu/search", query={"q": QUERIES[n % len(QUERIES)]})
+    return requests / (time.perf_counter() - started)
+
+
+async def run(driver: ASGIDriver, rate: float, duration: float, admin_session: str) -> dict:
+    public_ms, admin_ms = [], []
+    outcomes = {"ok": 0, "shed": 0}
+
+    async def public_request(arrival: float, n: int) -> None:
+        status, _, _ = await driver.request("GET", "/api/menu/search", query={"q": QUERIES[n % len(QUERIES)]})
+        if status == 503:
+            outcomes["shed"] += 1
+        else:
+            outcomes["ok"] += 1
+            public_ms.append((time.perf_counter() - arrival) * 1000)
+
+    async def admin_request(arrival: float) -> None:
+        await driver.request("GET", f"/api/admin/check/{admin_session}")
+        admin_ms.append((time.perf_counter() - arrival) * 1000)
+
+    tasks = set()
+    started = time.perf_counter()
+    created = admin_created = 0
+    while (now := time.perf_counter()) - started < duration:
+        # Arrivées dues depuis le dernier passage, horodatées à leur instant théorique
+        while created < (now - started) * rate:
+            tasks.add(asyncio.create_task(public_request(started + created / rate, created)))
+            created += 1
+        while admin_created * ADMIN_INTERVAL < now - started:
+            tasks.add(asyncio.create_task(admin_request(started + admin_created * ADMIN_INTERVAL)))
+            admin_created += 1
+        tasks = {task for task in tasks if not task.done()}
+        await asyncio.sleep(0.001)
+    backlog = sum(not task.done() for task in tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    public_ms.sort()
+    admin_ms.sort()
+    return {
+        "served": outcomes["ok"] / duration,
+        "public_p99": percentile(public_ms, 0.99),
+        "shed": outcomes["shed"] / max(1, created),
+        "backlog": backlog,
+        "admin_p50": percentile(admin_ms, 0.50),
+        "admin_p99": percentile(admin_ms, 0.99),
+        "admin_served": len(admin_ms) / max(1, admin_created),
+    }
+
+
+async def main_async(args) -> None:
+    server.menu_store.load(make_menu(2000))
+    admin_session = server.admin_sessions.create("127.0.0.1", "bench")
+    driver = ASGIDriver(server.app)
+    limiter = server.request_limiter
+    configured = limiter.limit
+    capacity_rps = await capacity(driver)
+    print(f"capacity: {capacity_rps:.0f} req/s for /api/menu/search; limiter: limit {configured}, "
+          f"reserved {limiter.reserved}, queue {limiter.max_queue}, max lag {limiter.max_lag * 1000:.0f} ms")
+    print(f"{'load':>5} {'limiter':>8} {'served/s':>9} {'p99 ms':>8} {'shed %':>7} {'backlog':>8} "
+          f"{'admin p50 ms':>13} {'admin p99 ms':>13} {'admin done %':>13}")
+    for load in args.loads:
+        for enabled in (False, True):
+            limiter.limit = configured if enabled else 0
+            monitor = asyncio.create_task(limiter.run_lag_monitor()) if enabled else None
+            r = await run(driver, capacity_rps * load, args.duration, admin_session)
+            if monitor is not None:
+                monitor.cancel()
+                await asyncio.gather(monitor, return_exceptions=True)
+            print(f"{load:>5} {'on' if enabled else 'off':>8} {r['served']:>9.0f} {r['public_p99']:>8.1f} "
+                  f"{r['shed'] * 100:>7.1f} {r['backlog']:>8} {r['admin_p50']:>13.2f} {r['admin_p99']:>13.2f} "
+                  f"{r['admin_served'] * 100:>13.0f}")
+    limiter.limit = configured
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loads", type=float, nargs="+", default=[0.5, 1, 2, 4],
+                        help="public arrival rates, as multiples of the measured capacity")
+    parser.add_argument("--duration", type=float, default=3.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Startup and content reload time against data file size
+
+Usage (from backend/):
+    python -m benchmarks.bench_reload [--sizes 10 100 1000 10000] [--formats json msgpack]
+
+Each size is a synthetic data file with that many menu items and gallery
+images. Startup runs a fresh interpreter that imports the server (which
+loads the data file) and runs its startup and shutdown hooks; the median of
+--runs is reported, split into import and startup hooks. Reload rewrites the
+data file and lets ContentFile.check() pick it up as the watcher would:
+decode and validation in a worker thread, then the swap on the event loop.
+The longest event-loop stall seen meanwhile is what in-flight requests feel.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("ACCESS_LOG_SINK", "none")
+os.environ.setdefault("JOURNAL_DIR", tempfile.mkdtemp(prefix="embruns-bench-"))
+os.environ["CONTENT_POLL_INTERVAL"] = "0"
+
+import logging  # noqa: E402
+
+import server  # noqa: E402
+from benchmarks.bench_api import make_gallery, make_menu  # noqa: E402
+from content_source import ContentFile, msgpack  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+STARTUP_SCRIPT = """
+import asyncio, json, logging, time
+started = time.perf_counter()
+import server
+imported = time.perf_counter()
+logging.disable(logging.WARNING)
+async def hooks():
+    await server.app.router.startup()
+    ready = time.perf_counter()
+    await server.app.router.shutdown()
+    return ready
+ready = asyncio.run(hooks())
+print(json.dumps({"import_ms": (imported - started) * 1000, "startup_ms": (ready - imported) * 1000}))
+"""
+
+
+def make_document(size: int, variant: int = 0) -> dict:
+    document = json.loads((BACKEND_DIR / "data" / "content.json").read_text(encoding="utf-8"))
+    document["menu"] = make_menu(size)
+    document["gallery"] = make_gallery(size)
+    document["restaurant"]["tagline"] += f" ({variant})"
+    return document
+
+
+def write_document(path: Path, document: dict) -> None:
+    if path.suffix == ".msgpack":
+        data = msgpack.packb(document, use_bin_type=True)
+    else:
+        data = json.dumps(document, ensure_ascii=False).encode("utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def bench_startup(path: Path, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        env = {
+            **os.environ,
+            "CONTENT_FILE": str(path),
+            "JOURNAL_DIR": tempfile.mkdtemp(prefix="embruns-bench-"),
+        }
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT], cwd=BACKEND_DIR, env=env,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        sample["process_ms"] = (time.perf_counter() - started) * 1000
+        samples.append(sample)
+    return {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+
+
+async def bench_reload(path: Path, size: int, runs: int) -> dict:
+    content_file = ContentFile(path, poll_interval=0)
+    content_file.load()
+    reload_ms, apply_ms, stall_ms = [], [], []
+
+    def apply(snapshot, changed):
+        started = time.perf_counter()
+        server.apply_content(snapshot, changed)
+        apply_ms.append((time.perf_counter() - started) * 1000)
+
+    for run in range(runs):
+        write_document(path, make_document(size, run + 1))
+        stalls = []
+        done = asyncio.Event()
+
+        async def ticker():
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(0)
+                now = time.perf_counter()
+                stalls.append(now - last)
+                last = now
+
+        ticking = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        changed = await content_file.check(apply)
+        reload_ms.append((time.perf_counter() - started) * 1000)
+        done.set()
+        await ticking
+        assert changed, "reload not detected"
+        stall_ms.append(max(stalls) * 1000)
+    server.content_journal._pending.clear()
+    return {
+        "reload_ms": statistics.median(reload_ms),
+        "apply_ms": statistics.median(apply_ms),
+        "stall_ms": statistics.median(stall_ms),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--formats", nargs="+", default=["json", "msgpack"], choices=["json", "msgpack"])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    formats = [f for f in args.formats if f == "json" or msgpack is not None]
+    if formats != args.formats:
+        print("msgpack is not installed, skipping the msgpack data files")
+    directory = Path(tempfile.mkdtemp(prefix="embruns-content-"))
+    print(f"{'format':>7} {'items':>6} {'file KB':>8} {'process ms':>11} {'import ms':>10} {'startup ms':>11} "
+          f"{'reload ms':>10} {'swap ms':>8} {'max stall ms':>13}")
+    for data_format in formats:
+        for size in args.sizes:
+            path = directory / f"content-{size}.{data_format}"
+            write_document(path, make_document(size))
+            startup = bench_startup(path, args.runs)
+            reload = asyncio.run(bench_reload(path, size, args.runs))
+            print(f"{data_format:>7} {size:>6} {path.stat().st_size / 1024:>8.0f} {startup['process_ms']:>11.0f} "
+                  f"{startup['import_ms']:>10.0f} {startup['startup_ms']:>11.1f} {reload['reload_ms']:>10.1f} "
+                  f"{reload['apply_ms']:>8.2f} {reload['stall_ms']:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Cost of the request log on the event loop, with a fast and a stalled log file
+
+Usage (from backend/):
+    python -m benchmarks.bench_request_log [--requests 20000] [--concurrency 50] [--io-delay 0 2]
+
+GET /api/restaurant/info is driven over ASGI with `concurrency` requests in
+flight. Modes:
+- off: request log disabled (request id and timing only)
+- sampled: REQUEST_LOG_SAMPLE_RATE of the requests logged, through the queue
+- queued: every request logged, through the queue and the writer thread
+- direct: every request logged by a file handler called on the event loop,
+  as with logging.basicConfig
+`--io-delay` adds that many milliseconds to each write, as a slow disk or a
+full stderr pipe would. "dropped" counts the records the queue refused.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("ACCESS_LOG_SINK", "none")
+os.environ.setdefault("JOURNAL_DIR", tempfile.mkdtemp(prefix="embruns-bench-"))
+
+import server  # noqa: E402
+from benchmarks.asgi import ASGIDriver, percentile  # noqa: E402
+from request_log import REQUEST_LOGGER, JsonFormatter, RequestLogMiddleware  # noqa: E402
+
+MODES = ("off", "sampled", "queued", "direct")
+
+
+class SlowFileHandler(logging.FileHandler):
+    """File handler whose writes take `delay` extra seconds"""
+
+    def __init__(self, path: Path, delay: float):
+        super().__init__(path, encoding="utf-8")
+        self.delay = delay
+        self.setFormatter(JsonFormatter())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+        super().emit(record)
+
+
+def find_middleware(app) -> RequestLogMiddleware:
+    layer = app.middleware_stack
+    while not isinstance(layer, RequestLogMiddleware):
+        layer = layer.app
+    return layer
+
+
+async def run(driver: ASGIDriver, requests: int, concurrency: int) -> dict:
+    latencies = []
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            latencies.append((await driver.timed("GET", "/api/restaurant/info"))[1])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_us": percentile(latencies, 0.50) / 1e3,
+        "p99_us": percentile(latencies, 0.99) / 1e3,
+        "max_ms": latencies[-1] / 1e6,
+    }
+
+
+async def main_async(args) -> None:
+    driver = ASGIDriver(server.app)
+    await driver.request("GET", "/api/restaurant/info")
+    middleware = find_middleware(server.app)
+    request_logger = logging.getLogger(REQUEST_LOGGER)
+    writer = server.log_writer
+    directory = Path(tempfile.mkdtemp(prefix="embruns-request-log-"))
+    print(f"{'io ms':>6} {'mode':>8} {'req/s':>8} {'p50 us':>8} {'p99 us':>9} {'max ms':>8} "
+          f"{'records':>8} {'dropped':>8}")
+    for delay_ms in args.io_delay:
+        for mode in args.modes:
+            handler = SlowFileHandler(directory / f"{mode}-{delay_ms}.jsonl", delay_ms / 1000)
+            writer.stop()
+            writer.request_handlers = [handler] if mode in ("sampled", "queued") else []
+            writer.start()
+            request_logger.disabled = mode == "off"
+            request_logger.propagate = mode != "direct"
+            if mode == "direct":
+                request_logger.addHandler(handler)
+            middleware.sample_rate = server.REQUEST_LOG_SAMPLE_RATE if mode == "sampled" else 1.0
+            dropped = writer.handler.dropped
+            r = await run(driver, args.requests, args.concurrency)
+            dropped = writer.handler.dropped - dropped
+            # Écritures en attente comprises : le nombre de lignes est celui du fichier une fois vidé
+            writer.stop()
+            request_logger.removeHandler(handler)
+            handler.close()
+            with open(handler.baseFilename, "rb") as f:
+                records = sum(1 for _ in f)
+            print(f"{delay_ms:>6} {mode:>8} {r['rps']:>8.0f} {r['p50_us']:>8.1f} {r['p99_us']:>9.1f} "
+                  f"{r['max_ms']:>8.2f} {records:>8} {dropped:>8}")
+    request_logger.propagate = True
+    request_logger.disabled = False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--io-delay", type=float, nargs="+", default=[0, 2],
+                        help="extra milliseconds per log write")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
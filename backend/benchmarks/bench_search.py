@@ -0,0 +1,132 @@
+"""Menu search latency and index maintenance cost against menu size
+
+Usage (from backend/):
+    python -m benchmarks.bench_search [--sizes 100 1000 10000] [--queries 2000]
+
+Each size is a synthetic menu whose names and descriptions are drawn from a
+seafood-restaurant vocabulary, indexed through MenuStore.attach_index as the
+server does. Queries mix exact words, accented and plural forms, prefixes
+and multi-word queries; their p50/p99 latency is compared with a linear scan
+over every item (accent-folded substring match, i.e. what filtering the full
+menu costs). Updates measure one admin edit (re-index of one item) and a
+batch swap (diff of the whole menu against the index).
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from menu_search import MenuSearchIndex, fold  # noqa: E402
+from menu_store import MenuStore  # noqa: E402
+
+INGREDIENTS = [
+    "huîtres", "langoustines", "homard", "truffe", "bar", "sole", "turbot", "saint-jacques", "moules",
+    "crevettes", "bulots", "seiche", "poulpe", "cabillaud", "lieu jaune", "maquereau", "sardines",
+    "oursins", "palourdes", "couteaux", "tourteau", "araignée", "caviar", "salicorne", "algues",
+    "poireaux", "fenouil", "artichaut", "cèpes", "girolles", "châtaignes", "pommes de terre", "carottes",
+    "citron", "yuzu", "agrumes", "beurre blanc", "crème", "safran", "vanille", "chocolat", "figues",
+    "framboises", "fraises", "caramel", "sel de Guérande", "noisettes", "amandes", "pain de seigle",
+]
+PREPARATIONS = [
+    "rôti", "grillée", "poêlées", "fumé", "tartare", "carpaccio", "gratinées", "velouté", "risotto",
+    "bisque", "nage", "marinées", "confit", "snacké", "en croûte", "à la plancha", "au four", "crue",
+]
+QUERIES = [
+    "huîtres", "HUITRE", "langoustine", "truffé", "saint jacques", "homard grillé", "crème brûlée",
+    "beurre blanc", "langou", "gir", "cèpe poêlé", "tartare de bar", "yuzu citron", "xyz",
+]
+
+
+def make_menu(size: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    categories = [("entrees", "Entrées"), ("plats", "Plats"), ("desserts", "Desserts"), ("plateaux", "Plateaux")]
+    menu = [{"id": cid, "name": name, "order": n + 1, "items": []} for n, (cid, name) in enumerate(categories)]
+    for n in range(size):
+        main, side = rng.sample(INGREDIENTS, 2)
+        name = f"{main.capitalize()} {rng.choice(PREPARATIONS)}"
+        description = f"{', '.join(rng.sample(INGREDIENTS, 3))} et {side}, {rng.choice(PREPARATIONS)}"
+        menu[n % len(menu)]["items"].append({"name": name, "description": description, "price": f"{n % 40 + 10}€"})
+    return menu
+
+
+def scan(store: MenuStore, query: str) -> list:
+    """Baseline: fold every item and look for each query word"""
+    words = fold(query).split()
+    return [
+        item.id for category in store.public_view() for item in category.items
+        if all(word in fold(item.name + " " + item.description) for word in words)
+    ]
+
+
+def percentiles(samples: list) -> tuple:
+    samples = sorted(samples)
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def bench(size: int, query_count: int) -> dict:
+    store = MenuStore(make_menu(size))
+    index = MenuSearchIndex()
+    started = time.perf_counter()
+    store.attach_index(index)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(1)
+    search_us, scan_us = [], []
+    for n in range(query_count):
+        query = QUERIES[n % len(QUERIES)]
+        started = time.perf_counter()
+        store.search(query, 20)
+        search_us.append((time.perf_counter() - started) * 1e6)
+        if n < max(50, query_count // 20):
+            started = time.perf_counter()
+            scan(store, query)
+            scan_us.append((time.perf_counter() - started) * 1e6)
+
+    item_ids = [item.id for category in store.public_view() for item in category.items]
+    update_us = []
+    for n in range(500):
+        item_id = rng.choice(item_ids)
+        started = time.perf_counter()
+        store.update_item(item_id, {"name": f"Homard bleu {n}", "description": "Beurre noisette et corail"})
+        update_us.append((time.perf_counter() - started) * 1e6)
+
+    operations = [
+        {"op": "update", "item_id": rng.choice(item_ids),
+         "item": {"name": f"Turbot {n}", "description": "Sauce vierge"}}
+        for n in range(10)
+    ]
+    started = time.perf_counter()
+    errors = store.apply_batch(operations)
+    batch_ms = (time.perf_counter() - started) * 1000
+    assert not errors, errors
+
+    return {
+        "terms": index.vocabulary_size(),
+        "build_ms": build_ms,
+        "search": percentiles(search_us),
+        "scan": percentiles(scan_us),
+        "update_us": statistics.median(update_us),
+        "batch_ms": batch_ms,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'items':>6} {'terms':>6} {'build ms':>9} {'search p50 us':>14} {'p99 us':>8} "
+          f"{'scan p50 us':>12} {'p99 us':>9} {'edit us':>8} {'batch ms':>9}")
+    for size in args.sizes:
+        r = bench(size, args.queries)
+        print(f"{size:>6} {r['terms']:>6} {r['build_ms']:>9.1f} {r['search'][0]:>14.1f} {r['search'][1]:>8.1f} "
+              f"{r['scan'][0]:>12.0f} {r['scan'][1]:>9.0f} {r['update_us']:>8.1f} {r['batch_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
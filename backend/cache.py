@@ -0,0 +1,220 @@
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from serialization import encode_json
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Payloads smaller than this are not worth a compressed variant
+MIN_COMPRESS_SIZE = 512
+
+# Content codings in order of preference
+SUPPORTED_ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the encoded body"""
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+# Levels for variants built on the event loop, the first time a coding is requested.
+# The best levels (brotli 11, gzip 9) shrink a payload ~20% more but cost ~100x the
+# CPU: seconds for a large menu, during which no other request is served
+DYNAMIC_LEVELS = {"br": 5, "gzip": 6}
+# For files compressed once, off the event loop (static export)
+BEST_LEVELS = {"br": 11, "gzip": 9}
+
+
+def compress(body: bytes, encoding: str, levels: Dict[str, int] = DYNAMIC_LEVELS) -> bytes:
+    """Compress a payload; only ever done once per version and coding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=levels["br"])
+    return gzip.compress(body, compresslevel=levels["gzip"], mtime=0)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each coding of an Accept-Encoding header to its q-value"""
+    codings = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """Pick brotli, then gzip, among the codings the client accepts"""
+    if not header:
+        return None
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get("*", 0.0)
+    for encoding in SUPPORTED_ENCODINGS:
+        if codings.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class CachedPayload:
+    """Encoded body of one resource at one content version"""
+
+    __slots__ = ("body", "etag", "version", "variants", "compressed")
+
+    def __init__(self, body: bytes, version: int):
+        self.body = body
+        self.etag = make_etag(body)
+        self.version = version
+        self.variants: Dict[bytes, "CachedPayload"] = {}
+        self.compressed: Dict[str, Tuple[bytes, str]] = {}
+
+    def encoded(self, encoding: Optional[str]) -> Tuple[bytes, str]:
+        """Body and ETag of the representation for a content coding"""
+        if encoding is None or len(self.body) < MIN_COMPRESS_SIZE:
+            return self.body, self.etag
+        representation = self.compressed.get(encoding)
+        if representation is None:
+            # Each coding gets its own strong validator
+            representation = (compress(self.body, encoding), self.etag[:-1] + "-" + encoding + '"')
+            self.compressed[encoding] = representation
+        return representation
+
+    def with_members(self, members: bytes) -> "CachedPayload":
+        """Payload with extra pre-encoded members spliced in front of this object
+
+        Variants are cached per content version, so a request-dependent bit
+        (e.g. session validity) costs a dict lookup rather than an encode.
+        """
+        variant = self.variants.get(members)
+        if variant is None:
+            variant = CachedPayload(b"{" + members + b"," + self.body[1:], self.version)
+            self.variants[members] = variant
+        return variant
+
+
+class ResponseCache:
+    """Versioned cache of pre-serialized JSON responses
+
+    Each resource is registered with a builder returning the data to encode.
+    The encoded bytes are kept until the resource is invalidated, so the hot
+    read path never goes through the JSON encoder.
+    """
+
+    def __init__(self, max_keyed: int = 256):
+        self.max_keyed = max_keyed
+        self._builders: Dict[str, Callable[[], Any]] = {}
+        self._entries: Dict[str, CachedPayload] = {}
+        self._keyed: Dict[str, "OrderedDict[Hashable, CachedPayload]"] = {}
+        self._versions: Dict[str, int] = {}
+        self._dependents: Dict[str, List[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def register(self, name: str, builder: Callable[[], Any], depends_on: Iterable[str] = ()) -> None:
+        """Register a resource; it is also invalidated whenever a dependency is"""
+        self._builders[name] = builder
+        self._versions.setdefault(name, 1)
+        self._entries.pop(name, None)
+        for dependency in depends_on:
+            self._dependents.setdefault(dependency, []).append(name)
+
+    def version(self, name: str) -> int:
+        return self._versions[name]
+
+    def invalidate(self, *names: str) -> None:
+        """Drop the encoded payloads and bump the content version"""
+        for name in names:
+            self._versions[name] += 1
+            self._entries.pop(name, None)
+            self._keyed.pop(name, None)
+            self.invalidate(*self._dependents.get(name, ()))
+
+    def resources(self) -> Dict[str, Tuple[int, Optional[int]]]:
+        """Version and encoded size (None until built) of every resource"""
+        return {
+            name: (version, len(self._entries[name].body) if name in self._entries else None)
+            for name, version in self._versions.items()
+        }
+
+    def get(self, name: str) -> CachedPayload:
+        entry = self._entries.get(name)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = CachedPayload(encode_json(self._builders[name]()), self._versions[name])
+        self._entries[name] = entry
+        return entry
+
+    def get_keyed(self, name: str, key: Hashable, builder: Callable[[], Any]) -> CachedPayload:
+        """Payload of a parameterized view of a resource (e.g. one page of it)
+
+        Views share the resource's version and are dropped with it; at most
+        `max_keyed` of them are kept per resource, least recently used first out.
+        """
+        keyed = self._keyed.get(name)
+        if keyed is None:
+            keyed = self._keyed[name] = OrderedDict()
+        entry = keyed.get(key)
+        if entry is not None:
+            self.hits += 1
+            keyed.move_to_end(key)
+            return entry
+        self.misses += 1
+        entry = CachedPayload(encode_json(builder()), self._versions[name])
+        keyed[key] = entry
+        if len(keyed) > self.max_keyed:
+            keyed.popitem(last=False)
+        return entry
+
+    def respond(self, name: str, request: Request, members: bytes = b"") -> Response:
+        """Serve the cached payload of a resource"""
+        entry = self.get(name)
+        if members:
+            entry = entry.with_members(members)
+        return self.serve(entry, request)
+
+    def respond_keyed(self, name: str, key: Hashable, builder: Callable[[], Any], request: Request) -> Response:
+        return self.serve(self.get_keyed(name, key, builder), request)
+
+    def serve(self, entry: CachedPayload, request: Request) -> Response:
+        """Send a payload in the best accepted coding, answering If-None-Match with a 304"""
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        body, etag = entry.encoded(encoding)
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        if body is not entry.body:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
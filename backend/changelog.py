@@ -0,0 +1,105 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+
+class VersionLog:
+    """Versions per key from a shared sequence, with a bounded changelog of recent changes
+
+    Versions are the sequence numbers of the journal records that carried
+    the changes: every worker applies those records in the same order, so a
+    version means the same menu in every process. A change is recorded as
+    pending when it is applied and stamped by `commit(seq)` once every
+    record up to `seq` is both applied here and on disk; until then it is
+    reported as changed after any version, so a delta may resend a category
+    but never misses one.
+
+    The last `capacity` (version, key, deleted) entries are kept.
+    `since(version)` walks them back from the newest, so answering a delta
+    costs O(changes since that version), not O(keys). A version older than
+    the oldest entry kept, or newer than this process has applied, gets
+    None: the caller sends everything.
+
+    Versions are exchanged as "<epoch>-<n>" tokens. The epoch names the
+    journal (shared by the workers, new when its directory is), so a token
+    from a previous journal is recognised as foreign rather than compared
+    with unrelated numbers.
+    """
+
+    def __init__(self, capacity: int = 1000, epoch: str = ""):
+        self.capacity = capacity
+        self.epoch = epoch
+        self.version = 0
+        self._versions: Dict[str, int] = {}
+        self._entries: Deque[Tuple[int, str, bool]] = deque()
+        # Changements appliqués mais pas encore dans le journal : clé -> supprimée
+        self._pending: Dict[str, bool] = {}
+        # Changements antérieurs ou égaux à cette version : plus dans le journal
+        self._floor = 0
+
+    def token(self) -> str:
+        return f"{self.epoch}-{self.version}"
+
+    def parse(self, token: str) -> Optional[int]:
+        """Version of a token of this journal that this process has reached, None otherwise"""
+        epoch, _, number = token.partition("-")
+        if epoch != self.epoch or not number.isdigit() or int(number) > self.version:
+            return None
+        return int(number)
+
+    def reset(self, version: int) -> None:
+        """Start over at `version`: every earlier version gets None"""
+        self.version = self._floor = version
+        self._versions.clear()
+        self._entries.clear()
+        self._pending.clear()
+
+    def record(self, changed: Iterable[str] = (), deleted: Iterable[str] = ()) -> None:
+        """Note changed and deleted keys; they get a version at the next `commit`"""
+        for key in changed:
+            self._pending.pop(key, None)
+            self._pending[key] = False
+        for key in deleted:
+            self._pending.pop(key, None)
+            self._pending[key] = True
+
+    def commit(self, version: int) -> None:
+        """Stamp the pending changes with `version`: every change up to it is applied and journaled"""
+        if version < self.version:
+            return
+        for key, removed in self._pending.items():
+            if removed:
+                self._versions.pop(key, None)
+            else:
+                self._versions[key] = version
+            if len(self._entries) >= self.capacity:
+                self._floor = self._entries.popleft()[0]
+            self._entries.append((version, key, removed))
+        self._pending.clear()
+        self.version = version
+
+    def version_of(self, key: str) -> Optional[int]:
+        """Version at which a live key last changed, None while its change is pending"""
+        if key in self._pending:
+            return None
+        return self._versions.get(key)
+
+    def since(self, version: int) -> Optional[Tuple[List[str], List[str]]]:
+        """Keys changed and keys deleted after `version`, None if no longer known"""
+        if version < self._floor:
+            return None
+        changed, deleted, seen = [], [], set()
+        for key, removed in reversed(self._pending.items()):
+            seen.add(key)
+            (deleted if removed else changed).append(key)
+        for entry_version, key, removed in reversed(self._entries):
+            if entry_version <= version:
+                break
+            if key in seen:
+                continue
+            seen.add(key)
+            (deleted if removed else changed).append(key)
+        return changed, deleted
+
+    def stats(self) -> dict:
+        return {"version": self.version, "keys": len(self._versions), "entries": len(self._entries),
+                "pending": len(self._pending), "floor": self._floor}
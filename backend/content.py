@@ -0,0 +1,163 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class ContentError(ValueError):
+    """Content that does not match the expected shape"""
+
+
+def require_text(data: dict, key: str, where: str) -> str:
+    value = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(value, str):
+        raise ContentError(f"{where}: champ {key} manquant ou invalide")
+    return value
+
+
+def _optional_text(data: dict, key: str, where: str) -> Optional[str]:
+    value = data.get(key)
+    if value is not None and not isinstance(value, str):
+        raise ContentError(f"{where}: champ {key} invalide")
+    return value
+
+
+def _section(data: Any, key: str, where: str) -> dict:
+    value = data.get(key)
+    if not isinstance(value, dict):
+        raise ContentError(f"{where}: section {key} manquante")
+    return value
+
+
+# Structures are slotted dataclasses: validated once when built, then encoded
+# as is (field order is the JSON member order).
+
+@dataclass(slots=True)
+class ImageSource:
+    type: str
+    srcset: str
+
+
+@dataclass(slots=True)
+class ResponsiveImage:
+    """Derivatives of a local source image (see images.ImagePipeline)"""
+    src: str
+    width: int
+    height: int
+    placeholder: str
+    sources: List[ImageSource]
+
+
+@dataclass(slots=True)
+class Hero:
+    title: str
+    subtitle: str
+    description: str
+    image: str
+    responsive: Optional[ResponsiveImage] = None
+
+
+@dataclass(slots=True)
+class About:
+    title: str
+    description: str
+    image: str
+    responsive: Optional[ResponsiveImage] = None
+
+
+@dataclass(slots=True)
+class Contact:
+    phone: str
+    address: str
+    hours: Dict[str, str]
+
+
+@dataclass(slots=True)
+class Restaurant:
+    name: str
+    tagline: str
+    location: str
+    description: str
+    hero: Hero
+    about: About
+    contact: Contact
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Restaurant":
+        if not isinstance(data, dict):
+            raise ContentError("restaurant: objet attendu")
+        hero = _section(data, "hero", "restaurant")
+        about = _section(data, "about", "restaurant")
+        contact = _section(data, "contact", "restaurant")
+        hours = contact.get("hours") or {}
+        if not isinstance(hours, dict) or not all(isinstance(v, str) for v in hours.values()):
+            raise ContentError("restaurant.contact: horaires invalides")
+        return cls(
+            name=require_text(data, "name", "restaurant"),
+            tagline=require_text(data, "tagline", "restaurant"),
+            location=require_text(data, "location", "restaurant"),
+            description=require_text(data, "description", "restaurant"),
+            hero=Hero(*(require_text(hero, key, "restaurant.hero") for key in ("title", "subtitle", "description", "image"))),
+            about=About(*(require_text(about, key, "restaurant.about") for key in ("title", "description", "image"))),
+            contact=Contact(
+                phone=require_text(contact, "phone", "restaurant.contact"),
+                address=require_text(contact, "address", "restaurant.contact"),
+                hours=dict(hours),
+            ),
+        )
+
+
+@dataclass(slots=True)
+class GalleryImage:
+    id: str
+    image: str
+    alt: str
+    category: Optional[str]
+    order: int
+    responsive: Optional[ResponsiveImage] = None
+
+    @classmethod
+    def from_dict(cls, data: dict, default_order: int) -> "GalleryImage":
+        where = f"gallery[{default_order}]"
+        order = data.get("order", default_order) if isinstance(data, dict) else None
+        if not isinstance(order, int):
+            raise ContentError(f"{where}: ordre invalide")
+        return cls(
+            id=str(data.get("id") or default_order),
+            image=require_text(data, "image", where),
+            alt=require_text(data, "alt", where),
+            category=_optional_text(data, "category", where),
+            order=order,
+        )
+
+
+def load_gallery(images: Iterable[dict]) -> List[GalleryImage]:
+    """Validated gallery; images without an explicit order keep their position"""
+    gallery = [GalleryImage.from_dict(image, position) for position, image in enumerate(images, start=1)]
+    gallery.sort(key=lambda image: image.order)
+    return gallery
+
+
+@dataclass(slots=True)
+class MenuEntry:
+    id: str
+    name: str
+    description: str
+    price: str
+    order: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict, item_id: str) -> "MenuEntry":
+        where = f"menu item {item_id}"
+        return cls(
+            id=item_id,
+            name=require_text(data, "name", where),
+            description=require_text(data, "description", where),
+            price=require_text(data, "price", where),
+        )
+
+
+@dataclass(slots=True)
+class MenuSection:
+    id: str
+    name: str
+    order: int
+    items: List[MenuEntry] = field(default_factory=list)
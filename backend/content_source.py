@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from content import ContentError, Restaurant
+from gallery_store import GalleryStore
+from menu_store import MenuError, MenuStore
+from serialization import orjson
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, JSON data files always work
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("restaurant", "menu", "gallery")
+MSGPACK_SUFFIXES = {".msgpack", ".mpk"}
+
+
+def decode_document(raw: bytes, path: Path) -> dict:
+    """Data file contents as a dict (msgpack by extension, JSON otherwise)"""
+    if path.suffix.lower() in MSGPACK_SUFFIXES:
+        if msgpack is None:
+            raise ContentError(f"{path.name}: msgpack n'est pas installé")
+        document = msgpack.unpackb(raw, raw=False)
+    else:
+        document = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if not isinstance(document, dict):
+        raise ContentError(f"{path.name}: objet attendu")
+    return document
+
+
+def section_digest(section) -> str:
+    """Stable digest of one section, independent of key order and formatting"""
+    if orjson is not None:
+        canonical = orjson.dumps(section, option=orjson.OPT_SORT_KEYS)
+    else:
+        canonical = json.dumps(section, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+
+@dataclass(slots=True)
+class ContentSnapshot:
+    """One validated version of the data file, ready to be swapped in"""
+    restaurant: Restaurant
+    menu: MenuStore
+    gallery: GalleryStore
+    digests: Dict[str, str]
+    document: dict
+
+
+def build_snapshot(document: dict) -> ContentSnapshot:
+    missing = [section for section in SECTIONS if section not in document]
+    if missing:
+        raise ContentError(f"sections manquantes : {', '.join(missing)}")
+    try:
+        menu = MenuStore(document["menu"])
+        gallery = GalleryStore(document["gallery"])
+    except (MenuError, AttributeError, TypeError) as e:
+        raise ContentError(str(e)) from e
+    return ContentSnapshot(
+        restaurant=Restaurant.from_dict(document["restaurant"]),
+        menu=menu,
+        gallery=gallery,
+        digests={section: section_digest(document[section]) for section in SECTIONS},
+        document=document,
+    )
+
+
+class ContentFile:
+    """Site content read from a JSON (or msgpack) data file, polled for changes
+
+    A new version is decoded and validated into a complete ContentSnapshot in
+    a worker thread; the event loop only receives the finished snapshot and
+    swaps it in without awaiting, so a request sees either the old content or
+    the new one, never a mix. A version that fails to parse or validate is
+    logged and ignored: the current content stays until the file changes
+    again. Only the sections whose digest changed are reported.
+    """
+
+    def __init__(self, path: Path, poll_interval: float = 2.0):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self.current: Optional[ContentSnapshot] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_reload_ms: Optional[float] = None
+
+    def _stat(self) -> Tuple[int, int, int]:
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _read(self) -> ContentSnapshot:
+        try:
+            return build_snapshot(decode_document(self.path.read_bytes(), self.path))
+        except ContentError:
+            raise
+        except Exception as e:  # JSON / msgpack decoding errors
+            raise ContentError(f"{self.path.name}: {e}") from e
+
+    def load(self) -> ContentSnapshot:
+        """Read the file synchronously (startup); errors propagate"""
+        self._signature = self._stat()
+        self.current = self._read()
+        return self.current
+
+    async def check(self, apply: Callable[[ContentSnapshot, List[str]], None]) -> List[str]:
+        """Reload if the file changed since the last read; returns the sections applied"""
+        try:
+            signature = self._stat()
+        except OSError:
+            # Fichier en cours de remplacement : on réessaiera au prochain passage
+            return []
+        if signature == self._signature:
+            return []
+        # Noté avant la lecture : une version invalide n'est relue qu'après une nouvelle modification
+        self._signature = signature
+        started = time.perf_counter()
+        try:
+            snapshot = await asyncio.to_thread(self._read)
+        except (ContentError, OSError) as e:
+            self.failures += 1
+            self.last_error = str(e)
+            logger.error(f"Ignoring invalid content file {self.path}: {e}")
+            return []
+        changed = [section for section in SECTIONS if snapshot.digests[section] != self.current.digests[section]]
+        self.current = snapshot
+        if changed:
+            apply(snapshot, changed)
+            self.reloads += 1
+            self.last_error = None
+            self.last_reload_ms = (time.perf_counter() - started) * 1000
+            logger.info(f"Reloaded {', '.join(changed)} from {self.path} in {self.last_reload_ms:.1f} ms")
+        return changed
+
+    async def watch(self, apply: Callable[[ContentSnapshot, List[str]], None]) -> None:
+        """Poll the file until cancelled"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.check(apply)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Error reloading content file {self.path}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "digests": dict(self.current.digests) if self.current else {},
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_reload_ms": self.last_reload_ms,
+        }
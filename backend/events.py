@@ -0,0 +1,139 @@
+import asyncio
+import os
+import secrets
+from collections import deque
+from typing import AsyncIterator, Deque, Optional, Set, Tuple
+
+from serialization import encode_json
+
+
+class Subscriber:
+    """One connected client: a bounded buffer of encoded events"""
+
+    __slots__ = ("buffer", "wakeup", "closed")
+
+    def __init__(self):
+        self.buffer: Deque[bytes] = deque()
+        self.wakeup = asyncio.Event()
+        self.closed = False
+
+
+class EventBroadcaster:
+    """Fan-out of change events to Server-Sent Events clients
+
+    An event is encoded once into its SSE frame and appended to each
+    subscriber's buffer; idle clients cost one deque and one asyncio.Event.
+    A client whose buffer already holds `buffer_size` undelivered frames is a
+    slow consumer: it is disconnected rather than allowed to grow without
+    bound, and reconnects with Last-Event-ID. The last `history_size` frames
+    are kept so such a reconnect replays what was missed. Event ids carry a
+    per-process epoch: an id issued by another worker (or before a restart)
+    triggers a resync instead of a wrong replay.
+    """
+
+    def __init__(self, max_subscribers: int = 10000, buffer_size: int = 32, history_size: int = 64,
+                 keepalive: float = 25.0):
+        self.max_subscribers = max_subscribers
+        self.buffer_size = buffer_size
+        self.keepalive = keepalive
+        self._subscribers: Set[Subscriber] = set()
+        self._history: Deque[Tuple[int, bytes]] = deque(maxlen=history_size)
+        self.last_id = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped_slow = 0
+        self.rejected = 0
+        self._pid: Optional[int] = None
+        self._epoch = ""
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def epoch(self) -> str:
+        # Tiré dans chaque worker après le fork, pas dans le processus maître
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid, self._epoch = pid, secrets.token_hex(4)
+        return self._epoch
+
+    @property
+    def last_event_id(self) -> str:
+        return f"{self.epoch}-{self.last_id}"
+
+    def publish(self, event: str, data: dict) -> int:
+        """Queue an event for every subscriber; returns its id"""
+        self.last_id += 1
+        frame = b"id: %s\nevent: %s\ndata: %s\n\n" % (self.last_event_id.encode(), event.encode(), encode_json(data))
+        self._history.append((self.last_id, frame))
+        self.published += 1
+        for subscriber in list(self._subscribers):
+            if len(subscriber.buffer) >= self.buffer_size:
+                # Client trop lent : déconnecté, il rattrapera son retard via Last-Event-ID
+                self.dropped_slow += 1
+                subscriber.buffer.clear()
+                self._close(subscriber)
+                continue
+            subscriber.buffer.append(frame)
+            subscriber.wakeup.set()
+        return self.last_id
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Optional[Subscriber]:
+        """Register a client, None when the subscriber limit is reached"""
+        if len(self._subscribers) >= self.max_subscribers:
+            self.rejected += 1
+            return None
+        subscriber = Subscriber()
+        if last_event_id is not None:
+            epoch, _, number = last_event_id.partition("-")
+            event_id = int(number) if epoch == self.epoch and number.isdigit() else -1
+            oldest = self._history[0][0] if self._history else self.last_id + 1
+            if event_id > self.last_id or event_id < oldest - 1 \
+                    or self.last_id - event_id > self.buffer_size:
+                # Historique insuffisant (ou serveur redémarré) : le client doit tout recharger
+                subscriber.buffer.append(b"event: resync\ndata: {}\n\n")
+            else:
+                subscriber.buffer.extend(frame for seq, frame in self._history if seq > event_id)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._close(subscriber)
+
+    def _close(self, subscriber: Subscriber) -> None:
+        subscriber.closed = True
+        subscriber.wakeup.set()
+        self._subscribers.discard(subscriber)
+
+    def close_all(self) -> None:
+        for subscriber in list(self._subscribers):
+            self._close(subscriber)
+
+    async def stream(self, subscriber: Subscriber, greeting: bytes = b"") -> AsyncIterator[bytes]:
+        """SSE body for one subscriber: buffered frames, then keep-alive comments while idle"""
+        try:
+            if greeting:
+                yield greeting
+            while True:
+                while subscriber.buffer:
+                    yield subscriber.buffer.popleft()
+                    self.delivered += 1
+                if subscriber.closed:
+                    return
+                subscriber.wakeup.clear()
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "last_id": self.last_id,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_slow": self.dropped_slow,
+            "rejected": self.rejected,
+        }
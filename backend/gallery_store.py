@@ -0,0 +1,112 @@
+import base64
+import hashlib
+import hmac
+import heapq
+import json
+from bisect import bisect_right
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from content import GalleryImage, load_gallery
+
+SortKey = Tuple[int, str]
+
+
+class CursorError(ValueError):
+    """Cursor that was not produced by this store"""
+
+
+def _key(image: GalleryImage) -> SortKey:
+    return (image.order, image.id)
+
+
+class GalleryStore:
+    """Gallery images in a guaranteed (order, id) order, indexed by category
+
+    Each category keeps its images and their sort keys in two parallel lists,
+    so a page is a bisect to the cursor plus a slice. Cursors encode the sort
+    key of the last image returned rather than an offset: a page stays
+    consistent when images are added or removed before it. They are signed
+    with `cursor_key`, so a client can only page from keys the store handed
+    out rather than mint arbitrary ones.
+    """
+
+    def __init__(self, images: Iterable[dict] = (), cursor_key: bytes = b""):
+        self.cursor_key = cursor_key
+        self._images: List[GalleryImage] = []
+        self._keys: List[SortKey] = []
+        self._by_category: Dict[str, Tuple[List[SortKey], List[GalleryImage]]] = {}
+        self.load(images)
+
+    def load(self, images: Iterable[dict]) -> None:
+        """Validate and index a whole gallery"""
+        self._images = sorted(load_gallery(images), key=_key)
+        self._keys = [_key(image) for image in self._images]
+        self._by_category = {}
+        for key, image in zip(self._keys, self._images):
+            keys, members = self._by_category.setdefault(image.category or "", ([], []))
+            keys.append(key)
+            members.append(image)
+
+    def swap(self, other: "GalleryStore") -> None:
+        """Adopt another store's images and index in one step"""
+        self._images = other._images
+        self._keys = other._keys
+        self._by_category = other._by_category
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def __iter__(self):
+        return iter(self._images)
+
+    def images(self) -> List[GalleryImage]:
+        return self._images
+
+    def categories(self) -> Dict[str, int]:
+        return {category: len(keys) for category, (keys, _) in self._by_category.items()}
+
+    def select(self, categories: Optional[Iterable[str]] = None) -> List[GalleryImage]:
+        """Every image of these categories (all images when None), in order"""
+        if categories is None:
+            return self._images
+        return list(self._iter_from(categories, None))
+
+    def page(self, categories: Optional[Iterable[str]], after: Optional[SortKey], limit: int) -> dict:
+        """Up to `limit` images following the cursor, and the cursor of the next page"""
+        items = list(islice(self._iter_from(categories, after), limit + 1))
+        next_cursor = self.encode_cursor(_key(items[limit - 1])) if len(items) > limit else None
+        return {"items": items[:limit], "next_cursor": next_cursor}
+
+    def _iter_from(self, categories: Optional[Iterable[str]], after: Optional[SortKey]):
+        if categories is None:
+            sources = [(self._keys, self._images)]
+        else:
+            sources = [self._by_category[c] for c in categories if c in self._by_category]
+        slices = []
+        for keys, members in sources:
+            start = bisect_right(keys, after) if after is not None else 0
+            slices.append(islice(members, start, None))
+        if len(slices) == 1:
+            return slices[0]
+        return heapq.merge(*slices, key=_key)
+
+    def _cursor_signature(self, payload: bytes) -> bytes:
+        digest = hmac.new(self.cursor_key, payload, hashlib.sha256).digest()[:12]
+        return base64.urlsafe_b64encode(digest)
+
+    def encode_cursor(self, key: SortKey) -> str:
+        payload = base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).rstrip(b"=")
+        return (payload + b"." + self._cursor_signature(payload)).decode()
+
+    def decode_cursor(self, cursor: str) -> SortKey:
+        try:
+            payload, _, signature = cursor.encode("ascii").partition(b".")
+            if not hmac.compare_digest(signature, self._cursor_signature(payload)):
+                raise CursorError("Curseur invalide")
+            order, image_id = json.loads(base64.urlsafe_b64decode(payload + b"=" * (-len(payload) % 4)))
+        except (ValueError, TypeError) as e:
+            raise CursorError("Curseur invalide") from e
+        if not isinstance(order, int) or not isinstance(image_id, str):
+            raise CursorError("Curseur invalide")
+        return (order, image_id)
@@ -0,0 +1,51 @@
+"""Production launcher: gunicorn -c gunicorn.conf.py server:app
+
+The app is preloaded in the master, so the data file is parsed and validated
+once and the workers share those pages copy-on-write. Workers run uvicorn
+with uvloop and httptools when they are installed.
+
+State that must agree across workers goes through JOURNAL_DIR: admin changes
+and token revocations through the shared journal (each worker applies what
+the others append), sessions as signed tokens verified with the key file
+kept there. With more than one worker SESSION_MODE therefore defaults to
+"token": in-memory session stores are per worker. Rate-limit buckets, the
+profiler and the metrics stay per worker too (README, "Production").
+
+Reloads without downtime:
+- content: edit data/content.json, every worker picks it up (no signal)
+- workers: kill -HUP <master> starts new workers before stopping the old ones
+- code: kill -USR2 <master> starts a new master next to the old one, then
+  kill -QUIT <old master> once it is up
+"""
+import os
+
+from uvicorn.workers import UvicornWorker
+
+bind = os.environ.get("BIND", "0.0.0.0:8001")
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+preload_app = True
+
+# Worker stop: requests in flight get GRACEFUL_TIMEOUT seconds, then open
+# streams (Server-Sent Events) are cut and their clients reconnect elsewhere
+GRACEFUL_TIMEOUT = int(os.environ.get("GRACEFUL_TIMEOUT", "10"))
+graceful_timeout = GRACEFUL_TIMEOUT + 5
+timeout = int(os.environ.get("WORKER_TIMEOUT", "60"))
+keepalive = int(os.environ.get("KEEPALIVE", "5"))
+
+# Client IPs (rate limiting, access logs) come from X-Forwarded-For set by nginx
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Requests are logged by the application (REQUEST_LOG), from a background thread
+accesslog = None
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info")
+
+if workers > 1:
+    os.environ.setdefault("SESSION_MODE", "token")
+
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": "auto", "http": "auto", "timeout_graceful_shutdown": GRACEFUL_TIMEOUT}
+
+
+worker_class = Worker
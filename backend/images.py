@@ -0,0 +1,323 @@
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from content import ImageSource, ResponsiveImage
+
+try:
+    from PIL import Image, ImageFilter, ImageOps, features
+except ImportError:  # Pillow is optional, images are then served as configured
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS: Tuple[int, ...] = (320, 640, 960, 1280, 1920)
+SOURCE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".avif", ".tif", ".tiff"}
+
+# format -> (mime type, file extension, save options), in <picture> preference order
+FORMATS = {
+    "avif": ("image/avif", "avif", {"quality": 55}),
+    "webp": ("image/webp", "webp", {"quality": 75, "method": 6}),
+    "jpeg": ("image/jpeg", "jpg", {"quality": 80, "optimize": True, "progressive": True}),
+}
+FALLBACK_FORMAT = "jpeg"
+FALLBACK_WIDTH = 1280
+PLACEHOLDER_WIDTH = 16
+
+_DIGEST = re.compile(r"^[0-9a-f]{32}$")
+_DERIVATIVE = re.compile(r"^[0-9]+\.(avif|webp|jpg)$")
+_SOURCE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+def source_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def available_formats() -> List[str]:
+    if Image is None:
+        return []
+    supported = []
+    for name in FORMATS:
+        try:
+            if name == "jpeg" or features.check(name):
+                supported.append(name)
+        except ValueError:  # feature unknown to this Pillow version
+            pass
+    return supported
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Un nom par processus : plusieurs workers peuvent écrire le même fichier en même temps
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def render_derivatives(source: str, directory: str, widths: Iterable[int], formats: Iterable[str]) -> dict:
+    """Resize one source into every width bucket and format (runs in a worker process)
+
+    The manifest is written last: its presence means the set is complete.
+    """
+    target = Path(directory)
+    target.mkdir(parents=True, exist_ok=True)
+    with Image.open(source) as opened:
+        image = ImageOps.exif_transpose(opened).convert("RGB")
+    width, height = image.size
+
+    variants = []
+    for bucket in sorted({min(w, width) for w in widths}):
+        resized = image if bucket == width else image.resize(
+            (bucket, max(1, round(height * bucket / width))), Image.LANCZOS
+        )
+        for name in formats:
+            _, extension, options = FORMATS[name]
+            buffer = io.BytesIO()
+            resized.save(buffer, format=name.upper(), **options)
+            filename = f"{bucket}.{extension}"
+            _write_atomic(target / filename, buffer.getvalue())
+            variants.append({"format": name, "width": resized.width, "height": resized.height, "file": filename})
+
+    tiny = image.resize((PLACEHOLDER_WIDTH, max(1, round(height * PLACEHOLDER_WIDTH / width))), Image.BILINEAR)
+    buffer = io.BytesIO()
+    tiny.filter(ImageFilter.GaussianBlur(1)).save(buffer, format="JPEG", quality=40)
+    manifest = {
+        "width": width,
+        "height": height,
+        "placeholder": "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii"),
+        "variants": variants,
+    }
+    _write_atomic(target / "manifest.json", json.dumps(manifest).encode("utf-8"))
+    return manifest
+
+
+class ImagePipeline:
+    """Content-addressed cache of responsive image derivatives
+
+    Sources are looked up by file name: the configured directory plus admin
+    uploads. Each source is hashed; its derivatives live under
+    `cache_dir/<digest>/` and are generated once, in a process pool, so
+    neither Pillow's CPU work nor the file writes block the event loop. A
+    source whose digest is already cached costs a hash and a manifest read.
+
+    Workers share the cache directory: each renders into a directory of its
+    own and renames it into place, so `<digest>/` appears complete or not at
+    all. A worker that loses the race discards its copy and uses the winner's.
+    """
+
+    def __init__(self, source_dir: Path, cache_dir: Path, widths: Iterable[int] = DEFAULT_WIDTHS,
+                 workers: int = 2, url_prefix: str = "/api/images"):
+        self.source_dir = Path(source_dir)
+        self.cache_dir = Path(cache_dir)
+        self.upload_dir = self.cache_dir / "uploads"
+        self.widths = tuple(sorted(widths))
+        self.workers = workers
+        self.url_prefix = url_prefix
+        self.formats = available_formats()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._names: Dict[str, str] = {}
+        self._manifests: Dict[str, dict] = {}
+        self._responsive: Dict[str, ResponsiveImage] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.generated = 0
+        self.reused = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.formats)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def _read_manifest(self, digest: str) -> Optional[dict]:
+        path = self.cache_dir / digest / "manifest.json"
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _prepare(self, digest: str, data: bytes) -> Path:
+        """Private directory of this process for rendering `digest`, holding the source"""
+        work = self.cache_dir / f"{digest}.{os.getpid()}.tmp"
+        # Reste d'un processus tué qui avait le même pid
+        shutil.rmtree(work, True)
+        work.mkdir(parents=True)
+        (work / "source").write_bytes(data)
+        return work
+
+    def _publish(self, digest: str, work: Path) -> None:
+        """Rename `work` into place as `<digest>/`, unless another worker already published it"""
+        target = self.cache_dir / digest
+        for _ in range(3):
+            try:
+                os.rename(work, target)
+                return
+            except OSError:
+                if self._read_manifest(digest) is not None:
+                    # Un autre worker a publié le même jeu : garder le sien
+                    return
+            # Dossier sans manifeste laissé par un arrêt brutal (ancienne version) : l'écarter
+            stale = self.cache_dir / f"{digest}.{os.getpid()}.stale"
+            try:
+                os.rename(target, stale)
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(stale, True)
+        raise OSError(f"Cannot publish image derivatives {digest}")
+
+    async def _derive(self, digest: str, data: bytes) -> dict:
+        manifest = self._manifests.get(digest) or await asyncio.to_thread(self._read_manifest, digest)
+        if manifest is not None:
+            self.reused += 1
+            return manifest
+        loop = asyncio.get_running_loop()
+        work = await asyncio.to_thread(self._prepare, digest, data)
+        try:
+            manifest = await loop.run_in_executor(
+                self._executor(), render_derivatives, str(work / "source"), str(work), self.widths, self.formats
+            )
+            await asyncio.to_thread(self._publish, digest, work)
+        finally:
+            # Seul le dossier de ce processus est supprimé, jamais celui publié
+            await asyncio.to_thread(shutil.rmtree, work, True)
+        self.generated += 1
+        return await asyncio.to_thread(self._read_manifest, digest) or manifest
+
+    async def ingest(self, name: str, data: bytes) -> Optional[dict]:
+        """Register a source under `name`, generating its derivatives if they are not cached"""
+        if not self.enabled:
+            return None
+        digest = source_digest(data)
+        pending = self._pending.get(digest)
+        if pending is None:
+            pending = self._pending[digest] = asyncio.ensure_future(self._derive(digest, data))
+        try:
+            manifest = await pending
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error processing image {name}: {e}")
+            return None
+        finally:
+            self._pending.pop(digest, None)
+        self._manifests[digest] = manifest
+        self._names[name] = digest
+        self._responsive.pop(digest, None)
+        return {"name": name, "digest": digest, **manifest}
+
+    def adopt(self, name: str, digest: str) -> bool:
+        """Register a source another worker ingested; its derivatives are already on disk"""
+        if not _DIGEST.match(digest):
+            return False
+        manifest = self._manifests.get(digest) or self._read_manifest(digest)
+        if manifest is None:
+            return False
+        self._manifests[digest] = manifest
+        self._names[name] = digest
+        self._responsive.pop(digest, None)
+        return True
+
+    def _sources(self) -> List[Tuple[str, Path]]:
+        sources = []
+        for directory in (self.source_dir, self.upload_dir):
+            if directory.is_dir():
+                sources += [
+                    (path.name, path) for path in sorted(directory.iterdir())
+                    if path.is_file() and path.suffix.lower() in SOURCE_EXTENSIONS
+                ]
+        return sources
+
+    async def scan(self) -> int:
+        """Ingest every source of the configured and upload directories"""
+        if not self.enabled:
+            return 0
+        sources = await asyncio.to_thread(self._sources)
+        results = await asyncio.gather(*(self._ingest_path(name, path) for name, path in sources))
+        return sum(result is not None for result in results)
+
+    async def _ingest_path(self, name: str, path: Path) -> Optional[dict]:
+        try:
+            data = await asyncio.to_thread(path.read_bytes)
+        except OSError as e:
+            self.failed += 1
+            logger.error(f"Error reading image {path}: {e}")
+            return None
+        return await self.ingest(name, data)
+
+    async def upload(self, name: str, data: bytes) -> Optional[dict]:
+        """Ingest an uploaded source, keeping it (across restarts) only if it is readable"""
+        if not self.is_valid_name(name):
+            raise ValueError(f"Nom d'image invalide : {name}")
+        manifest = await self.ingest(name, data)
+        if manifest is not None:
+            self.upload_dir.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(_write_atomic, self.upload_dir / name, data)
+        return manifest
+
+    @staticmethod
+    def is_valid_name(name: str) -> bool:
+        return bool(_SOURCE_NAME.match(name)) and Path(name).suffix.lower() in SOURCE_EXTENSIONS
+
+    def responsive(self, name: str) -> Optional[ResponsiveImage]:
+        """srcset-ready description of a source, None if it is not a known source"""
+        digest = self._names.get(name)
+        if digest is None:
+            return None
+        responsive = self._responsive.get(digest)
+        if responsive is None:
+            responsive = self._responsive[digest] = self._build_responsive(digest, self._manifests[digest])
+        return responsive
+
+    def _build_responsive(self, digest: str, manifest: dict) -> ResponsiveImage:
+        base = f"{self.url_prefix}/{digest}/"
+        by_format: Dict[str, List[dict]] = {}
+        for variant in manifest["variants"]:
+            by_format.setdefault(variant["format"], []).append(variant)
+        fallback = by_format.get(FALLBACK_FORMAT) or next(iter(by_format.values()))
+        src = next((v for v in reversed(fallback) if v["width"] <= FALLBACK_WIDTH), fallback[0])
+        return ResponsiveImage(
+            src=base + src["file"],
+            width=manifest["width"],
+            height=manifest["height"],
+            placeholder=manifest["placeholder"],
+            sources=[
+                ImageSource(
+                    type=FORMATS[name][0],
+                    srcset=", ".join(f"{base}{v['file']} {v['width']}w" for v in by_format[name]),
+                )
+                for name in FORMATS if name in by_format
+            ],
+        )
+
+    def derivative_path(self, digest: str, filename: str) -> Optional[Path]:
+        if not _DIGEST.match(digest) or not _DERIVATIVE.match(filename):
+            return None
+        path = self.cache_dir / digest / filename
+        return path if path.is_file() else None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "formats": self.formats,
+            "widths": list(self.widths),
+            "sources": sorted(self._names),
+            "generated": self.generated,
+            "reused": self.reused,
+            "failed": self.failed,
+        }
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
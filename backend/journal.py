@@ -0,0 +1,347 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): a single process per journal directory
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "snapshot.json"
+JOURNAL_FILE = "journal.jsonl"
+LOCK_FILE = "journal.lock"
+
+# replicate(state, records, rebuild): state replaces the current one when not
+# None, records follow it in order; rebuild asks to start over from the base state
+Replicate = Callable[[Optional[dict], List[dict], bool], None]
+# settled(seq): every record up to seq is on disk and applied, none is pending
+Settled = Callable[[int], None]
+
+
+def _fsync_directory(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # not supported on every platform
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """Append-only journal of admin mutations with snapshot compaction
+
+    Records are buffered in memory and written by a background flusher that
+    issues one fsync per batch (group commit), so an admin request never waits
+    on the disk. Once enough records have accumulated the current state is
+    written as a snapshot (tmp file + rename) and the journal is truncated.
+    Every record carries a sequence number and the snapshot remembers the last
+    one it contains, so a crash between the two steps replays correctly.
+
+    Several worker processes may share the directory. Writes and compactions
+    hold an flock on journal.lock and sequence numbers are assigned under it,
+    so the file has one total order. Each process tracks how far it has read
+    and hands records written by the others to `replicate`; when they
+    interleave with its own unflushed records it rebuilds from the file and
+    re-applies those, so every worker converges on the file order.
+    `settled` is told the sequence number the process has reached whenever
+    it has no unwritten record left.
+    """
+
+    def __init__(self, directory: Path, snapshot_state: Callable[[], dict],
+                 flush_interval: float = 0.05, compact_every: int = 1000,
+                 replicate: Optional[Replicate] = None, settled: Optional[Settled] = None):
+        self.directory = Path(directory)
+        self.snapshot_state = snapshot_state
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.replicate = replicate
+        self.settled = settled
+        self._pending: List[dict] = []
+        self._file = None
+        self._lock_file = None
+        self._mutex = threading.Lock()
+        self._seq = 0
+        self._offset = 0
+        self._snapshot_id: Optional[Tuple[int, int]] = None
+        self._since_snapshot = 0
+        self.records_written = 0
+        self.fsyncs = 0
+        self.compactions = 0
+        self.replicated = 0
+        self.rebuilds = 0
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the last record read or written by this process"""
+        return self._seq
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.directory / SNAPSHOT_FILE
+
+    @property
+    def journal_path(self) -> Path:
+        return self.directory / JOURNAL_FILE
+
+    def replay(self) -> Tuple[Optional[dict], List[dict]]:
+        """Read the snapshot state and the journal records that follow it"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            state, records = self._read_all()
+            try:
+                if self.journal_path.stat().st_size > self._offset:
+                    # Dernière ligne tronquée par un arrêt brutal : la retirer avant d'ajouter à la suite
+                    os.truncate(self.journal_path, self._offset)
+            except FileNotFoundError:
+                pass
+        return state, records
+
+    def open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.journal_path, "ab")
+
+    def append(self, record: dict) -> None:
+        """Queue a record; it reaches the disk (and gets its seq) on the next flush"""
+        self._pending.append(record)
+        self._since_snapshot += 1
+
+    def flush(self) -> None:
+        """Write and fsync every pending record now"""
+        records, self._pending = self._pending, []
+        self._deliver(*self._sync(records, None), records)
+        self._settle()
+
+    def compact(self) -> None:
+        """Write the current state as a snapshot and truncate the journal"""
+        records, self._pending = self._pending, []
+        self._deliver(*self._sync(records, self.snapshot_state()), records)
+        self._settle()
+
+    def exclusive(self, action: Callable[[], None]) -> None:
+        """Run `action` up to date with every worker's records, then write what it appended
+
+        For decisions that must be taken once across workers: a worker that
+        comes second sees the first one's records before its action runs.
+        """
+        with self._locked():
+            reset, foreign = self._catch_up()
+            if reset is not None or foreign:
+                self._deliver(reset, foreign, [], locked=True)
+            action()
+            records, self._pending = self._pending, []
+            self._append_records(records)
+        self._settle()
+
+    async def sync(self) -> None:
+        """Write pending records, pick up the other workers' records, compact when due"""
+        if not self._pending and self._since_snapshot < self.compact_every and not self._changed_on_disk():
+            return
+        # L'état est capturé sur la boucle, l'écriture se fait hors boucle
+        state = self.snapshot_state() if self._since_snapshot >= self.compact_every else None
+        records, self._pending = self._pending, []
+        reset, foreign = await asyncio.to_thread(self._sync, records, state)
+        if reset is not None or foreign:
+            if records or self._pending:
+                state, disk = await asyncio.to_thread(self._read_all_locked)
+                self._rebuild(state, disk)
+            else:
+                self._deliver(reset, foreign, records)
+        self._settle()
+
+    async def run_flusher(self) -> None:
+        """Group-commit pending records and follow other workers until cancelled"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Error flushing journal: {e}")
+
+    def close(self) -> None:
+        if self._file is not None:
+            if self._since_snapshot >= self.compact_every:
+                self.compact()
+            else:
+                self.flush()
+            self._file.close()
+            self._file = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # Interne
+
+    @contextmanager
+    def _locked(self):
+        with self._mutex:
+            if fcntl is None:
+                yield
+                return
+            if self._lock_file is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._lock_file = open(self.directory / LOCK_FILE, "ab")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _stat_snapshot(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _changed_on_disk(self) -> bool:
+        """Cheap unlocked check for records or a compaction by another process"""
+        try:
+            size = os.stat(self.journal_path).st_size
+        except FileNotFoundError:
+            size = 0
+        return size != self._offset or self._stat_snapshot() != self._snapshot_id
+
+    def _read_snapshot(self) -> Tuple[Optional[dict], int]:
+        self._snapshot_id = self._stat_snapshot()
+        if self._snapshot_id is None:
+            return None, 0
+        snapshot = json.loads(self.snapshot_path.read_bytes())
+        return snapshot["state"], snapshot["seq"]
+
+    def _read_records(self, after_seq: int) -> List[dict]:
+        """Complete records past the read offset with a seq above `after_seq`"""
+        records = []
+        try:
+            f = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            self._offset = 0
+            return records
+        with f:
+            f.seek(self._offset)
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete line")
+                    record = json.loads(line)
+                except ValueError:
+                    # Dernière ligne tronquée par un arrêt brutal
+                    logger.warning("Ignoring torn record at the end of %s", self.journal_path)
+                    break
+                self._offset += len(line)
+                if record["seq"] > after_seq:
+                    records.append(record)
+        return records
+
+    def _read_all(self) -> Tuple[Optional[dict], List[dict]]:
+        """Whole state from disk (lock held): snapshot plus every record after it"""
+        state, snapshot_seq = self._read_snapshot()
+        self._offset = 0
+        records = self._read_records(snapshot_seq)
+        self._seq = records[-1]["seq"] if records else snapshot_seq
+        self._since_snapshot = len(records) + len(self._pending)
+        return state, records
+
+    def _read_all_locked(self) -> Tuple[Optional[dict], List[dict]]:
+        with self._locked():
+            return self._read_all()
+
+    def _catch_up(self) -> Tuple[Optional[dict], List[dict]]:
+        """Records other processes wrote since the last read (lock held)
+
+        Returns a state too when another process compacted records this one
+        never read into its snapshot.
+        """
+        state = None
+        after = self._seq
+        if self._stat_snapshot() != self._snapshot_id:
+            # Un autre processus a compacté : le journal a été tronqué
+            snapshot_state, snapshot_seq = self._read_snapshot()
+            if snapshot_seq > self._seq:
+                state, after = snapshot_state, snapshot_seq
+            self._offset = 0
+            self._since_snapshot = len(self._pending)
+        records = self._read_records(after)
+        self._seq = max(after, records[-1]["seq"] if records else 0)
+        self._since_snapshot += len(records)
+        return state, records
+
+    def _append_records(self, records: List[dict]) -> None:
+        """Number and write records at the end of the journal (lock held, caught up)"""
+        if not records:
+            return
+        if self._file is None:
+            self.open()
+        lines = []
+        for record in records:
+            self._seq += 1
+            record["seq"] = self._seq
+            lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        data = "".join(lines).encode("utf-8")
+        if os.fstat(self._file.fileno()).st_size != self._offset:
+            # Reste d'une écriture interrompue (processus tué) : le retirer
+            self._file.truncate(self._offset)
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._offset += len(data)
+        self.records_written += len(records)
+        self.fsyncs += 1
+
+    def _sync(self, records: List[dict], state: Optional[dict]) -> Tuple[Optional[dict], List[dict]]:
+        with self._locked():
+            reset, foreign = self._catch_up()
+            self._append_records(records)
+            # L'état capturé ne contient pas les enregistrements d'autres processus : compaction différée
+            if state is not None and reset is None and not foreign:
+                self._write_snapshot(state, self._seq)
+            return reset, foreign
+
+    def _deliver(self, reset: Optional[dict], foreign: List[dict], written: List[dict], locked: bool = False) -> None:
+        """Hand other processes' records to `replicate`, rebuilding if they interleave with ours"""
+        if reset is None and not foreign:
+            return
+        if written or self._pending:
+            state, disk = self._read_all() if locked else self._read_all_locked()
+            self._rebuild(state, disk)
+            return
+        self.replicated += len(foreign)
+        if self.replicate is not None:
+            self.replicate(reset, foreign, False)
+
+    def _settle(self) -> None:
+        if self.settled is not None and not self._pending:
+            self.settled(self._seq)
+
+    def _rebuild(self, state: Optional[dict], disk: List[dict]) -> None:
+        self.rebuilds += 1
+        if self.replicate is not None:
+            # Les enregistrements locaux pas encore écrits viendront après ceux du fichier
+            self.replicate(state, disk + [dict(record) for record in self._pending], True)
+
+    def _write_snapshot(self, state: dict, seq: int) -> None:
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps({"seq": seq, "state": state}, ensure_ascii=False).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        _fsync_directory(self.directory)
+        self._snapshot_id = self._stat_snapshot()
+
+        # Records up to `seq` are now in the snapshot
+        if self._file is None:
+            self.open()
+        self._file.truncate(0)
+        os.fsync(self._file.fileno())
+        self._offset = 0
+        self._since_snapshot = len(self._pending)
+        self.compactions += 1
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+PRIORITY = "priority"
+STANDARD = "standard"
+
+
+class ConcurrencyLimiter:
+    """Bounded number of requests in flight, with a slice reserved for priority traffic
+
+    Standard requests may hold `limit - reserved` slots, priority requests
+    all `limit` of them, so `reserved` slots stay available to the admin
+    even when public traffic saturates the rest. A request that finds no
+    free slot waits in its class's FIFO queue for at most `queue_timeout`
+    seconds; a full queue or an expired wait sheds the request. A released
+    slot goes to the oldest priority waiter first.
+
+    Handlers that never await (most of this API: content is in memory) hold
+    a slot without letting another request start, so a spike of them queues
+    up in the event loop itself, before any middleware runs. `max_lag` covers
+    that case: `run_lag_monitor` measures how late the loop runs a timer,
+    and while it is later than `max_lag` standard requests are shed on
+    arrival. A 503 costs far less than a handler, so the backlog drains and
+    priority requests, which are never shed for lag, get through it.
+
+    Everything runs on the event loop: counters need no lock.
+    """
+
+    def __init__(self, limit: int, reserved: int = 0, max_queue: int = 100, queue_timeout: float = 1.0,
+                 max_lag: float = 0.0):
+        self.limit = limit
+        self.reserved = min(reserved, limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_lag = max_lag
+        self.lag = 0.0
+        self._due: Optional[float] = None
+        self.active = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {PRIORITY: deque(), STANDARD: deque()}
+        self.counts: Dict[Tuple[str, str], int] = {
+            (kind, outcome): 0
+            for kind in (PRIORITY, STANDARD)
+            for outcome in ("admitted", "queued", "shed_queue_full", "shed_timeout", "shed_overload")
+        }
+
+    def _capacity(self, kind: str) -> int:
+        return self.limit if kind == PRIORITY else self.limit - self.reserved
+
+    def queue_depth(self, kind: str) -> int:
+        return len(self._queues[kind])
+
+    def overloaded(self) -> bool:
+        """Whether the event loop currently runs later than `max_lag`"""
+        if not self.max_lag or self._due is None:
+            return False
+        # Dernière mesure, ou retard en cours si le prochain réveil n'a pas encore eu lieu
+        return self.lag > self.max_lag or time.perf_counter() - self._due > self.max_lag
+
+    async def run_lag_monitor(self, interval: float = 0.01) -> None:
+        """Measure the event loop lag until cancelled"""
+        try:
+            while True:
+                self._due = time.perf_counter() + interval
+                await asyncio.sleep(interval)
+                self.lag = max(0.0, time.perf_counter() - self._due)
+        finally:
+            self._due = None
+            self.lag = 0.0
+
+    async def acquire(self, kind: str) -> bool:
+        """Take a slot, waiting for one if needed; False when the request is shed"""
+        if kind == STANDARD and self.overloaded():
+            self.counts[kind, "shed_overload"] += 1
+            return False
+        queue = self._queues[kind]
+        if self.active < self._capacity(kind) and not queue:
+            self.active += 1
+            self.counts[kind, "admitted"] += 1
+            return True
+        if len(queue) >= self.max_queue:
+            self.counts[kind, "shed_queue_full"] += 1
+            return False
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        queue.append(waiter)
+        self.counts[kind, "queued"] += 1
+        expiry = loop.call_later(self.queue_timeout, self._expire, queue, waiter)
+        try:
+            granted = await waiter
+        except asyncio.CancelledError:
+            # Client parti pendant l'attente : rendre le créneau s'il venait d'être attribué
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release()
+            elif waiter in queue:
+                queue.remove(waiter)
+            raise
+        finally:
+            expiry.cancel()
+        if not granted:
+            self.counts[kind, "shed_timeout"] += 1
+            return False
+        self.counts[kind, "admitted"] += 1
+        return True
+
+    def release(self) -> None:
+        """Give the slot back, handing it over to the next waiter that may take it"""
+        self.active -= 1
+        for kind in (PRIORITY, STANDARD):
+            queue = self._queues[kind]
+            while queue and self.active < self._capacity(kind):
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                self.active += 1
+                waiter.set_result(True)
+
+    @staticmethod
+    def _expire(queue: Deque[asyncio.Future], waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(False)
+            queue.remove(waiter)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "reserved": self.reserved,
+            "active": self.active,
+            "lag_ms": self.lag * 1000,
+            "queued": {kind: len(queue) for kind, queue in self._queues.items()},
+            **{f"{kind}_{outcome}": count for (kind, outcome), count in self.counts.items()},
+        }
+
+
+class LoadSheddingMiddleware:
+    """Pure ASGI middleware admitting HTTP requests through a ConcurrencyLimiter
+
+    Paths starting with one of `priority_prefixes` use the reserved slice;
+    `excluded_prefixes` (long-lived streams, health checks) bypass the
+    limiter entirely. A shed request gets an immediate 503 with Retry-After,
+    before its body is read.
+    """
+
+    def __init__(self, app, limiter: ConcurrencyLimiter, priority_prefixes: Iterable[str] = (),
+                 excluded_prefixes: Iterable[str] = (), retry_after: int = 1):
+        self.app = app
+        self.limiter = limiter
+        self.priority_prefixes = tuple(priority_prefixes)
+        self.excluded_prefixes = tuple(excluded_prefixes)
+        self.body = '{"detail":"Serveur surchargé, réessayez dans un instant"}'.encode("utf-8")
+        self.headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(self.body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+            (b"cache-control", b"no-store"),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        limiter = self.limiter
+        if scope["type"] != "http" or limiter.limit <= 0 or scope["path"].startswith(self.excluded_prefixes):
+            await self.app(scope, receive, send)
+            return
+        kind = PRIORITY if scope["path"].startswith(self.priority_prefixes) else STANDARD
+        if not await limiter.acquire(kind):
+            await send({"type": "http.response.start", "status": 503, "headers": self.headers})
+            await send({"type": "http.response.body", "body": self.body})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -0,0 +1,194 @@
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Poids d'un terme selon le champ où il apparaît
+NAME_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+# Saturation de la fréquence (BM25) : un mot répété ne domine pas le score
+TF_SATURATION = 1.2
+# Un terme trouvé par préfixe compte moins qu'un terme exact
+PREFIX_WEIGHT = 0.6
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_TERMS = 64
+
+STOP_WORDS = frozenset(
+    "a au aux avec ce ces d dans de des du en et l la le les leur leurs ma mes mon nos notre ou par "
+    "pour sa se ses son sur ta tes ton un une vos votre".split()
+)
+
+_LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "ß": "ss"})
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase without accents or ligatures ("Crème brûlée" -> "creme brulee")"""
+    text = text.lower().translate(_LIGATURES)
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def stem(word: str) -> str:
+    """Light French stemmer: plural and feminine endings, mute e
+
+    "huîtres", "huître" -> "huitr"; "grillées", "grillé" -> "grill";
+    "poireaux" -> "poireau"; "végétaux" -> "vegetal". Queries and items go
+    through the same function, so only consistency matters.
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("eaux"):
+        word = word[:-1]
+    elif word.endswith("aux"):
+        word = word[:-3] + "al"
+    elif word[-1] in "sx":
+        word = word[:-1]
+    while len(word) > 3 and word[-1] == "e":
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalized terms of a text, stop words and single letters left out"""
+    return [
+        stem(word) for word in _WORD.findall(fold(text))
+        if word not in STOP_WORDS and (len(word) > 1 or word.isdigit())
+    ]
+
+
+def _saturate(frequency: float) -> float:
+    return frequency * (TF_SATURATION + 1) / (frequency + TF_SATURATION)
+
+
+class MenuSearchIndex:
+    """Inverted index over menu item names and descriptions
+
+    Each term maps to the items containing it with a weight (name hits count
+    more than description hits, repeated hits saturate). Terms are also kept
+    in a sorted list, so a query word matches every term it prefixes with a
+    bisect. Items are indexed one at a time as the menu changes; `sync`
+    compares a whole menu with what is indexed and only touches the items
+    that differ.
+
+    A query matches the items containing every one of its terms (exactly or
+    by prefix), ranked by the sum of weight x idf over the terms.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._terms: List[str] = []
+        # item id -> (name, description, category id, term weights)
+        self._documents: Dict[str, Tuple[str, str, str, Dict[str, float]]] = {}
+        self.updates = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def vocabulary_size(self) -> int:
+        return len(self._terms)
+
+    # Mises à jour
+
+    def add(self, item_id: str, name: str, description: str, category_id: str) -> None:
+        """Index an item, or re-index it if it is already known"""
+        document = self._documents.get(item_id)
+        if document is not None:
+            if document[0] == name and document[1] == description:
+                # Déplacement : seule la catégorie change
+                self._documents[item_id] = (name, description, category_id, document[3])
+                return
+            self.remove(item_id)
+        frequencies: Dict[str, float] = {}
+        for weight, text in ((NAME_WEIGHT, name), (DESCRIPTION_WEIGHT, description)):
+            for term in tokenize(text):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+        weights = {term: _saturate(frequency) for term, frequency in frequencies.items()}
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[item_id] = weight
+        self._documents[item_id] = (name, description, category_id, weights)
+        self.updates += 1
+
+    def remove(self, item_id: str) -> None:
+        document = self._documents.pop(item_id, None)
+        if document is None:
+            return
+        for term in document[3]:
+            postings = self._postings[term]
+            del postings[item_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+        self.updates += 1
+
+    def sync(self, items: Iterable[Tuple[str, str, str, str]]) -> None:
+        """Bring the index in line with a whole menu of (id, name, description, category id)"""
+        seen = set()
+        for item_id, name, description, category_id in items:
+            seen.add(item_id)
+            document = self._documents.get(item_id)
+            if document is None or document[:3] != (name, description, category_id):
+                self.add(item_id, name, description, category_id)
+        for item_id in [item_id for item_id in self._documents if item_id not in seen]:
+            self.remove(item_id)
+
+    # Recherche
+
+    def _matches(self, word: str) -> Dict[str, float]:
+        """Best weight x idf per item for one query term, exact or by prefix"""
+        total = len(self._documents)
+        scores: Dict[str, float] = {}
+        exact = self._postings.get(word)
+        if exact is not None:
+            idf = math.log(1 + total / len(exact))
+            scores = {item_id: weight * idf for item_id, weight in exact.items()}
+        if len(word) < MIN_PREFIX_LENGTH:
+            return scores
+        terms = self._terms
+        index = bisect_right(terms, word)
+        for term in terms[index:index + MAX_PREFIX_TERMS]:
+            if not term.startswith(word):
+                break
+            postings = self._postings[term]
+            factor = PREFIX_WEIGHT * math.log(1 + total / len(postings))
+            for item_id, weight in postings.items():
+                score = weight * factor
+                if score > scores.get(item_id, 0.0):
+                    scores[item_id] = score
+        return scores
+
+    def search(self, query: str, limit: int = 20,
+               category_id: Optional[str] = None) -> Tuple[int, List[Tuple[str, float]]]:
+        """Number of matching items and the `limit` best (item id, score), best first"""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return 0, []
+        scores: Optional[Dict[str, float]] = None
+        for matches in sorted(map(self._matches, words), key=len):
+            if scores is None:
+                scores = matches
+            else:
+                # Tous les termes sont requis : intersection en partant du plus petit ensemble
+                scores = {item_id: score + matches[item_id] for item_id, score in scores.items() if item_id in matches}
+            if not scores:
+                return 0, []
+        if category_id is not None:
+            documents = self._documents
+            scores = {item_id: score for item_id, score in scores.items() if documents[item_id][2] == category_id}
+        best = heapq.nsmallest(limit, scores.items(), key=lambda pair: (-pair[1], pair[0]))
+        return len(scores), best
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self._documents),
+            "terms": len(self._terms),
+            "postings": sum(len(postings) for postings in self._postings.values()),
+            "updates": self.updates,
+        }
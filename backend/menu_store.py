@@ -0,0 +1,408 @@
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from changelog import VersionLog
+from content import ContentError, MenuEntry, MenuSection, require_text
+from menu_search import MenuSearchIndex
+
+
+class MenuError(Exception):
+    """Invalid menu operation (unknown category/item or malformed request)"""
+
+
+class MenuStore:
+    """In-memory menu indexed by category id and stable item id
+
+    Categories are MenuSection structures holding their MenuEntry items in
+    display order, with an explicit `order` on both; items are also indexed
+    by id. Entries are validated when they enter the store, so the public
+    view is just the ordered sections, encoded as they are.
+
+    A search index attached with `attach_index` follows every mutation item
+    by item; whole-menu changes (load, swap) re-index only what differs. A
+    VersionLog attached with `attach_changelog` likewise records which
+    categories each mutation changed, for delta responses.
+    """
+
+    def __init__(self, categories: Iterable[dict] = ()):
+        self._categories: Dict[str, MenuSection] = {}
+        self._items: Dict[str, MenuEntry] = {}
+        self._item_category: Dict[str, str] = {}
+        self._category_ids: List[str] = []
+        self._view: Optional[List[MenuSection]] = None
+        self._index: Optional[MenuSearchIndex] = None
+        self._changelog: Optional[VersionLog] = None
+        self.load(categories)
+
+    def load(self, categories: Iterable[dict]) -> None:
+        """Replace the whole menu; seed items without an id get a stable one
+
+        Everything is validated first: on MenuError (missing field, id used
+        twice, an explicit item id included, as it may collide with a
+        generated "<category>-<n>" one) the menu is left unchanged.
+        """
+        sections = self._parse(categories)
+        previous = dict(self._categories) if self._changelog is not None else None
+        self._categories.clear()
+        self._items.clear()
+        self._item_category.clear()
+        self._category_ids = []
+        for category_id, name, order, items in sections:
+            self._categories[category_id] = MenuSection(category_id, name, order)
+            self._category_ids.append(category_id)
+            for entry in items:
+                self._items[entry.id] = entry
+                self._attach(category_id, entry, None)
+        self._renumber_categories()
+        self._sync_index()
+        self._record_differences(previous)
+        self._changed()
+
+    @staticmethod
+    def _parse(categories: Iterable[dict]) -> List[Tuple[str, str, int, List[MenuEntry]]]:
+        """Validated (id, name, order, items) of each category, in menu order"""
+        sections, category_ids, item_ids = [], set(), set()
+        for position, category in enumerate(sorted(categories, key=lambda c: c.get("order", 0))):
+            try:
+                category_id = require_text(category, "id", "menu")
+                name = require_text(category, "name", f"menu {category_id}")
+            except ContentError as e:
+                raise MenuError(str(e)) from e
+            if category_id in category_ids:
+                raise MenuError(f"Catégorie {category_id} en double")
+            category_ids.add(category_id)
+            items = sorted(enumerate(category.get("items", [])), key=lambda p: (p[1].get("order", p[0] + 1), p[0]))
+            entries = []
+            for index, (_, item) in enumerate(items):
+                item_id = item.get("id") or f"{category_id}-{index + 1}"
+                if item_id in item_ids:
+                    raise MenuError(f"Item {item_id} en double")
+                item_ids.add(item_id)
+                entries.append(MenuStore._entry(item, item_id))
+            sections.append((category_id, name, category.get("order", position + 1), entries))
+        return sections
+
+    def attach_index(self, index: MenuSearchIndex) -> None:
+        """Index the current items and keep `index` up to date from now on"""
+        self._index = index
+        self._sync_index()
+
+    def attach_changelog(self, changelog: VersionLog) -> None:
+        """Record in `changelog` the categories changed from now on (current ones included)"""
+        self._changelog = changelog
+        self._record_differences({})
+
+    # Lecture
+
+    def __contains__(self, category_id: str) -> bool:
+        return category_id in self._categories
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def has_item(self, item_id: str) -> bool:
+        return item_id in self._items
+
+    def category_ids(self) -> List[str]:
+        return list(self._category_ids)
+
+    def get_category(self, category_id: str) -> MenuSection:
+        category = self._categories.get(category_id)
+        if category is None:
+            raise MenuError(f"Catégorie {category_id} non trouvée")
+        return category
+
+    def get_item(self, item_id: str, category_id: Optional[str] = None) -> MenuEntry:
+        item = self._items.get(item_id)
+        if item is None or (category_id is not None and self._item_category[item_id] != category_id):
+            raise MenuError(f"Item {item_id} non trouvé")
+        return item
+
+    def item_id_at(self, category_id: str, index: int) -> str:
+        items = self.get_category(category_id).items
+        if not 0 <= index < len(items):
+            raise MenuError(f"Item {category_id}/{index} non trouvé")
+        return items[index].id
+
+    def public_view(self) -> List[MenuSection]:
+        """Ordered categories with their ordered items, shared until the next change"""
+        if self._view is None:
+            self._view = [self._categories[category_id] for category_id in self._category_ids]
+        return self._view
+
+    def category_view(self, category_id: str) -> MenuSection:
+        return self.get_category(category_id)
+
+    def changes_since(self, version: int) -> Optional[Tuple[List[MenuSection], List[str]]]:
+        """Categories changed and category ids deleted after `version`, None if too old"""
+        if self._changelog is None:
+            return None
+        changes = self._changelog.since(version)
+        if changes is None:
+            return None
+        changed, deleted = changes
+        return [self._categories[category_id] for category_id in changed], deleted
+
+    def search(self, query: str, limit: int,
+               category_id: Optional[str] = None) -> Tuple[int, List[Tuple[MenuEntry, str, float]]]:
+        """Number of items matching `query` and the best (item, category id, score)"""
+        if self._index is None:
+            raise MenuError("Recherche non disponible")
+        total, results = self._index.search(query, limit, category_id)
+        return total, [(self._items[item_id], self._item_category[item_id], score) for item_id, score in results]
+
+    def snapshot(self) -> List[dict]:
+        """Independent copy of the menu as plain dicts, suitable for persisting or reloading"""
+        return [
+            {
+                "id": category.id,
+                "name": category.name,
+                "order": category.order,
+                "items": [
+                    {"id": item.id, "name": item.name, "description": item.description,
+                     "price": item.price, "order": item.order}
+                    for item in category.items
+                ],
+            }
+            for category in map(self._categories.__getitem__, self._category_ids)
+        ]
+
+    # Mutations
+
+    def replace_category(self, category_id: str, name: str, items: Iterable[dict]) -> None:
+        """Rename a category and replace its items, keeping ids that are supplied"""
+        category = self.get_category(category_id)
+        entries = []
+        seen = set()
+        for item in items:
+            item_id = item.get("id")
+            if not item_id or item_id in seen or item_id in self._items and self._item_category[item_id] != category_id:
+                item_id = str(uuid.uuid4())
+            seen.add(item_id)
+            entries.append(self._entry(item, item_id))
+        category.name = name
+        for entry in category.items:
+            del self._items[entry.id]
+            del self._item_category[entry.id]
+            if self._index is not None and entry.id not in seen:
+                self._index.remove(entry.id)
+        category.items = []
+        for entry in entries:
+            self._items[entry.id] = entry
+            self._attach(category_id, entry, None)
+            self._index_item(entry.id)
+        self._changed(category_id)
+
+    def rename_category(self, category_id: str, name: str) -> None:
+        self.get_category(category_id).name = name
+        self._changed(category_id)
+
+    def reorder_categories(self, category_ids: List[str]) -> None:
+        if sorted(category_ids) != sorted(self._category_ids):
+            raise MenuError("L'ordre doit lister chaque catégorie une fois")
+        orders = {category_id: self._categories[category_id].order for category_id in category_ids}
+        self._category_ids = list(category_ids)
+        self._renumber_categories()
+        self._changed(*(category_id for category_id in category_ids
+                        if self._categories[category_id].order != orders[category_id]))
+
+    def add_item(self, category_id: str, item: dict, position: Optional[int] = None,
+                 item_id: Optional[str] = None) -> str:
+        self.get_category(category_id)
+        if item_id is not None and item_id in self._items:
+            raise MenuError(f"Item {item_id} existe déjà")
+        item_id = self._insert_item(category_id, item_id, item, position)
+        self._index_item(item_id)
+        self._changed(category_id)
+        return item_id
+
+    def update_item(self, item_id: str, fields: dict, category_id: Optional[str] = None) -> None:
+        item = self.get_item(item_id, category_id)
+        updates = {}
+        for key in ("name", "description", "price"):
+            if key in fields:
+                try:
+                    updates[key] = require_text(fields, key, f"menu item {item_id}")
+                except ContentError as e:
+                    raise MenuError(str(e)) from e
+        for key, value in updates.items():
+            setattr(item, key, value)
+        self._index_item(item_id)
+        self._changed(self._item_category[item_id])
+
+    def delete_item(self, item_id: str, category_id: Optional[str] = None) -> None:
+        item = self.get_item(item_id, category_id)
+        category_id = self._item_category[item_id]
+        self._detach(item)
+        del self._items[item_id]
+        del self._item_category[item_id]
+        if self._index is not None:
+            self._index.remove(item_id)
+        self._changed(category_id)
+
+    def move_item(self, item_id: str, target_category_id: str, position: Optional[int] = None) -> None:
+        item = self.get_item(item_id)
+        self.get_category(target_category_id)
+        source_category_id = self._item_category[item_id]
+        self._detach(item)
+        self._attach(target_category_id, item, position)
+        self._index_item(item_id)
+        self._changed(source_category_id, target_category_id)
+
+    def reorder_items(self, category_id: str, item_ids: List[str]) -> None:
+        """Put the listed items first, in this order; unlisted items follow"""
+        category = self.get_category(category_id)
+        current = [item.id for item in category.items]
+        if len(set(item_ids)) != len(item_ids) or not set(item_ids) <= set(current):
+            raise MenuError(f"Ordre invalide pour la catégorie {category_id}")
+        listed = set(item_ids)
+        category.items = [self._items[i] for i in item_ids] + [item for item in category.items if item.id not in listed]
+        self._renumber_items(category_id)
+        self._changed(category_id)
+
+    def apply(self, operation: dict) -> Optional[str]:
+        """Apply one operation given as a dict (see MenuOperation in server.py)
+
+        Returns the id of the created item for "add" operations; the id is
+        also written back into the operation so it can be replayed as is.
+        """
+        op = operation.get("op")
+        category_id = operation.get("category_id")
+        item_id = operation.get("item_id")
+        if op == "add":
+            operation["item_id"] = self.add_item(
+                category_id, self._required(operation, "item"), operation.get("position"), item_id
+            )
+            return operation["item_id"]
+        if op == "update":
+            self.update_item(self._required(operation, "item_id"), self._required(operation, "item"), category_id)
+        elif op == "delete":
+            self.delete_item(self._required(operation, "item_id"), category_id)
+        elif op == "move":
+            self.get_item(self._required(operation, "item_id"), category_id)
+            self.move_item(item_id, operation.get("target_category_id") or category_id, operation.get("position"))
+        elif op == "reorder":
+            self.reorder_items(category_id, self._required(operation, "order"))
+        elif op == "reorder_categories":
+            self.reorder_categories(self._required(operation, "order"))
+        elif op == "rename":
+            self.rename_category(category_id, self._required(operation, "name"))
+        elif op == "replace":
+            self.replace_category(category_id, self._required(operation, "name"), operation.get("items") or [])
+        else:
+            raise MenuError(f"Opération inconnue : {op}")
+        return None
+
+    def apply_batch(self, operations: List[dict]) -> List[str]:
+        """Apply every operation or none of them
+
+        The batch runs against a clone which is swapped in only if all
+        operations succeed; the errors are returned otherwise.
+        """
+        candidate = self.clone()
+        errors = []
+        for n, operation in enumerate(operations):
+            try:
+                candidate.apply(operation)
+            except MenuError as e:
+                errors.append(f"operation {n}: {e}")
+        if not errors:
+            self.swap(candidate)
+        return errors
+
+    def clone(self) -> "MenuStore":
+        """Independent copy; entries are already valid, so they are copied as is"""
+        other = MenuStore()
+        for category_id in self._category_ids:
+            category = self._categories[category_id]
+            items = [MenuEntry(i.id, i.name, i.description, i.price, i.order) for i in category.items]
+            other._categories[category_id] = MenuSection(category.id, category.name, category.order, items)
+            other._category_ids.append(category_id)
+            for item in items:
+                other._items[item.id] = item
+                other._item_category[item.id] = category_id
+        return other
+
+    def swap(self, other: "MenuStore") -> None:
+        """Adopt another store's state in one step (used for atomic batches)"""
+        previous = self._categories
+        self._categories = other._categories
+        self._items = other._items
+        self._item_category = other._item_category
+        self._category_ids = other._category_ids
+        self._sync_index()
+        self._record_differences(previous)
+        self._changed()
+
+    # Interne
+
+    @staticmethod
+    def _required(operation: dict, field: str):
+        value = operation.get(field)
+        if value is None or value == "":
+            raise MenuError(f"{field} requis")
+        return value
+
+    @staticmethod
+    def _entry(item: dict, item_id: str) -> MenuEntry:
+        try:
+            return MenuEntry.from_dict(item, item_id)
+        except ContentError as e:
+            raise MenuError(str(e)) from e
+
+    def _insert_item(self, category_id: str, item_id: Optional[str], item: dict, position: Optional[int]) -> str:
+        entry = self._entry(item, item_id or str(uuid.uuid4()))
+        self._items[entry.id] = entry
+        self._attach(category_id, entry, position)
+        return entry.id
+
+    def _attach(self, category_id: str, item: MenuEntry, position: Optional[int]) -> None:
+        items = self._categories[category_id].items
+        self._item_category[item.id] = category_id
+        if position is None or position >= len(items):
+            items.append(item)
+            item.order = len(items)
+        else:
+            items.insert(max(position, 0), item)
+            self._renumber_items(category_id)
+
+    def _detach(self, item: MenuEntry) -> None:
+        category_id = self._item_category[item.id]
+        items = self._categories[category_id].items
+        # Comparaison par identité : deux plats peuvent avoir les mêmes champs
+        del items[next(index for index, entry in enumerate(items) if entry is item)]
+        self._renumber_items(category_id)
+
+    def _renumber_items(self, category_id: str) -> None:
+        for order, item in enumerate(self._categories[category_id].items, start=1):
+            item.order = order
+
+    def _renumber_categories(self) -> None:
+        for order, category_id in enumerate(self._category_ids, start=1):
+            self._categories[category_id].order = order
+
+    def _index_item(self, item_id: str) -> None:
+        if self._index is not None:
+            item = self._items[item_id]
+            self._index.add(item_id, item.name, item.description, self._item_category[item_id])
+
+    def _sync_index(self) -> None:
+        if self._index is not None:
+            self._index.sync(
+                (item.id, item.name, item.description, self._item_category[item.id]) for item in self._items.values()
+            )
+
+    def _record_differences(self, previous: Optional[Dict[str, MenuSection]]) -> None:
+        """Record the categories that differ from `previous` (whole-menu changes)"""
+        if self._changelog is None or previous is None:
+            return
+        self._changelog.record(
+            (category_id for category_id in self._category_ids
+             if previous.get(category_id) != self._categories[category_id]),
+            (category_id for category_id in previous if category_id not in self._categories),
+        )
+
+    def _changed(self, *category_ids: str) -> None:
+        self._view = None
+        if self._changelog is not None and category_ids:
+            self._changelog.record(category_ids)
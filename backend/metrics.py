@@ -0,0 +1,137 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Latency histogram bounds (seconds), Prometheus "le" semantics
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_BUCKET_BOUNDS_NS = tuple(int(bound * 1e9) for bound in LATENCY_BUCKETS)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+class RouteStats:
+    """Counters of one (method, route) label set, allocated up front"""
+
+    __slots__ = ("method", "route", "count", "sum_ns", "buckets", "statuses")
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.count = 0
+        self.sum_ns = 0
+        self.buckets = [0] * (len(_BUCKET_BOUNDS_NS) + 1)
+        self.statuses: Dict[int, int] = {}
+
+    def observe(self, status: int, elapsed_ns: int) -> None:
+        self.count += 1
+        self.sum_ns += elapsed_ns
+        self.buckets[bisect_left(_BUCKET_BOUNDS_NS, elapsed_ns)] += 1
+        statuses = self.statuses
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+class MetricsRegistry:
+    """Per-route request metrics plus gauges evaluated at scrape time
+
+    Everything runs on the event loop thread, so the hot path is a handful of
+    plain integer increments on pre-allocated objects: no locks, no label
+    hashing beyond one dict lookup.
+    """
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], RouteStats] = {}
+        self._gauges: List[Tuple[str, str, str, Callable[[], Iterable[Tuple[Dict[str, str], float]]]]] = []
+
+    def register_routes(self, routes) -> None:
+        """Pre-allocate the label sets of every HTTP route"""
+        for route in routes:
+            path = getattr(route, "path", None)
+            for method in getattr(route, "methods", None) or ():
+                self._routes.setdefault((method, path), RouteStats(method, path))
+
+    def stats_for(self, method: str, route: str) -> RouteStats:
+        stats = self._routes.get((method, route))
+        if stats is None:
+            stats = self._routes[(method, route)] = RouteStats(method, route)
+        return stats
+
+    def gauge(self, name: str, help_text: str, collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]],
+              kind: str = "gauge") -> None:
+        """Register a metric whose samples are collected when scraped"""
+        self._gauges.append((name, help_text, kind, collect))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        lines = [
+            "# HELP http_requests_total Requests handled, by route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        routes = [stats for stats in self._routes.values() if stats.count]
+        for stats in routes:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(
+                    f"http_requests_total{_labels({'method': stats.method, 'route': stats.route, 'status': status})} {count}"
+                )
+
+        lines.append("# HELP http_request_duration_seconds Request latency, by route.")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for stats in routes:
+            base = {"method": stats.method, "route": stats.route}
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += count
+                lines.append(f"http_request_duration_seconds_bucket{_labels({**base, 'le': repr(bound)})} {cumulative}")
+            lines.append(f"http_request_duration_seconds_bucket{_labels({**base, 'le': '+Inf'})} {stats.count}")
+            lines.append(f"http_request_duration_seconds_sum{_labels(base)} {stats.sum_ns / 1e9:.9f}")
+            lines.append(f"http_request_duration_seconds_count{_labels(base)} {stats.count}")
+
+        for name, help_text, kind, collect in self._gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in collect():
+                lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request
+
+    The route label is the matched path template (e.g.
+    /api/access/check/{session_id}), read from the scope once routing is
+    done, so session ids never leak into label values.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = route.path if route is not None else UNMATCHED_ROUTE
+            self.registry.stats_for(scope["method"], path).observe(status, time.perf_counter_ns() - start)
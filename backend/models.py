@@ -34,9 +34,11 @@ class RestaurantInfo(BaseModel):
 
 # Menu Models
 class MenuItem(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
     description: str
     price: str
+    order: int = 0
 
 class MenuCategory(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -65,6 +67,7 @@ class AccessResponse(BaseModel):
 
 class AccessLog(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    kind: str = "access"  # "access" (code visiteur) ou "admin"
     session_id: str
     access_granted: bool
     ip_address: Optional[str] = None
@@ -0,0 +1,168 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterable, List, Optional
+
+
+class ProfileCapture:
+    """cProfile statistics of one request"""
+
+    __slots__ = ("id", "method", "path", "status", "started_at", "duration_ms", "stats")
+
+    def __init__(self, method: str, path: str, status: int, started_at: datetime, duration_ms: float, stats: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.status = status
+        self.started_at = started_at
+        self.duration_ms = duration_ms
+        self.stats = stats
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+        }
+
+    def dump(self) -> bytes:
+        """Marshalled stats, the .prof format read by pstats and snakeviz"""
+        return marshal.dumps(self.stats)
+
+    def text(self, sort: str = "cumulative", limit: int = 50) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(_LoadedStats(self.stats), stream=stream)
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+class _LoadedStats:
+    """Minimal object pstats.Stats accepts in place of a profiler"""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class RequestProfiler:
+    """Arms cProfile for the next N matching requests
+
+    Captured profiles go into a bounded ring buffer: the oldest one is dropped
+    when it is full. Only one request is profiled at a time, since cProfile
+    hooks the whole thread; anything the event loop runs while that request is
+    in flight shows up in its profile too. Paths under `excluded_prefixes`
+    are never profiled: the profiling endpoints themselves, and streams, which
+    would keep the profiler on (and every other request out) for their
+    whole lifetime.
+    """
+
+    def __init__(self, capacity: int = 20, excluded_prefixes: Iterable[str] = ()):
+        self.captures: Deque[ProfileCapture] = deque(maxlen=capacity)
+        self.excluded_prefixes = tuple(excluded_prefixes)
+        self.remaining = 0
+        self.path_prefix = ""
+        self.method: Optional[str] = None
+        self._busy = False
+        self.captured = 0
+
+    def arm(self, count: int, path_prefix: str = "", method: Optional[str] = None) -> None:
+        self.remaining = count
+        self.path_prefix = path_prefix
+        self.method = method.upper() if method else None
+
+    def disarm(self) -> None:
+        self.remaining = 0
+
+    def get(self, profile_id: str) -> Optional[ProfileCapture]:
+        for capture in self.captures:
+            if capture.id == profile_id:
+                return capture
+        return None
+
+    def clear(self) -> None:
+        self.captures.clear()
+
+    def summaries(self) -> List[Dict]:
+        """Captured profiles, newest first"""
+        return [capture.summary() for capture in reversed(self.captures)]
+
+    def wants(self, scope) -> bool:
+        if self._busy:
+            return False
+        path = scope["path"]
+        if path.startswith(self.excluded_prefixes):
+            return False
+        if self.method is not None and scope["method"] != self.method:
+            return False
+        return path.startswith(self.path_prefix)
+
+    def status(self) -> dict:
+        return {
+            # Chaque worker a son profileur : dit lequel a répondu
+            "worker": os.getpid(),
+            "remaining": self.remaining,
+            "path_prefix": self.path_prefix,
+            "method": self.method,
+            "captured": self.captured,
+            "buffered": len(self.captures),
+            "capacity": self.captures.maxlen,
+        }
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware profiling requests while the profiler is armed
+
+    When disarmed the only cost is one attribute check per request.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        if not profiler.remaining or scope["type"] != "http" or not profiler.wants(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Un autre profileur est déjà actif sur ce thread
+            await self.app(scope, receive, send)
+            return
+        profiler._busy = True
+        profiler.remaining -= 1
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.disable()
+            duration_ms = (time.perf_counter() - start) * 1000
+            profiler._busy = False
+            profile.create_stats()
+            profiler.captures.append(
+                ProfileCapture(scope["method"], scope["path"], status, started_at, duration_ms, profile.stats)
+            )
+            profiler.captured += 1
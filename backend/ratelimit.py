@@ -0,0 +1,82 @@
+import math
+import time
+from typing import Dict, List, Optional
+
+
+class TokenBucketLimiter:
+    """Per-client and global token-bucket admission control
+
+    Each client bucket is a two-slot list [tokens, last_update] in a dict kept
+    in last-touched order. A bucket that has been idle long enough to refill
+    completely carries no information, so it is dropped from the front of the
+    dict as other clients come in; the structure expires itself in O(1)
+    amortized time per call and never grows past `max_clients`.
+    """
+
+    def __init__(self, rate: float, burst: float, global_rate: float, global_burst: float,
+                 max_clients: int = 100000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.max_clients = max_clients
+        self._clock = clock
+        self._idle_expiry = burst / rate
+        self._clients: Dict[str, List[float]] = {}
+        self._global = [global_burst, clock()]
+        self.allowed = 0
+        self.rejected_client = 0
+        self.rejected_global = 0
+        self.expired = 0
+
+    def check(self, client: str) -> Optional[float]:
+        """Take a token for this client; returns None if admitted, else seconds to wait"""
+        now = self._clock()
+        self._expire(now)
+
+        bucket = self._clients.pop(client, None)
+        if bucket is None:
+            bucket = [self.burst, now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        # Réinsertion en fin de dict : l'ordre reste celui du dernier accès
+        self._clients[client] = bucket
+
+        if bucket[0] < 1:
+            self.rejected_client += 1
+            return (1 - bucket[0]) / self.rate
+
+        shared = self._global
+        shared[0] = min(self.global_burst, shared[0] + (now - shared[1]) * self.global_rate)
+        shared[1] = now
+        if shared[0] < 1:
+            self.rejected_global += 1
+            return (1 - shared[0]) / self.global_rate
+
+        bucket[0] -= 1
+        shared[0] -= 1
+        self.allowed += 1
+        return None
+
+    @staticmethod
+    def retry_after(wait: float) -> str:
+        return str(max(1, math.ceil(wait)))
+
+    def _expire(self, now: float) -> None:
+        clients = self._clients
+        while clients:
+            client = next(iter(clients))
+            if now - clients[client][1] < self._idle_expiry and len(clients) < self.max_clients:
+                return
+            del clients[client]
+            self.expired += 1
+
+    def stats(self) -> dict:
+        return {
+            "tracked_clients": len(self._clients),
+            "allowed": self.allowed,
+            "rejected_client": self.rejected_client,
+            "rejected_global": self.rejected_global,
+            "expired": self.expired,
+        }
@@ -0,0 +1,297 @@
+import atexit
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from serialization import encode_json
+
+REQUEST_LOGGER = "requests"
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Identifiant de la requête en cours, ajouté à tous les enregistrements émis pendant son traitement
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+_SAMPLED_METHODS = ("GET", "HEAD")
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the `fields` dict of the record merged in"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            entry["request_id"] = request_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return encode_json(entry).decode("utf-8")
+
+
+class _QueueHandler(QueueHandler):
+    """Hands records over to the writer thread as they are, dropping them when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Pas de formatage ici : message, JSON et écriture sont faits par le thread d'écriture
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        if record.exc_info:
+            # La trace retient les frames de la boucle : la rendre en texte avant de changer de thread
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    """Writer thread: request records go to their own handlers, everything else to the others"""
+
+    def __init__(self, log_queue: queue.Queue, handlers: List[logging.Handler],
+                 request_handlers: List[logging.Handler], batch_interval: float = 0.01):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.request_handlers = request_handlers
+        self.batch_interval = batch_interval
+        self.written = 0
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        if block and self.queue.empty():
+            # Laisser les enregistrements s'accumuler : réveillé à chaque requête, le thread
+            # disputerait le GIL à la boucle d'événements bien plus souvent
+            time.sleep(self.batch_interval)
+        return self.queue.get(block)
+
+    def handle(self, record: logging.LogRecord) -> None:
+        handlers = self.request_handlers if record.name == REQUEST_LOGGER else self.handlers
+        for handler in handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        self.written += 1
+
+    def enqueue_sentinel(self) -> None:
+        # File pleine à l'arrêt : attendre que le thread fasse de la place plutôt que perdre la sentinelle
+        self.queue.put(self._sentinel)
+
+
+class LogWriter:
+    """Application logging through a bounded queue and a background writer thread
+
+    `install` replaces the root logger's handlers with a QueueHandler, so a
+    logging call on the event loop only appends the record to the queue:
+    messages are rendered, encoded and written by the writer thread. When
+    the queue is full (disk stalled, burst of errors) records are dropped
+    and counted rather than blocking a request.
+
+    Records of the `requests` logger are written by `request_handlers`, the
+    others by `handlers`. Threads do not survive fork: `start` runs again in
+    each gunicorn worker and gives it its own queue and thread. The thread
+    wakes at most every `batch_interval` seconds and writes what has
+    accumulated.
+    """
+
+    def __init__(self, handlers: List[logging.Handler], request_handlers: List[logging.Handler],
+                 max_queue: int = 10000, batch_interval: float = 0.01):
+        self.handlers = handlers
+        self.request_handlers = request_handlers
+        self.max_queue = max_queue
+        self.batch_interval = batch_interval
+        self.queue: queue.Queue = queue.Queue(max_queue)
+        self.handler = _QueueHandler(self.queue)
+        self._listener: Optional[_Listener] = None
+        self._pid: Optional[int] = None
+        self._written = 0
+        atexit.register(self.stop)
+
+    def install(self, level: int = logging.INFO) -> None:
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(level)
+        request_logger = logging.getLogger(REQUEST_LOGGER)
+        request_logger.setLevel(logging.INFO)
+        request_logger.disabled = not self.request_handlers
+
+    def start(self) -> None:
+        """Start the writer thread of this process, if it is not running"""
+        pid = os.getpid()
+        if pid != self._pid:
+            # Processus fils : la file héritée et son verrou appartiennent au thread du parent
+            self.queue = self.handler.queue = queue.Queue(self.max_queue)
+            self._listener = None
+            self._pid = pid
+        if self._listener is None:
+            self._listener = _Listener(self.queue, self.handlers, self.request_handlers, self.batch_interval)
+            self._listener.start()
+
+    def stop(self) -> None:
+        """Write what is queued, then stop the writer thread"""
+        listener = self._listener
+        if listener is None or self._pid != os.getpid():
+            return
+        self._listener = None
+        listener.stop()
+        self._written += listener.written
+        for handler in self.handlers + self.request_handlers:
+            handler.flush()
+
+    @property
+    def written(self) -> int:
+        return self._written + (self._listener.written if self._listener is not None else 0)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "capacity": self.max_queue,
+            "written": self.written,
+            "dropped": self.handler.dropped,
+        }
+
+
+def make_handler(spec: str, default_path: Path, formatter: logging.Formatter) -> Optional[logging.Handler]:
+    """Handler for "-" (stderr), "none" or a file path ("" for `default_path`)"""
+    if spec == "none":
+        return None
+    if spec == "-":
+        handler = logging.StreamHandler()
+    else:
+        path = Path(spec) if spec else default_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Rouvert quand logrotate déplace le fichier ; ajouts en O_APPEND, partageables entre workers
+        handler = WatchedFileHandler(path, encoding="utf-8")
+    handler.setFormatter(formatter)
+    return handler
+
+
+class RequestLogMiddleware:
+    """Pure ASGI middleware logging one structured record per HTTP request
+
+    Each request gets an id: the client's X-Request-ID when it is a sane
+    token, otherwise "<process prefix>-<counter>". It is echoed in the
+    response and set in `request_id_var`, so every record logged while the
+    request is handled carries it.
+
+    The record (route template, or path when no route matched, status,
+    duration, client IP, bytes sent) is built once the response is sent.
+    Successful GET/HEAD requests faster than `slow_ms` are kept with
+    probability `sample_rate`, unless their path starts with one of
+    `always_prefixes`; everything else is always kept. Each record states
+    the rate it was kept at, so counts and latency percentiles can be
+    reweighted.
+    """
+
+    def __init__(self, app, logger: logging.Logger, sample_rate: float = 1.0, slow_ms: float = 500.0,
+                 always_prefixes: Iterable[str] = (), excluded_prefixes: Iterable[str] = ()):
+        self.app = app
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.slow_ns = int(slow_ms * 1e6)
+        self.always_prefixes = tuple(always_prefixes)
+        self.excluded_prefixes = tuple(excluded_prefixes)
+        self._pid: Optional[int] = None
+        self._prefix = ""
+        self._counter = 0
+
+    def _next_id(self) -> str:
+        pid = os.getpid()
+        if pid != self._pid:
+            # Préfixe tiré dans chaque worker : les identifiants restent uniques entre processus
+            self._pid, self._prefix, self._counter = pid, secrets.token_hex(4), 0
+        self._counter += 1
+        return f"{self._prefix}-{self._counter:x}"
+
+    def _request_id(self, scope) -> str:
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.fullmatch(candidate):
+                    return candidate
+                break
+        return self._next_id()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = self._request_id(scope)
+        header = (b"x-request-id", request_id.encode("latin-1"))
+        status = 500
+        sent = 0
+
+        async def send_wrapper(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Copie : certaines réponses réutilisent la même liste d'en-têtes
+                message["headers"] = [*message.get("headers", ()), header]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        start = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            if self.logger.isEnabledFor(logging.INFO):
+                self._log(scope, request_id, status, elapsed, sent)
+            request_id_var.reset(token)
+
+    def _log(self, scope, request_id: str, status: int, elapsed_ns: int, sent: int) -> None:
+        method = scope["method"]
+        path = scope["path"]
+        rate = 1.0
+        if (method in _SAMPLED_METHODS and status < 400 and elapsed_ns < self.slow_ns
+                and not path.startswith(self.always_prefixes)):
+            rate = self.sample_rate
+            if rate < 1.0 and random.random() >= rate:
+                return
+        route = scope.get("route")
+        client = scope.get("client")
+        fields = {"method": method}
+        # Le gabarit plutôt que le chemin : pas d'identifiant de session dans les logs
+        if route is not None:
+            fields["route"] = target = route.path
+        else:
+            fields["path"] = target = path
+        record = logging.LogRecord(REQUEST_LOGGER, logging.INFO, "", 0, "%s %s %d", (method, target, status), None)
+        record.request_id = request_id
+        record.fields = {
+            **fields,
+            "status": status,
+            "duration_ms": round(elapsed_ns / 1e6, 3),
+            "bytes": sent,
+            "client_ip": client[0] if client else None,
+            "sample_rate": rate,
+        }
+        self.logger.handle(record)
@@ -0,0 +1,44 @@
+import dataclasses
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is the fallback
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Types the encoder does not handle natively (dataclasses, models, dates)"""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    return jsonable_encoder(obj)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def encode_json(content: Any) -> bytes:
+        """Compact UTF-8 JSON bytes (orjson; dataclasses are encoded natively)"""
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def encode_json(content: Any) -> bytes:
+        """Compact UTF-8 JSON bytes, same output as FastAPI's JSONResponse"""
+        return json.dumps(
+            content,
+            default=_default,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered through encode_json; the app's default response class"""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
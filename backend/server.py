@@ -1,13 +1,39 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import hashlib
+import hmac
 import logging
-import uuid
+import os
+from dataclasses import asdict
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from pydantic import BaseModel
+from pathlib import Path
+from typing import List, Dict, Any, Literal, Optional
+from pydantic import BaseModel, Field
+from access_log import AccessLogPipeline, make_sink
+from cache import ResponseCache
+from changelog import VersionLog
+from content import Restaurant
+from content_source import ContentFile, ContentSnapshot
+from events import EventBroadcaster
+from gallery_store import CursorError
+from images import DEFAULT_WIDTHS, ImagePipeline
+from journal import Journal
+from loadshed import PRIORITY, STANDARD, ConcurrencyLimiter, LoadSheddingMiddleware
+from menu_search import MenuSearchIndex
+from menu_store import MenuError, MenuStore
+from metrics import MetricsMiddleware, MetricsRegistry
+from profiling import ProfilingMiddleware, RequestProfiler
+from ratelimit import TokenBucketLimiter
+from request_log import REQUEST_LOGGER, TEXT_FORMAT, JsonFormatter, LogWriter, RequestLogMiddleware, make_handler
+from serialization import FastJSONResponse, encode_json
+from sessions import SessionStore
+from static_export import StaticExporter
+from tokens import ROLE_ACCESS, ROLE_ADMIN, SessionTokenSigner, is_token, load_or_create_secret
 
 # Create the main app
-app = FastAPI(title="Les Embruns Restaurant API")
+app = FastAPI(title="Les Embruns Restaurant API", default_response_class=FastJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -17,9 +43,46 @@ VALID_ACCESS_CODE = "2108"
 ADMIN_ACCESS_CODE = "2108"
 ACCESS_SESSION_DURATION = timedelta(hours=24)  # Sessions last 24 hours
 
-# Session storage (in-memory for simplicity)
-active_sessions = {}
-admin_sessions = {}
+# Session storage (in-memory, bounded, swept in the background)
+MAX_ACCESS_SESSIONS = int(os.environ.get('MAX_ACCESS_SESSIONS', '10000'))
+MAX_ADMIN_SESSIONS = int(os.environ.get('MAX_ADMIN_SESSIONS', '100'))
+SESSION_SWEEP_INTERVAL = float(os.environ.get('SESSION_SWEEP_INTERVAL', '60'))
+active_sessions = SessionStore(ACCESS_SESSION_DURATION, MAX_ACCESS_SESSIONS)
+admin_sessions = SessionStore(ACCESS_SESSION_DURATION, MAX_ADMIN_SESSIONS)
+
+# Admission control for code and password attempts (per IP and global)
+access_limiter = TokenBucketLimiter(
+    rate=float(os.environ.get('ACCESS_RATE_PER_MINUTE', '10')) / 60,
+    burst=float(os.environ.get('ACCESS_BURST', '10')),
+    global_rate=float(os.environ.get('ACCESS_GLOBAL_RATE_PER_SECOND', '50')),
+    global_burst=float(os.environ.get('ACCESS_GLOBAL_BURST', '100')),
+)
+admin_limiter = TokenBucketLimiter(
+    rate=float(os.environ.get('ADMIN_RATE_PER_MINUTE', '5')) / 60,
+    burst=float(os.environ.get('ADMIN_BURST', '5')),
+    global_rate=float(os.environ.get('ADMIN_GLOBAL_RATE_PER_SECOND', '5')),
+    global_burst=float(os.environ.get('ADMIN_GLOBAL_BURST', '10')),
+)
+
+def enforce_rate_limit(limiter: TokenBucketLimiter, req: Request) -> None:
+    """Reject the request with a 429 before any work if the client is over budget"""
+    wait = limiter.check(req.client.host)
+    if wait is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Trop de tentatives, réessayez plus tard",
+            headers={"Retry-After": TokenBucketLimiter.retry_after(wait)},
+        )
+
+# Durable state: journal, snapshot, session signing key, image cache
+JOURNAL_DIR = Path(os.environ.get('JOURNAL_DIR', Path(__file__).parent / 'state'))
+
+# Session mode: "store" keeps sessions in memory, "token" issues stateless
+# signed tokens that any worker sharing SESSION_SECRET can verify (the secret
+# defaults to a key file in JOURNAL_DIR shared by the workers and restarts)
+SESSION_MODE = os.environ.get('SESSION_MODE', 'store')
+SESSION_SECRET = os.environ.get('SESSION_SECRET', '').encode() or load_or_create_secret(JOURNAL_DIR / 'session.key')
+session_tokens = SessionTokenSigner(SESSION_SECRET, ACCESS_SESSION_DURATION)
 
 # Site lock status
 SITE_SETTINGS = {
@@ -48,6 +111,7 @@ class SiteSettingsUpdate(BaseModel):
     is_locked: bool
 
 class MenuItemCreate(BaseModel):
+    id: Optional[str] = None
     name: str
     description: str
     price: str
@@ -61,199 +125,691 @@ class MenuCategoryUpdate(BaseModel):
     name: str
     items: List[MenuItemCreate]
 
-# Static restaurant data (replaces MongoDB)
-RESTAURANT_DATA = {
-    "name": "Les Embruns",
-    "tagline": "Restaurant Semi-Gastronomique", 
-    "location": "Port de Saint Martin de Ré",
-    "description": "Découvrez Les Embruns, une expérience culinaire raffinée au cœur du port de Saint Martin de Ré. Notre cuisine semi-gastronomique met à l'honneur les produits de la mer et les saveurs locales dans un cadre élégant proche de la mer.",
-    "hero": {
-        "title": "Les Embruns",
-        "subtitle": "L'Art Culinaire proche de la mer",
-        "description": "Une expérience semi-gastronomique unique au port de Saint Martin de Ré",
-        "image": "https://images.unsplash.com/photo-1678798947526-49a0c432105c?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NDk1Nzl8MHwxfHNlYXJjaHwxfHxzZWFzaWRlJTIwcmVzdGF1cmFudHxlbnwwfHx8fDE3NTg1Nzg2MDV8MA&ixlib=rb-4.1.0&q=85"
-    },
-    "about": {
-        "title": "Notre Histoire", 
-        "description": "Niché au cœur du port de Saint Martin de Ré, Les Embruns vous invite à découvrir une cuisine raffinée où se mêlent tradition française et innovations culinaires. Notre chef perpétue l'art de sublimer les produits locaux de l'île de Ré dans un cadre exceptionnel proche de la mer.",
-        "image": "https://images.unsplash.com/photo-1728891715962-ffee8c61e38e?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NDQ2MzR8MHwxfHNlYXJjaHwxfHxlbGVnYW50JTIwcmVzdGF1cmFudCUyMGludGVyaW9yfGVufDB8fHx8MTc1ODU3ODU5NHww&ixlib=rb-4.1.0&q=85"
-    },
-    "contact": {
-        "phone": "05 46 66 46 31",
-        "address": "6 Rue Chay Morin, 17410 Saint-Martin-de-Ré",
-        "hours": {
-            "monday": "Fermé",
-            "tuesday": "12h15-13h30, 19h15-21h15",
-            "wednesday": "12h15-13h30, 19h15-21h15",
-            "thursday": "12h15-13h30, 19h15-21h15", 
-            "friday": "12h15-13h30, 19h15-21h15",
-            "saturday": "12h15-13h30, 19h15-21h15",
-            "sunday": "12h15-13h30, 19h15-21h15"
-        }
-    }
-}
+class MenuOperation(BaseModel):
+    """One operation of a menu batch
 
-MENU_DATA = [
-    {
-        "id": "entrees",
-        "name": "Entrées",
-        "order": 1,
-        "items": [
-            {
-                "name": "Huîtres de Marennes-Oléron", 
-                "description": "Servies nature ou gratinées au beurre d'algues",
-                "price": "18€"
-            },
-            {
-                "name": "Tartare de Bar de Ligne",
-                "description": "Avocat, pomme verte et vinaigrette aux agrumes", 
-                "price": "22€"
-            },
-            {
-                "name": "Velouté de Châtaigne",
-                "description": "Émulsion de truffe et lard paysan",
-                "price": "16€"
-            }
-        ]
-    },
-    {
-        "id": "plats",
-        "name": "Plats", 
-        "order": 2,
-        "items": [
-            {
-                "name": "Sole de Nos Côtes",
-                "description": "Meunière aux pommes de terre de Noirmoutier",
-                "price": "42€"
-            },
-            {
-                "name": "Agneau de Pré-Salé", 
-                "description": "Jus au thym, légumes de saison",
-                "price": "38€"
-            },
-            {
-                "name": "Risotto aux Fruits de Mer",
-                "description": "Langoustines, moules et palourdes", 
-                "price": "34€"
-            }
-        ]
+    Items are addressed by their stable id, so earlier deletes or moves in
+    the same batch never shift later targets. `order` lists item ids for
+    "reorder" and category ids for "reorder_categories".
+    """
+    op: Literal["add", "update", "delete", "move", "reorder", "reorder_categories", "rename"]
+    category_id: Optional[str] = None
+    item_id: Optional[str] = None
+    item: Optional[MenuItemCreate] = None
+    position: Optional[int] = None
+    target_category_id: Optional[str] = None
+    order: Optional[List[str]] = None
+    name: Optional[str] = None
+
+class MenuBatchRequest(BaseModel):
+    operations: List[MenuOperation]
+
+class ProfilingRequest(BaseModel):
+    count: int = Field(default=1, ge=1, le=1000)
+    path_prefix: str = "/api/"
+    method: Optional[str] = None
+
+# Site content (restaurant, menu, gallery) from the data file, reloaded when it changes
+content_file = ContentFile(
+    Path(os.environ.get('CONTENT_FILE', Path(__file__).parent / 'data' / 'content.json')),
+    poll_interval=float(os.environ.get('CONTENT_POLL_INTERVAL', '2')),
+)
+initial_content = content_file.load()
+
+# Content validated once into typed structures; responses encode these directly
+restaurant_info = initial_content.restaurant
+gallery_store = initial_content.gallery
+# Page cursors are signed with a key derived from the session secret (shared by the workers)
+gallery_store.cursor_key = hmac.new(SESSION_SECRET, b"gallery-cursor", hashlib.sha256).digest()
+
+# Indexed menu with stable item ids
+menu_store = initial_content.menu
+
+# Search index over item names and descriptions, kept up to date by the menu store
+menu_search = MenuSearchIndex()
+menu_store.attach_index(menu_search)
+MENU_SEARCH_LIMIT = int(os.environ.get('MENU_SEARCH_LIMIT', '20'))
+MENU_SEARCH_MAX_LIMIT = int(os.environ.get('MENU_SEARCH_MAX_LIMIT', '100'))
+MENU_SEARCH_MAX_QUERY = 200
+
+# Per-category versions and recent changes, for /api/menu?since= deltas: versions
+# are journal sequence numbers, the same in every worker
+menu_versions = VersionLog(
+    capacity=int(os.environ.get('MENU_CHANGELOG_SIZE', '1000')),
+    epoch=load_or_create_secret(JOURNAL_DIR / 'journal.id')[:4].hex(),
+)
+menu_store.attach_changelog(menu_versions)
+
+# Digest of the data file menu the live menu derives from (admin changes apply on top)
+content_sources = {"menu": initial_content.digests["menu"]}
+
+# Durable journal of admin changes (menu, site settings, token revocations),
+# shared by the workers: each one applies the records the others write
+content_journal = Journal(
+    JOURNAL_DIR,
+    lambda: {
+        "menu": menu_store.snapshot(),
+        "menu_source": content_sources["menu"],
+        "settings": {"is_locked": SITE_SETTINGS["is_locked"]},
+        "revocations": session_tokens.revocations.snapshot(),
     },
-    {
-        "id": "desserts",
-        "name": "Desserts",
-        "order": 3, 
-        "items": [
-            {
-                "name": "Tarte au Chocolat Valrhona",
-                "description": "Glace vanille de Madagascar",
-                "price": "14€"
-            },
-            {
-                "name": "Île Flottante Revisitée", 
-                "description": "Caramel au beurre salé de Guérande",
-                "price": "12€"
-            }
-        ]
+    flush_interval=float(os.environ.get('JOURNAL_FLUSH_INTERVAL', '0.05')),
+    compact_every=int(os.environ.get('JOURNAL_COMPACT_EVERY', '1000')),
+    replicate=lambda state, records, rebuild: replicate_content_state(state, records, rebuild),
+    settled=menu_versions.commit,
+)
+
+# State the journal applies to: captured at startup, restored when a worker rebuilds
+content_base: Dict[str, Any] = {}
+
+def apply_journal_record(record: dict) -> None:
+    """Apply one journal record to the in-memory state"""
+    if record["type"] == "menu":
+        for operation in record["ops"]:
+            try:
+                menu_store.apply(operation)
+            except MenuError as e:
+                logging.warning(f"Skipping journal operation {record.get('seq')}: {e}")
+    elif record["type"] == "menu_load":
+        menu_store.load(record["menu"])
+        content_sources["menu"] = record["source"]
+    elif record["type"] == "settings":
+        SITE_SETTINGS["is_locked"] = record["is_locked"]
+        if "revoke_before" in record:
+            revoke_access_sessions(record["revoke_before"])
+    elif record["type"] == "revoke":
+        session_tokens.revocations.revoke(record["token_id"], record["expires_at"])
+    elif record["type"] == "image":
+        if image_pipeline.adopt(record["name"], record["digest"]):
+            attach_responsive_images()
+
+def load_content_state(state: dict) -> None:
+    """Adopt a journal snapshot state"""
+    menu_store.load(state["menu"])
+    content_sources["menu"] = state.get("menu_source", content_sources["menu"])
+    SITE_SETTINGS["is_locked"] = state["settings"]["is_locked"]
+    session_tokens.revocations.load(state.get("revocations", {}))
+
+def restore_content_state() -> int:
+    """Restore menu and settings from the snapshot plus the journal tail"""
+    content_base.update(
+        menu=menu_store.snapshot(),
+        menu_source=content_sources["menu"],
+        settings={"is_locked": SITE_SETTINGS["is_locked"]},
+    )
+    state, records = content_journal.replay()
+    if state is not None:
+        load_content_state(state)
+    for record in records:
+        apply_journal_record(record)
+    return len(records)
+
+def replicate_content_state(state: Optional[dict], records: List[dict], rebuild: bool) -> None:
+    """Apply journal records written by another worker, then notify this worker's clients"""
+    if rebuild:
+        # Écritures concurrentes dans plusieurs workers : repartir de l'état initial, dans l'ordre du fichier
+        load_content_state(content_base)
+    if state is not None:
+        load_content_state(state)
+    for record in records:
+        apply_journal_record(record)
+    changed = {"menu", "site_settings"} if rebuild or state is not None else {
+        "site_settings" if record["type"] == "settings" else "menu"
+        for record in records if record["type"] in ("menu", "menu_load", "settings")
     }
-]
-
-GALLERY_DATA = [
-    {
-        "id": "1",
-        "image": "https://images.unsplash.com/photo-1731156683189-64b572795e4e?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NDk1Nzd8MHwxfHNlYXJjaHwxfHxnb3VybWV0JTIwRnJlbmNoJTIwY3Vpc2luZXxlbnwwfHx8fDE3NTg1Nzg2MDB8MA&ixlib=rb-4.1.0&q=85",
-        "alt": "Plat gastronomique signature",
-        "category": "food",
-        "order": 1
-    },
-    {
-        "id": "2",
-        "image": "https://images.unsplash.com/photo-1737700088910-8c22735cf11f?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NDk1Nzd8MHwxfHNlYXJjaHwyfHxnb3VybWV0JTIwRnJlbmNoJTIwY3Vpc2luZXxlbnwwfHx8fDE3NTg1Nzg2MDB8MA&ixlib=rb-4.1.0&q=85",
-        "alt": "Spécialités artisanales",
-        "category": "food"
-    },
-    {
-        "id": "3", 
-        "image": "https://images.unsplash.com/photo-1651607826886-efd567ad54f2?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NDQ2MzR8MHwxfHNlYXJjaHw0fHxlbGVnYW50JTIwcmVzdGF1cmFudCUyMGludGVyaW9yfGVufDB8fHx8MTc1ODU3ODU5NHww&ixlib=rb-4.1.0&q=85",
-        "alt": "Table dressée avec élégance", 
-        "category": "interior"
+    if changed:
+        publish_change(*sorted(changed))
+
+# Optional MongoDB content backend ("memory" serves the data file content)
+CONTENT_BACKEND = os.environ.get('CONTENT_BACKEND', 'memory')
+content_repository = None
+menu_sync = {"dirty": False, "task": None}
+
+async def load_content_from_database() -> None:
+    """Seed MongoDB if empty, then load the stored content into memory"""
+    global content_repository, restaurant_info
+    from database import init_database, repository
+    content_repository = repository
+    seed = content_file.current.document
+    await init_database(seed["restaurant"], menu_store.snapshot(), seed["gallery"])
+    restaurant = await repository.get_restaurant_info()
+    if restaurant:
+        restaurant_info = Restaurant.from_dict(restaurant)
+    menu_store.load(await repository.get_menu())
+    gallery_store.load(await repository.get_gallery())
+
+async def sync_menu_to_database() -> None:
+    """Write the menu back to MongoDB until no change is pending"""
+    try:
+        while menu_sync["dirty"]:
+            menu_sync["dirty"] = False
+            await content_repository.save_menu(menu_store.snapshot())
+    except Exception as e:
+        logging.error(f"Error saving menu to database: {e}")
+    finally:
+        menu_sync["task"] = None
+
+def schedule_menu_sync() -> None:
+    """Coalesce menu write-backs into a single in-flight bulk write"""
+    menu_sync["dirty"] = True
+    if menu_sync["task"] is None:
+        menu_sync["task"] = asyncio.create_task(sync_menu_to_database())
+
+# Change notifications pushed to clients over Server-Sent Events
+change_events = EventBroadcaster(
+    max_subscribers=int(os.environ.get('EVENTS_MAX_SUBSCRIBERS', '10000')),
+    buffer_size=int(os.environ.get('EVENTS_BUFFER_SIZE', '32')),
+    keepalive=float(os.environ.get('EVENTS_KEEPALIVE', '25')),
+)
+EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', '5000'))
+EVENT_RESOURCES = ("restaurant_info", "menu", "gallery", "site_settings")
+
+def publish_change(*names: str) -> None:
+    """Invalidate cached resources and notify connected clients of their new versions"""
+    content_cache.invalidate(*names)
+    if static_export is not None:
+        static_export.schedule(*names)
+    for name in names:
+        data = {"version": content_cache.version(name)}
+        if name == "site_settings":
+            data["is_locked"] = SITE_SETTINGS["is_locked"]
+        change_events.publish(name, data)
+
+def record_menu_change(*operations: dict) -> None:
+    """Invalidate the menu payloads, notify clients and journal the operations"""
+    publish_change("menu")
+    content_journal.append({"type": "menu", "ops": list(operations)})
+    if content_repository is not None:
+        schedule_menu_sync()
+
+# Audit trail of access code and admin login attempts
+ACCESS_LOG_SINK = os.environ.get('ACCESS_LOG_SINK', 'jsonl')
+access_logs = AccessLogPipeline(
+    make_sink(ACCESS_LOG_SINK, JOURNAL_DIR),
+    max_queue=int(os.environ.get('ACCESS_LOG_QUEUE_SIZE', '10000')),
+    batch_size=int(os.environ.get('ACCESS_LOG_BATCH_SIZE', '200')),
+    flush_interval=float(os.environ.get('ACCESS_LOG_FLUSH_INTERVAL', '1.0')),
+)
+
+# Pre-serialized payloads of the public content endpoints
+content_cache = ResponseCache()
+content_cache.register("restaurant_info", lambda: restaurant_info)
+content_cache.register("menu", menu_store.public_view)
+content_cache.register("gallery", gallery_store.images)
+content_cache.register("site_settings", lambda: {"is_locked": SITE_SETTINGS["is_locked"]})
+content_cache.register(
+    "bootstrap",
+    lambda: {
+        "site": {"is_locked": SITE_SETTINGS["is_locked"]},
+        "restaurant": restaurant_info,
+        "menu": menu_store.public_view(),
+        "gallery": gallery_store.images(),
     },
-    {
-        "id": "4",
-        "image": "https://images.unsplash.com/photo-1709940683584-a3f589a47e18?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NDk1Nzl8MHwxfHNlYXJjaHwyfHxzZWFzaWRlJTIwcmVzdGF1cmFudHxlbnwwfHx8fDE3NTg1Nzg2MDV8MA&ixlib=rb-4.1.0&q=85",
-        "alt": "Vue sur le port",
-        "category": "view"
-    }
-]
+    depends_on=("restaurant_info", "menu", "gallery", "site_settings"),
+)
+
+# Static copy of the public responses that nginx serves without reaching the
+# backend (see frontend/nginx.conf); disabled unless STATIC_EXPORT_DIR is set
+STATIC_EXPORT_DIR = os.environ.get('STATIC_EXPORT_DIR', '')
+static_export = StaticExporter(Path(STATIC_EXPORT_DIR), content_cache) if STATIC_EXPORT_DIR else None
+
+GALLERY_PAGE_SIZE = int(os.environ.get('GALLERY_PAGE_SIZE', '24'))
+GALLERY_MAX_PAGE_SIZE = int(os.environ.get('GALLERY_MAX_PAGE_SIZE', '100'))
+BOOTSTRAP_SESSION_MEMBERS = {
+    True: b'"session":{"hasAccess":true}',
+    False: b'"session":{"hasAccess":false}',
+}
+
+# Responsive derivatives of local images; content whose `image` is the file
+# name of a source gets a `responsive` member (srcset, dimensions, placeholder)
+image_pipeline = ImagePipeline(
+    Path(os.environ.get('IMAGE_SOURCE_DIR', Path(__file__).parent / 'images')),
+    Path(os.environ.get('IMAGE_CACHE_DIR', JOURNAL_DIR / 'images')),
+    widths=[int(w) for w in os.environ.get('IMAGE_WIDTHS', ','.join(map(str, DEFAULT_WIDTHS))).split(',')],
+    workers=int(os.environ.get('IMAGE_WORKERS', '2')),
+)
+IMAGE_MAX_UPLOAD_BYTES = int(os.environ.get('IMAGE_MAX_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def attach_responsive_images() -> None:
+    """Attach derivative descriptions to every image that has a local source"""
+    for holder in (restaurant_info.hero, restaurant_info.about, *gallery_store):
+        holder.responsive = image_pipeline.responsive(holder.image)
+
+def apply_responsive_images() -> None:
+    attach_responsive_images()
+    publish_change("restaurant_info", "gallery")
+
+async def prepare_images() -> None:
+    try:
+        derived = await image_pipeline.scan()
+        apply_responsive_images()
+        logging.info(f"Prepared {derived} responsive images")
+    except Exception as e:
+        logging.error(f"Error preparing images: {e}")
+
+CONTENT_RESOURCES = {"restaurant": "restaurant_info", "menu": "menu", "gallery": "gallery"}
+
+def load_menu_from_file(menu: MenuStore, source: str) -> None:
+    """Adopt the data file's menu in place of the live one (admin changes included)
+
+    Decided under the journal lock: when several workers see the same new
+    file, the first one journals it and the others just replicate that record.
+    """
+    def adopt() -> None:
+        if content_sources["menu"] == source:
+            return
+        menu_store.swap(menu)
+        content_sources["menu"] = source
+        content_journal.append({"type": "menu_load", "source": source, "menu": menu_store.snapshot()})
+        if content_repository is not None:
+            schedule_menu_sync()
+    content_journal.exclusive(adopt)
+
+def apply_content(snapshot: ContentSnapshot, changed: List[str]) -> None:
+    """Swap in the changed sections of a new data file version
+
+    Runs on the event loop without awaiting: no request observes a partial swap.
+    """
+    global restaurant_info
+    if "restaurant" in changed:
+        restaurant_info = snapshot.restaurant
+    if "gallery" in changed:
+        gallery_store.swap(snapshot.gallery)
+    if "menu" in changed:
+        load_menu_from_file(snapshot.menu, snapshot.digests["menu"])
+    if "restaurant" in changed or "gallery" in changed:
+        attach_responsive_images()
+    publish_change(*(CONTENT_RESOURCES[section] for section in changed))
+
+# On-demand cProfile captures (neither the profiling endpoints nor the event
+# stream, which would hold the profiler for as long as it stays open)
+request_profiler = RequestProfiler(
+    capacity=int(os.environ.get('PROFILE_BUFFER_SIZE', '20')),
+    excluded_prefixes=("/api/admin/profiling", "/api/events"),
+)
+
+# Bound on requests in flight per worker; admin and session checks keep a
+# reserved slice, the rest is shed with 503 + Retry-After beyond the queue
+# or while the event loop lags more than MAX_EVENT_LOOP_LAG seconds
+request_limiter = ConcurrencyLimiter(
+    limit=int(os.environ.get('MAX_CONCURRENT_REQUESTS', '64')),
+    reserved=int(os.environ.get('RESERVED_PRIORITY_REQUESTS', '8')),
+    max_queue=int(os.environ.get('MAX_QUEUED_REQUESTS', '256')),
+    queue_timeout=float(os.environ.get('QUEUE_TIMEOUT', '2')),
+    max_lag=float(os.environ.get('MAX_EVENT_LOOP_LAG', '0.05')),
+)
+PRIORITY_PATH_PREFIXES = ("/api/admin/", "/api/access/check/")
+# Streams hold their connection for hours; health and metrics must answer under load
+UNLIMITED_PATH_PREFIXES = ("/api/events", "/api/health", "/api/metrics")
+SHED_RETRY_AFTER = int(os.environ.get('SHED_RETRY_AFTER', '2'))
+
+# Request metrics and gauges sampled when /api/metrics is scraped
+metrics_registry = MetricsRegistry()
+
+def _cache_hit_ratio():
+    lookups = content_cache.hits + content_cache.misses
+    return content_cache.hits / lookups if lookups else 0.0
+
+metrics_registry.gauge(
+    "sessions_active", "Sessions currently held in the session stores.",
+    lambda: [({"store": "access"}, len(active_sessions)), ({"store": "admin"}, len(admin_sessions))],
+)
+metrics_registry.gauge(
+    "sessions_evicted_total", "Sessions evicted from the stores, by reason.",
+    lambda: [
+        ({"store": name, "reason": reason}, store.stats()[f"evicted_{reason}"])
+        for name, store in (("access", active_sessions), ("admin", admin_sessions))
+        for reason in ("expired", "lru")
+    ],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "content_version", "Current version of each cached content resource.",
+    lambda: [({"resource": name}, version) for name, (version, _) in content_cache.resources().items()],
+)
+metrics_registry.gauge(
+    "content_size_bytes", "Encoded size of each cached content resource.",
+    lambda: [({"resource": name}, size) for name, (_, size) in content_cache.resources().items() if size is not None],
+)
+metrics_registry.gauge(
+    "menu_items", "Menu items currently published.",
+    lambda: [({}, len(menu_store))],
+)
+metrics_registry.gauge(
+    "menu_version", "Current menu version (journal sequence number reached by this worker).",
+    lambda: [({}, menu_versions.version)],
+)
+metrics_registry.gauge(
+    "menu_search_terms", "Distinct terms in the menu search index.",
+    lambda: [({}, menu_search.vocabulary_size())],
+)
+metrics_registry.gauge(
+    "response_cache_lookups_total", "Response cache lookups, by result.",
+    lambda: [
+        ({"result": "hit"}, content_cache.hits),
+        ({"result": "miss"}, content_cache.misses),
+        ({"result": "not_modified"}, content_cache.not_modified),
+    ],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "response_cache_hit_ratio", "Share of response cache lookups served from the cache.",
+    lambda: [({}, round(_cache_hit_ratio(), 6))],
+)
+metrics_registry.gauge(
+    "access_log_queue_depth", "Access log records waiting to be written.",
+    lambda: [({}, access_logs.stats()["queue_depth"])],
+)
+metrics_registry.gauge(
+    "access_log_records_total", "Access log records, by outcome.",
+    lambda: [
+        ({"outcome": outcome}, access_logs.stats()[outcome])
+        for outcome in ("enqueued", "dropped", "written", "lost")
+    ],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "rate_limit_decisions_total", "Admission decisions of the rate limiters.",
+    lambda: [
+        ({"limiter": name, "decision": decision}, limiter.stats()[decision])
+        for name, limiter in (("access", access_limiter), ("admin", admin_limiter))
+        for decision in ("allowed", "rejected_client", "rejected_global")
+    ],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "journal_records_written_total", "Records appended to the content journal.",
+    lambda: [({}, content_journal.records_written)],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "journal_fsyncs_total", "Journal group commits (fsync calls).",
+    lambda: [({}, content_journal.fsyncs)],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "journal_records_replicated_total", "Journal records written by other workers and applied by this one.",
+    lambda: [({}, content_journal.replicated)],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "journal_rebuilds_total", "Full state rebuilds after concurrent writes from several workers.",
+    lambda: [({}, content_journal.rebuilds)],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "content_file_reloads_total", "Data file versions applied or rejected.",
+    lambda: [({"outcome": "applied"}, content_file.reloads), ({"outcome": "failed"}, content_file.failures)],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "static_exports_total", "Resources written to the static export directory, by outcome.",
+    lambda: [({"outcome": "written"}, static_export.exports), ({"outcome": "failed"}, static_export.failures)]
+    if static_export is not None else [],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "requests_in_flight", "Requests holding a concurrency limiter slot.",
+    lambda: [({}, request_limiter.active)],
+)
+metrics_registry.gauge(
+    "event_loop_lag_seconds", "How late the event loop last ran a timer.",
+    lambda: [({}, round(request_limiter.lag, 6))],
+)
+metrics_registry.gauge(
+    "request_queue_depth", "Requests waiting for a concurrency limiter slot, by class.",
+    lambda: [({"class": kind}, request_limiter.queue_depth(kind)) for kind in (PRIORITY, STANDARD)],
+)
+metrics_registry.gauge(
+    "request_admissions_total", "Concurrency limiter decisions, by class and outcome.",
+    lambda: [({"class": kind, "outcome": outcome}, count) for (kind, outcome), count in request_limiter.counts.items()],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "events_subscribers", "Clients connected to the change event stream.",
+    lambda: [({}, len(change_events))],
+)
+metrics_registry.gauge(
+    "events_total", "Change events, by outcome.",
+    lambda: [
+        ({"outcome": outcome}, change_events.stats()[outcome])
+        for outcome in ("published", "delivered", "dropped_slow", "rejected")
+    ],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "image_sources_total", "Image sources processed by the derivative pipeline, by result.",
+    lambda: [
+        ({"result": "generated"}, image_pipeline.generated),
+        ({"result": "reused"}, image_pipeline.reused),
+        ({"result": "failed"}, image_pipeline.failed),
+    ],
+    kind="counter",
+)
+
+def revoke_access_sessions(issued_before_ms: Optional[int] = None) -> int:
+    """End the visitor sessions and tokens issued before the cutoff (now by default); returns it
+
+    Sessions created after it survive, so replaying the journal record is harmless.
+    """
+    cutoff = session_tokens.revocations.revoke_role(ROLE_ACCESS, issued_before_ms)
+    active_sessions.revoke_created_before(datetime.utcfromtimestamp(cutoff / 1000))
+    return cutoff
 
 def verify_session(session_id: str) -> bool:
     """Verify if session is valid and not expired"""
-    if session_id not in active_sessions:
-        return False
-    
-    session_data = active_sessions[session_id]
-    if datetime.utcnow() > session_data['expires_at']:
-        del active_sessions[session_id]
-        return False
-    
-    return True
+    if is_token(session_id):
+        return session_tokens.verify(session_id, ROLE_ACCESS)
+    return active_sessions.verify(session_id)
 
 def verify_admin_session(session_id: str) -> bool:
     """Verify if admin session is valid and not expired"""
-    if session_id not in admin_sessions:
-        return False
-    
-    session_data = admin_sessions[session_id]
-    if datetime.utcnow() > session_data['expires_at']:
-        del admin_sessions[session_id]
-        return False
-    
-    return True
+    if is_token(session_id):
+        return session_tokens.verify(session_id, ROLE_ADMIN)
+    return admin_sessions.verify(session_id)
+
+def create_access_session(req: Request, reuse: bool = False) -> str:
+    """Create a visitor session (or token) for this client"""
+    if SESSION_MODE == 'token':
+        return session_tokens.issue(ROLE_ACCESS)
+    return active_sessions.create(
+        req.client.host, req.headers.get('user-agent', ''), reuse=reuse
+    )
+
+def create_admin_session(req: Request) -> str:
+    """Create an admin session (or token) for this client"""
+    if SESSION_MODE == 'token':
+        return session_tokens.issue(ROLE_ADMIN)
+    return admin_sessions.create(req.client.host, req.headers.get('user-agent', ''))
 
 # Restaurant Info Endpoints
 @api_router.get("/restaurant/info")
-async def get_restaurant_info():
+async def get_restaurant_info(req: Request):
     """Get restaurant information"""
     try:
-        return RESTAURANT_DATA
+        return content_cache.respond("restaurant_info", req)
     except Exception as e:
         logging.error(f"Error fetching restaurant info: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # Menu Endpoints
 @api_router.get("/menu")
-async def get_menu():
-    """Get complete menu with categories and items"""
+async def get_menu(req: Request):
+    """Get complete menu with categories and items
+
+    The full menu is the cached payload (ETag, compression), with its
+    version in an X-Menu-Version header. With `since=<version>` the response
+    is a delta: the categories changed after that version with the version
+    each was last changed at, the ids of the categories deleted since, the
+    current category order and the new version to send next time. A
+    version this worker cannot answer (older than the changelog, ahead of
+    the journal records it has applied, from another journal) gets the full
+    menu instead. The versions of the restaurant info and gallery are
+    included in deltas so one request tells the client what else to refetch.
+    """
     try:
-        return MENU_DATA
+        since = req.query_params.get("since") if req.scope["query_string"] else None
+        version = menu_versions.parse(since) if since else None
+        changes = menu_store.changes_since(version) if version is not None else None
+        if changes is None:
+            response = content_cache.respond("menu", req)
+            response.headers["X-Menu-Version"] = menu_versions.token()
+            return response
+        categories, deleted = changes
+        return FastJSONResponse({
+            "version": menu_versions.token(),
+            "order": menu_store.category_ids(),
+            "categories": categories,
+            "deleted": deleted,
+            "versions": {category.id: menu_versions.version_of(category.id) for category in categories},
+            "resources": {name: content_cache.version(name) for name in ("restaurant_info", "gallery")},
+        }, headers={"Cache-Control": "no-cache"})
     except Exception as e:
         logging.error(f"Error fetching menu: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.get("/menu/search")
+async def search_menu(req: Request):
+    """Search menu items by name and description
+
+    Query parameters: `q` (required), `category` and `limit`. Accents and
+    case are ignored, plurals and feminine forms match ("huître" finds
+    "Huîtres"), and a word also matches the words it begins ("langou").
+    Every word must match; items are ranked by relevance, name hits first.
+    Results are computed per request: the index answers faster than a
+    compressed cache entry could be built for each new query.
+    """
+    try:
+        params = req.query_params
+        query, category, limit = (params.get("q") or "").strip(), params.get("category"), params.get("limit")
+        if not query or len(query) > MENU_SEARCH_MAX_QUERY:
+            raise HTTPException(status_code=400, detail=f"q doit faire entre 1 et {MENU_SEARCH_MAX_QUERY} caractères")
+        if limit is None:
+            size = MENU_SEARCH_LIMIT
+        elif limit.isdigit() and 1 <= int(limit) <= MENU_SEARCH_MAX_LIMIT:
+            size = int(limit)
+        else:
+            raise HTTPException(status_code=400, detail=f"limit doit être entre 1 et {MENU_SEARCH_MAX_LIMIT}")
+
+        total, matches = menu_store.search(query, size, category)
+        # Réponse construite directement : pas de passage par jsonable_encoder
+        return FastJSONResponse({
+            "query": query,
+            "total": total,
+            "items": [
+                {
+                    "id": item.id,
+                    "name": item.name,
+                    "description": item.description,
+                    "price": item.price,
+                    "category_id": category_id,
+                    "category": menu_store.get_category(category_id).name,
+                    "score": round(score, 3),
+                }
+                for item, category_id, score in matches
+            ],
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error searching menu: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # Gallery Endpoints
 @api_router.get("/gallery")
-async def get_gallery():
-    """Get gallery images"""
+async def get_gallery(req: Request):
+    """Get gallery images, optionally filtered and paged
+
+    Query parameters: `category` (comma-separated), `cursor` and `limit`.
+    Without cursor or limit the response is the plain list of images; with
+    either it is {"items": [...], "next_cursor": ...}. Parameters are read
+    from the query string directly so the unfiltered list stays on the
+    cached fast path.
+    """
     try:
-        return GALLERY_DATA
+        if not req.scope["query_string"]:
+            return content_cache.respond("gallery", req)
+        params = req.query_params
+        category, cursor, limit = params.get("category"), params.get("cursor"), params.get("limit")
+        categories = tuple(sorted(set(category.split(",")))) if category else None
+        # Chaque combinaison occupe une entrée du cache : seules les catégories existantes sont admises
+        if categories is not None and not gallery_store.categories().keys() >= set(categories):
+            raise HTTPException(status_code=400, detail="Catégorie inconnue")
+        if cursor is None and limit is None:
+            if categories is None:
+                return content_cache.respond("gallery", req)
+            return content_cache.respond_keyed(
+                "gallery", ("list", categories), lambda: gallery_store.select(categories), req
+            )
+        if limit is None:
+            size = GALLERY_PAGE_SIZE
+        elif limit.isdigit() and 1 <= int(limit) <= GALLERY_MAX_PAGE_SIZE:
+            size = int(limit)
+        else:
+            raise HTTPException(status_code=400, detail=f"limit doit être entre 1 et {GALLERY_MAX_PAGE_SIZE}")
+        after = gallery_store.decode_cursor(cursor) if cursor else None
+        return content_cache.respond_keyed(
+            "gallery", ("page", categories, after, size), lambda: gallery_store.page(categories, after, size), req
+        )
+    except HTTPException:
+        raise
+    except CursorError:
+        raise HTTPException(status_code=400, detail="Curseur invalide")
     except Exception as e:
         logging.error(f"Error fetching gallery: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.get("/images/{digest}/{filename}")
+async def get_image_derivative(digest: str, filename: str):
+    """Serve one image derivative (content-addressed, cacheable forever)"""
+    path = image_pipeline.derivative_path(digest, filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    return FileResponse(path, headers={"Cache-Control": IMAGE_CACHE_CONTROL})
+
+@api_router.get("/events")
+async def stream_events(req: Request):
+    """Server-Sent Events stream of content and lock-state changes
+
+    Each event is named after the resource that changed and carries its new
+    version. A fresh connection first receives a "hello" event with the
+    current versions; a reconnect with Last-Event-ID replays what it missed,
+    or gets a "resync" event when that is no longer possible.
+    """
+    try:
+        last_event_id = req.headers.get("last-event-id") or None
+        subscriber = change_events.subscribe(last_event_id)
+        if subscriber is None:
+            raise HTTPException(status_code=503, detail="Trop de connexions", headers={"Retry-After": "30"})
+        
+        greeting = b"retry: %d\n\n" % EVENTS_RETRY_MS
+        if not last_event_id:
+            versions = {name: content_cache.version(name) for name in EVENT_RESOURCES}
+            versions["is_locked"] = SITE_SETTINGS["is_locked"]
+            greeting += b"id: %s\nevent: hello\ndata: %s\n\n" % (change_events.last_event_id.encode(), encode_json(versions))
+        return StreamingResponse(
+            change_events.stream(subscriber, greeting),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error opening event stream: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # Access Control Endpoints
 @api_router.post("/access/verify", response_model=AccessResponse)
 async def verify_access_code(request: AccessRequest, req: Request):
     """Verify access code and create session"""
+    enforce_rate_limit(access_limiter, req)
     try:
         # Si le site n'est pas verrouillé, accès autorisé sans code
         if not SITE_SETTINGS["is_locked"]:
-            session_id = str(uuid.uuid4())
-            session_data = {
-                'created_at': datetime.utcnow(),
-                'expires_at': datetime.utcnow() + ACCESS_SESSION_DURATION,
-                'ip_address': req.client.host,
-                'user_agent': req.headers.get('user-agent', '')
-            }
-            active_sessions[session_id] = session_data
+            # Réutiliser la session existante du même client
+            session_id = create_access_session(req, reuse=True)
+            access_logs.record("access", session_id, True, req.client.host, req.headers.get('user-agent'))
             
             return AccessResponse(
                 success=True,
@@ -262,17 +818,9 @@ async def verify_access_code(request: AccessRequest, req: Request):
             )
         
         if request.code == VALID_ACCESS_CODE:
-            # Generate session ID
-            session_id = str(uuid.uuid4())
-            
             # Create session
-            session_data = {
-                'created_at': datetime.utcnow(),
-                'expires_at': datetime.utcnow() + ACCESS_SESSION_DURATION,
-                'ip_address': req.client.host,
-                'user_agent': req.headers.get('user-agent', '')
-            }
-            active_sessions[session_id] = session_data
+            session_id = create_access_session(req)
+            access_logs.record("access", session_id, True, req.client.host, req.headers.get('user-agent'))
             
             return AccessResponse(
                 success=True,
@@ -280,6 +828,7 @@ async def verify_access_code(request: AccessRequest, req: Request):
                 session_id=session_id
             )
         else:
+            access_logs.record("access", "", False, req.client.host, req.headers.get('user-agent'))
             return AccessResponse(
                 success=False,
                 message="Code d'accès invalide"
@@ -299,29 +848,34 @@ async def check_session(session_id: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @api_router.get("/site/settings")
-async def get_site_settings():
+async def get_site_settings(req: Request):
     """Get site settings (lock status)"""
     try:
-        return {"is_locked": SITE_SETTINGS["is_locked"]}
+        return content_cache.respond("site_settings", req)
     except Exception as e:
         logging.error(f"Error fetching site settings: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.get("/bootstrap")
+async def get_bootstrap(req: Request, session_id: str = ""):
+    """Get everything needed for first paint in one payload"""
+    try:
+        # Seule la validité de la session est calculée par requête
+        has_access = bool(session_id) and verify_session(session_id)
+        return content_cache.respond("bootstrap", req, BOOTSTRAP_SESSION_MEMBERS[has_access])
+    except Exception as e:
+        logging.error(f"Error fetching bootstrap data: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # Admin Endpoints
 @api_router.post("/admin/login", response_model=AdminResponse)
 async def admin_login(request: AdminLoginRequest, req: Request):
     """Admin login"""
+    enforce_rate_limit(admin_limiter, req)
     try:
         if request.password == ADMIN_ACCESS_CODE:
-            session_id = str(uuid.uuid4())
-            
-            session_data = {
-                'created_at': datetime.utcnow(),
-                'expires_at': datetime.utcnow() + ACCESS_SESSION_DURATION,
-                'ip_address': req.client.host,
-                'user_agent': req.headers.get('user-agent', '')
-            }
-            admin_sessions[session_id] = session_data
+            session_id = create_admin_session(req)
+            access_logs.record("admin", session_id, True, req.client.host, req.headers.get('user-agent'))
             
             return AdminResponse(
                 success=True,
@@ -329,6 +883,7 @@ async def admin_login(request: AdminLoginRequest, req: Request):
                 session_id=session_id
             )
         else:
+            access_logs.record("admin", "", False, req.client.host, req.headers.get('user-agent'))
             return AdminResponse(
                 success=False,
                 message="Mot de passe incorrect"
@@ -347,6 +902,28 @@ async def check_admin_session(session_id: str):
         logging.error(f"Error checking admin session: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.post("/admin/logout")
+async def admin_logout(req: Request):
+    """Admin logout (revokes the session or token)"""
+    try:
+        auth_header = req.headers.get('authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise HTTPException(status_code=401, detail="Non autorisé")
+        
+        session_id = auth_header.split(' ')[1]
+        if is_token(session_id):
+            claims = session_tokens.revoke(session_id, ROLE_ADMIN)
+            if claims is not None:
+                content_journal.append({"type": "revoke", "token_id": claims["j"], "expires_at": claims["e"]})
+        else:
+            admin_sessions.discard(session_id)
+        return {"success": True, "message": "Déconnexion réussie"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error in admin logout: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @api_router.put("/admin/site/settings")
 async def update_site_settings(settings: SiteSettingsUpdate, req: Request):
     """Update site settings (admin only)"""
@@ -360,7 +937,13 @@ async def update_site_settings(settings: SiteSettingsUpdate, req: Request):
         if not verify_admin_session(session_id):
             raise HTTPException(status_code=401, detail="Session admin invalide")
         
+        record = {"type": "settings", "is_locked": settings.is_locked}
+        # Verrouiller le site met fin aux sessions visiteurs déjà ouvertes (jetons et sessions en mémoire)
+        if settings.is_locked and not SITE_SETTINGS["is_locked"]:
+            record["revoke_before"] = revoke_access_sessions()
         SITE_SETTINGS["is_locked"] = settings.is_locked
+        publish_change("site_settings")
+        content_journal.append(record)
         return {"success": True, "message": "Paramètres mis à jour", "settings": SITE_SETTINGS}
     except HTTPException:
         raise
@@ -368,6 +951,178 @@ async def update_site_settings(settings: SiteSettingsUpdate, req: Request):
         logging.error(f"Error updating site settings: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.get("/admin/sessions/stats")
+async def get_session_stats(req: Request):
+    """Get session store size and eviction counters (admin only)"""
+    try:
+        # Vérifier l'autorisation admin via header
+        auth_header = req.headers.get('authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise HTTPException(status_code=401, detail="Non autorisé")
+        
+        session_id = auth_header.split(' ')[1]
+        if not verify_admin_session(session_id):
+            raise HTTPException(status_code=401, detail="Session admin invalide")
+        
+        return {
+            "worker": os.getpid(),
+            "access": active_sessions.stats(),
+            "admin": admin_sessions.stats(),
+            "access_log": access_logs.stats(),
+            "rate_limits": {"access": access_limiter.stats(), "admin": admin_limiter.stats()},
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error fetching session stats: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.get("/admin/profiling")
+async def get_profiling_status(req: Request):
+    """Profiler state and captured profiles, newest first (admin only)"""
+    try:
+        # Vérifier l'autorisation admin via header
+        auth_header = req.headers.get('authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise HTTPException(status_code=401, detail="Non autorisé")
+        
+        session_id = auth_header.split(' ')[1]
+        if not verify_admin_session(session_id):
+            raise HTTPException(status_code=401, detail="Session admin invalide")
+        
+        return {"status": request_profiler.status(), "profiles": request_profiler.summaries()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error fetching profiling status: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.post("/admin/profiling")
+async def start_profiling(profiling: ProfilingRequest, req: Request):
+    """Profile the next N requests matching a path prefix and method (admin only)"""
+    try:
+        # Vérifier l'autorisation admin via header
+        auth_header = req.headers.get('authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise HTTPException(status_code=401, detail="Non autorisé")
+        
+        session_id = auth_header.split(' ')[1]
+        if not verify_admin_session(session_id):
+            raise HTTPException(status_code=401, detail="Session admin invalide")
+        
+        request_profiler.arm(profiling.count, profiling.path_prefix, profiling.method)
+        return {"success": True, "status": request_profiler.status()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error arming profiler: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.delete("/admin/profiling")
+async def stop_profiling(req: Request, clear: bool = False):
+    """Disarm the profiler, optionally dropping captured profiles (admin only)"""
+    try:
+        # Vérifier l'autorisation admin via header
+        auth_header = req.headers.get('authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise HTTPException(status_code=401, detail="Non autorisé")
+        
+        session_id = auth_header.split(' ')[1]
+        if not verify_admin_session(session_id):
+            raise HTTPException(status_code=401, detail="Session admin invalide")
+        
+        request_profiler.disarm()
+        if clear:
+            request_profiler.clear()
+        return {"success": True, "status": request_profiler.status()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error disarming profiler: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.get("/admin/profiling/{profile_id}")
+async def download_profile(profile_id: str, req: Request, format: Literal["prof", "text"] = "prof"):
+    """Download one profile as a .prof file or as a pstats text report (admin only)"""
+    try:
+        # Vérifier l'autorisation admin via header
+        auth_header = req.headers.get('authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise HTTPException(status_code=401, detail="Non autorisé")
+        
+        session_id = auth_header.split(' ')[1]
+        if not verify_admin_session(session_id):
+            raise HTTPException(status_code=401, detail="Session admin invalide")
+        
+        capture = request_profiler.get(profile_id)
+        if capture is None:
+            raise HTTPException(status_code=404, detail="Profil non trouvé")
+        if format == "text":
+            return PlainTextResponse(capture.text())
+        return Response(
+            content=capture.dump(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{capture.id}.prof"'},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error downloading profile: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.get("/admin/images")
+async def get_images_status(req: Request):
+    """Image pipeline state and known sources (admin only)"""
+    try:
+        # Vérifier l'autorisation admin via header
+        auth_header = req.headers.get('authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise HTTPException(status_code=401, detail="Non autorisé")
+        
+        session_id = auth_header.split(' ')[1]
+        if not verify_admin_session(session_id):
+            raise HTTPException(status_code=401, detail="Session admin invalide")
+        
+        return image_pipeline.stats()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error fetching image status: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.put("/admin/images/{name}")
+async def upload_image(name: str, req: Request):
+    """Upload a source image (raw request body) and generate its derivatives (admin only)"""
+    try:
+        # Vérifier l'autorisation admin via header
+        auth_header = req.headers.get('authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise HTTPException(status_code=401, detail="Non autorisé")
+        
+        session_id = auth_header.split(' ')[1]
+        if not verify_admin_session(session_id):
+            raise HTTPException(status_code=401, detail="Session admin invalide")
+        
+        if not image_pipeline.enabled:
+            raise HTTPException(status_code=503, detail="Traitement d'images indisponible")
+        if not image_pipeline.is_valid_name(name):
+            raise HTTPException(status_code=400, detail="Nom d'image invalide")
+        data = await req.body()
+        if not data or len(data) > IMAGE_MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="Image vide ou trop volumineuse")
+        
+        manifest = await image_pipeline.upload(name, data)
+        if manifest is None:
+            raise HTTPException(status_code=400, detail="Image illisible")
+        apply_responsive_images()
+        content_journal.append({"type": "image", "name": name, "digest": manifest["digest"]})
+        return {"success": True, "image": manifest}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error uploading image: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @api_router.get("/admin/menu")
 async def get_admin_menu(req: Request):
     """Get menu for admin (admin only)"""
@@ -381,7 +1136,7 @@ async def get_admin_menu(req: Request):
         if not verify_admin_session(session_id):
             raise HTTPException(status_code=401, detail="Session admin invalide")
         
-        return MENU_DATA
+        return menu_store.public_view()
     except HTTPException:
         raise
     except Exception as e:
@@ -401,14 +1156,18 @@ async def update_menu_category(category_id: str, category: MenuCategoryUpdate, r
         if not verify_admin_session(session_id):
             raise HTTPException(status_code=401, detail="Session admin invalide")
         
-        # Trouver et mettre à jour la catégorie
-        for i, cat in enumerate(MENU_DATA):
-            if cat["id"] == category_id:
-                MENU_DATA[i]["name"] = category.name
-                MENU_DATA[i]["items"] = [item.dict() for item in category.items]
-                return {"success": True, "message": "Catégorie mise à jour"}
+        # Mettre à jour la catégorie
+        if category_id not in menu_store:
+            raise HTTPException(status_code=404, detail="Catégorie non trouvée")
         
-        raise HTTPException(status_code=404, detail="Catégorie non trouvée")
+        menu_store.replace_category(category_id, category.name, [item.dict() for item in category.items])
+        record_menu_change({
+            "op": "replace",
+            "category_id": category_id,
+            "name": category.name,
+            "items": [asdict(item) for item in menu_store.category_view(category_id).items],
+        })
+        return {"success": True, "message": "Catégorie mise à jour"}
     except HTTPException:
         raise
     except Exception as e:
@@ -428,22 +1187,48 @@ async def add_menu_item(category_id: str, item: MenuItemCreate, req: Request):
         if not verify_admin_session(session_id):
             raise HTTPException(status_code=401, detail="Session admin invalide")
         
-        # Trouver la catégorie et ajouter l'item
-        for cat in MENU_DATA:
-            if cat["id"] == category_id:
-                cat["items"].append(item.dict())
-                return {"success": True, "message": "Plat ajouté"}
+        # Ajouter l'item à la catégorie
+        if category_id not in menu_store:
+            raise HTTPException(status_code=404, detail="Catégorie non trouvée")
         
-        raise HTTPException(status_code=404, detail="Catégorie non trouvée")
+        item_id = menu_store.add_item(category_id, item.dict())
+        record_menu_change({"op": "add", "category_id": category_id, "item_id": item_id, "item": item.dict()})
+        return {"success": True, "message": "Plat ajouté", "item_id": item_id}
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"Error adding menu item: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@api_router.delete("/admin/menu/{category_id}/items/{item_index}")
-async def delete_menu_item(category_id: str, item_index: int, req: Request):
-    """Delete item from menu category (admin only)"""
+@api_router.patch("/admin/menu/{category_id}/items/{item_id}")
+async def update_menu_item(category_id: str, item_id: str, item: MenuItemUpdate, req: Request):
+    """Update a menu item by id (admin only)"""
+    try:
+        # Vérifier l'autorisation admin via header
+        auth_header = req.headers.get('authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise HTTPException(status_code=401, detail="Non autorisé")
+        
+        session_id = auth_header.split(' ')[1]
+        if not verify_admin_session(session_id):
+            raise HTTPException(status_code=401, detail="Session admin invalide")
+        
+        try:
+            menu_store.update_item(item_id, item.dict(), category_id)
+        except MenuError:
+            raise HTTPException(status_code=404, detail="Item non trouvé")
+        
+        record_menu_change({"op": "update", "category_id": category_id, "item_id": item_id, "item": item.dict()})
+        return {"success": True, "message": "Plat mis à jour"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error updating menu item: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.delete("/admin/menu/{category_id}/items/{item_id}")
+async def delete_menu_item(category_id: str, item_id: str, req: Request):
+    """Delete item from menu category by id (admin only)"""
     try:
         # Vérifier l'autorisation admin via header
         auth_header = req.headers.get('authorization')
@@ -454,31 +1239,75 @@ async def delete_menu_item(category_id: str, item_index: int, req: Request):
         if not verify_admin_session(session_id):
             raise HTTPException(status_code=401, detail="Session admin invalide")
         
-        # Trouver la catégorie et supprimer l'item
-        for cat in MENU_DATA:
-            if cat["id"] == category_id:
-                if 0 <= item_index < len(cat["items"]):
-                    cat["items"].pop(item_index)
-                    return {"success": True, "message": "Plat supprimé"}
-                else:
-                    raise HTTPException(status_code=404, detail="Item non trouvé")
+        if category_id not in menu_store:
+            raise HTTPException(status_code=404, detail="Catégorie non trouvée")
+        
+        try:
+            # Anciens clients : un entier désigne encore la position du plat
+            if item_id.isdigit() and not menu_store.has_item(item_id):
+                item_id = menu_store.item_id_at(category_id, int(item_id))
+            menu_store.delete_item(item_id, category_id)
+        except MenuError:
+            raise HTTPException(status_code=404, detail="Item non trouvé")
         
-        raise HTTPException(status_code=404, detail="Catégorie non trouvée")
+        record_menu_change({"op": "delete", "category_id": category_id, "item_id": item_id})
+        return {"success": True, "message": "Plat supprimé"}
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"Error deleting menu item: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.post("/admin/menu/batch")
+async def batch_update_menu(batch: MenuBatchRequest, req: Request):
+    """Apply a batch of menu operations atomically (admin only)"""
+    try:
+        # Vérifier l'autorisation admin via header
+        auth_header = req.headers.get('authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            raise HTTPException(status_code=401, detail="Non autorisé")
+        
+        session_id = auth_header.split(' ')[1]
+        if not verify_admin_session(session_id):
+            raise HTTPException(status_code=401, detail="Session admin invalide")
+        
+        # Tout ou rien : le lot est appliqué sur une copie puis échangé
+        operations = [op.dict(exclude_none=True) for op in batch.operations]
+        errors = menu_store.apply_batch(operations)
+        if errors:
+            raise HTTPException(status_code=400, detail=errors)
+        
+        record_menu_change(*operations)
+        return {"success": True, "message": "Menu mis à jour", "applied": len(batch.operations)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error applying menu batch: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # Health check endpoint
 @api_router.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@api_router.get("/metrics")
+async def get_metrics():
+    """Request and content metrics in Prometheus text format"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Include the router in the main app
 app.include_router(api_router)
 
+# Inside CORS so shed responses keep their CORS headers, inside the metrics so queueing time is measured
+app.add_middleware(
+    LoadSheddingMiddleware,
+    limiter=request_limiter,
+    priority_prefixes=PRIORITY_PATH_PREFIXES,
+    excluded_prefixes=UNLIMITED_PATH_PREFIXES,
+    retry_after=SHED_RETRY_AFTER,
+)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -486,25 +1315,118 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Menu-Version"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Request metrics cover CORS handling too
+metrics_registry.register_routes(app.routes)
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+# Outside the metrics middleware so profiles include every layer
+app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
+
+# Configure logging: records are queued on the event loop and written by a background thread.
+# REQUEST_LOG is "-" (stderr), "none" or a file (JOURNAL_DIR/requests.jsonl by default)
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+REQUEST_LOG = os.environ.get('REQUEST_LOG', '')
+REQUEST_LOG_SAMPLE_RATE = float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', '0.1'))
+REQUEST_LOG_SLOW_MS = float(os.environ.get('REQUEST_LOG_SLOW_MS', '500'))
+REQUEST_LOG_ALWAYS_PREFIXES = ("/api/admin/",)
+REQUEST_LOG_EXCLUDED_PREFIXES = ("/api/health", "/api/metrics")
+_app_log_handler = logging.StreamHandler()
+_app_log_handler.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else logging.Formatter(TEXT_FORMAT))
+_request_log_handler = make_handler(REQUEST_LOG, JOURNAL_DIR / 'requests.jsonl', JsonFormatter())
+log_writer = LogWriter(
+    [_app_log_handler],
+    [_request_log_handler] if _request_log_handler is not None else [],
+    max_queue=int(os.environ.get('LOG_QUEUE_SIZE', '10000')),
 )
+log_writer.install(getattr(logging, os.environ.get('LOG_LEVEL', 'info').upper(), logging.INFO))
+log_writer.start()
 logger = logging.getLogger(__name__)
 
+# Outermost: the request id covers every layer and the duration includes shedding and queueing
+app.add_middleware(
+    RequestLogMiddleware,
+    logger=logging.getLogger(REQUEST_LOGGER),
+    sample_rate=REQUEST_LOG_SAMPLE_RATE,
+    slow_ms=REQUEST_LOG_SLOW_MS,
+    always_prefixes=REQUEST_LOG_ALWAYS_PREFIXES,
+    excluded_prefixes=REQUEST_LOG_EXCLUDED_PREFIXES,
+)
+
+metrics_registry.gauge(
+    "log_records_total", "Log records written by the writer thread or dropped on a full queue.",
+    lambda: [({"outcome": "written"}, log_writer.written), ({"outcome": "dropped"}, log_writer.handler.dropped)],
+    kind="counter",
+)
+metrics_registry.gauge(
+    "log_queue_depth", "Log records waiting for the writer thread.",
+    lambda: [({}, log_writer.queue.qsize())],
+)
+
 @app.on_event("startup")
 async def startup_event():
     """Application startup"""
+    # Dans un worker gunicorn, le thread d'écriture du maître n'existe pas
+    log_writer.start()
+    if CONTENT_BACKEND == 'mongo':
+        await load_content_from_database()
+    replayed = restore_content_state()
+    menu_versions.reset(content_journal.seq)
+    content_journal.open()
+    app.state.content_watcher = None
+    if CONTENT_BACKEND != 'mongo':
+        file_menu = content_file.current.digests["menu"]
+        if content_sources["menu"] != file_menu:
+            # La carte du fichier a changé pendant l'arrêt : elle remplace celle du journal
+            load_menu_from_file(MenuStore(content_file.current.document["menu"]), file_menu)
+        if content_file.poll_interval > 0:
+            app.state.content_watcher = asyncio.create_task(content_file.watch(apply_content))
+    content_cache.invalidate("restaurant_info", "menu", "gallery", "site_settings")
+    if static_export is not None:
+        static_export.schedule_all()
+    app.state.journal_flusher = asyncio.create_task(content_journal.run_flusher())
+    app.state.lag_monitor = asyncio.create_task(request_limiter.run_lag_monitor())
+    app.state.access_log_writer = asyncio.create_task(access_logs.run())
+    app.state.image_preparation = asyncio.create_task(prepare_images())
+    logger.info(f"Restored content state ({replayed} journal records replayed)")
+    app.state.session_sweepers = [
+        asyncio.create_task(active_sessions.run_sweeper(SESSION_SWEEP_INTERVAL)),
+        asyncio.create_task(admin_sessions.run_sweeper(SESSION_SWEEP_INTERVAL)),
+    ]
     logger.info("Application started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    for task in app.state.session_sweepers:
+        task.cancel()
+    app.state.journal_flusher.cancel()
+    app.state.lag_monitor.cancel()
+    content_journal.close()
+    app.state.access_log_writer.cancel()
+    await access_logs.drain()
+    app.state.image_preparation.cancel()
+    if app.state.content_watcher is not None:
+        app.state.content_watcher.cancel()
+    change_events.close_all()
+    if static_export is not None:
+        await static_export.drain()
+    image_pipeline.close()
+    if content_repository is not None:
+        content_repository.close()
     logger.info("Application shutting down")
+    log_writer.stop()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # Client IPs (rate limiting, access logs) come from X-Forwarded-For set by nginx
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8001,
+        proxy_headers=True,
+        # Requests are logged by RequestLogMiddleware, off the event loop
+        access_log=False,
+        forwarded_allow_ips=os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1'),
+    )
\ No newline at end of file
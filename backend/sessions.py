@@ -0,0 +1,151 @@
+import asyncio
+import heapq
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """Bounded in-memory session store
+
+    Sessions are kept in LRU order and indexed by expiry in a min-heap, so the
+    sweeper only touches entries that are actually expired. Heap entries left
+    behind by LRU evictions or discards are skipped lazily and compacted once
+    they outnumber the live sessions.
+    """
+
+    def __init__(self, duration: timedelta, max_sessions: int):
+        self.duration = duration
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, dict]" = OrderedDict()
+        self._expiry: List[Tuple[datetime, str]] = []
+        self._clients: Dict[Tuple[str, str], str] = {}
+        self.created = 0
+        self.reused = 0
+        self.evicted_expired = 0
+        self.evicted_lru = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def get(self, session_id: str) -> Optional[dict]:
+        return self._sessions.get(session_id)
+
+    def create(self, ip_address: str, user_agent: str, reuse: bool = False) -> str:
+        """Create a session, or return the client's live one when reuse is allowed"""
+        now = datetime.utcnow()
+        client = (ip_address, user_agent)
+        if reuse:
+            session_id = self._clients.get(client)
+            if session_id is not None and self._is_live(session_id, now):
+                self._sessions.move_to_end(session_id)
+                self.reused += 1
+                return session_id
+
+        session_id = str(uuid.uuid4())
+        session_data = {
+            'created_at': now,
+            'expires_at': now + self.duration,
+            'ip_address': ip_address,
+            'user_agent': user_agent
+        }
+        self._sessions[session_id] = session_data
+        self._clients[client] = session_id
+        heapq.heappush(self._expiry, (session_data['expires_at'], session_id))
+        self.created += 1
+
+        while len(self._sessions) > self.max_sessions:
+            self._remove(next(iter(self._sessions)))
+            self.evicted_lru += 1
+        self._maybe_compact()
+        return session_id
+
+    def verify(self, session_id: str) -> bool:
+        """Check that a session exists and has not expired, refreshing its LRU slot"""
+        if not self._is_live(session_id, datetime.utcnow()):
+            return False
+        self._sessions.move_to_end(session_id)
+        return True
+
+    def discard(self, session_id: str) -> None:
+        self._remove(session_id)
+
+    def revoke_created_before(self, cutoff: datetime) -> int:
+        """Evict every session created before `cutoff`; returns how many"""
+        revoked = [session_id for session_id, data in self._sessions.items() if data['created_at'] < cutoff]
+        for session_id in revoked:
+            self._remove(session_id)
+        return len(revoked)
+
+    def clear(self) -> None:
+        self._sessions.clear()
+        self._expiry.clear()
+        self._clients.clear()
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """Evict every expired session in O(expired log n)"""
+        now = now or datetime.utcnow()
+        evicted = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, session_id = heapq.heappop(self._expiry)
+            session_data = self._sessions.get(session_id)
+            if session_data is None or session_data['expires_at'] != expires_at:
+                continue
+            self._remove(session_id)
+            evicted += 1
+        self.evicted_expired += evicted
+        return evicted
+
+    async def run_sweeper(self, interval: float) -> None:
+        """Periodically evict expired sessions until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                evicted = self.sweep()
+                if evicted:
+                    logger.info("Session sweeper evicted %d expired sessions", evicted)
+            except Exception as e:
+                logger.error(f"Error sweeping sessions: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "reused": self.reused,
+            "evicted_expired": self.evicted_expired,
+            "evicted_lru": self.evicted_lru,
+        }
+
+    def _is_live(self, session_id: str, now: datetime) -> bool:
+        session_data = self._sessions.get(session_id)
+        if session_data is None:
+            return False
+        if now > session_data['expires_at']:
+            self._remove(session_id)
+            self.evicted_expired += 1
+            return False
+        return True
+
+    def _remove(self, session_id: str) -> Optional[dict]:
+        session_data = self._sessions.pop(session_id, None)
+        if session_data is not None:
+            client = (session_data['ip_address'], session_data['user_agent'])
+            if self._clients.get(client) == session_id:
+                del self._clients[client]
+        return session_data
+
+    def _maybe_compact(self) -> None:
+        if len(self._expiry) > 2 * len(self._sessions) + 64:
+            self._expiry = [
+                (data['expires_at'], session_id)
+                for session_id, data in self._sessions.items()
+            ]
+            heapq.heapify(self._expiry)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from cache import BEST_LEVELS, MIN_COMPRESS_SIZE, SUPPORTED_ENCODINGS, ResponseCache, compress
+
+logger = logging.getLogger(__name__)
+
+# Resource -> file under the export directory, at the path of its API route
+EXPORTED_RESOURCES = {
+    "restaurant_info": "api/restaurant/info.json",
+    "menu": "api/menu.json",
+    "gallery": "api/gallery.json",
+    "site_settings": "api/site/settings.json",
+}
+# Precompressed variants, as nginx gzip_static / brotli_static look for them
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Un nom par processus : plusieurs workers peuvent exporter le même fichier en même temps
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_files(files: List[Tuple[Path, Optional[bytes]]]) -> None:
+    """Write (or remove, for None) each file atomically, in order"""
+    for path, data in files:
+        if data is None:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(path, data)
+
+
+class StaticExporter:
+    """Static copy of the public content responses for nginx to serve
+
+    Each exported resource is written as `<directory>/api/....json` with its
+    .gz and .br variants next to it. The JSON is the body cached for the
+    API, so it is not encoded twice; the variants are compressed at the best
+    level in the writer thread, which the API cannot afford on the loop.
+    Files are replaced by rename, so nginx never reads a partial file; the
+    compressed variants are written before the plain one.
+
+    `schedule` is called whenever a resource changes; changes are coalesced
+    and written by a single background task, off the event loop.
+    """
+
+    def __init__(self, directory: Path, cache: ResponseCache, resources: Dict[str, str] = EXPORTED_RESOURCES):
+        self.directory = Path(directory)
+        self.cache = cache
+        self.resources = resources
+        self._pending: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.exports = 0
+        self.failures = 0
+        self.last_export_ms: Optional[float] = None
+
+    def schedule(self, *names: str) -> None:
+        """Re-export these resources (unknown names are ignored) as soon as possible"""
+        self._pending.update(name for name in names if name in self.resources)
+        if self._pending and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def schedule_all(self) -> None:
+        self.schedule(*self.resources)
+
+    def _files(self, name: str, body: bytes) -> List[Tuple[Path, Optional[bytes]]]:
+        """Files of one resource, compressed at the best level (blocking: runs in the writer thread)"""
+        path = self.directory / self.resources[name]
+        files = []
+        for encoding, suffix in ENCODING_SUFFIXES.items():
+            compressed = None
+            # Trop petit pour être compressé : pas de variante (et pas d'ancienne qui traîne)
+            if encoding in SUPPORTED_ENCODINGS and len(body) >= MIN_COMPRESS_SIZE:
+                compressed = compress(body, encoding, BEST_LEVELS)
+            files.append((path.with_name(path.name + suffix), compressed))
+        files.append((path, body))
+        return files
+
+    def _export(self, bodies: Dict[str, bytes]) -> None:
+        write_files([file for name, body in bodies.items() for file in self._files(name, body)])
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                names, self._pending = sorted(self._pending), set()
+                started = time.perf_counter()
+                try:
+                    # Le JSON est lu sur la boucle ; compression et écritures passent dans un thread
+                    bodies = {name: self.cache.get(name).body for name in names}
+                    await asyncio.to_thread(self._export, bodies)
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"Error exporting {', '.join(names)} to {self.directory}: {e}")
+                    continue
+                self.exports += len(names)
+                self.last_export_ms = (time.perf_counter() - started) * 1000
+        finally:
+            self._task = None
+
+    async def drain(self) -> None:
+        """Wait for the exports in progress"""
+        while self._task is not None:
+            await asyncio.shield(self._task)
+
+    def stats(self) -> dict:
+        return {
+            "directory": str(self.directory),
+            "resources": sorted(self.resources),
+            "pending": sorted(self._pending),
+            "exports": self.exports,
+            "failures": self.failures,
+            "last_export_ms": self.last_export_ms,
+        }
@@ -0,0 +1,11 @@
+"""Backend modules importable from the tests, server state kept in a temporary directory"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("JOURNAL_DIR", tempfile.mkdtemp(prefix="embruns-tests-"))
+os.environ.setdefault("ACCESS_LOG_SINK", "none")
+os.environ.setdefault("REQUEST_LOG", "none")
@@ -0,0 +1,53 @@
+"""VersionLog: deltas since a version, deletions, unknown versions"""
+from changelog import VersionLog
+
+
+def committed(*batches, capacity: int = 100) -> VersionLog:
+    log = VersionLog(capacity, epoch="ab12")
+    for version, (changed, deleted) in enumerate(batches, start=1):
+        log.record(changed, deleted)
+        log.commit(version)
+    return log
+
+
+def test_since_reports_changes_and_deletions_after_a_version():
+    log = committed((["entrees", "plats"], []), (["plats"], ["entrees"]), (["desserts"], []))
+
+    assert log.since(0) == (["desserts", "plats"], ["entrees"])
+    assert log.since(1) == (["desserts", "plats"], ["entrees"])
+    assert log.since(2) == (["desserts"], [])
+    assert log.since(3) == ([], [])
+    assert log.version_of("plats") == 2 and log.version_of("entrees") is None
+
+
+def test_deleted_then_recreated_key_is_changed_again():
+    log = committed((["vins"], []), ([], ["vins"]), (["vins"], []))
+
+    assert log.since(1) == (["vins"], [])
+    assert log.version_of("vins") == 3
+
+
+def test_pending_changes_are_reported_after_any_version():
+    log = committed((["entrees"], []))
+    log.record(changed=["plats"], deleted=["entrees"])
+
+    assert log.since(1) == (["plats"], ["entrees"])
+    assert log.version_of("plats") is None
+    log.commit(2)
+    assert log.since(1) == (["plats"], ["entrees"]) and log.version_of("plats") == 2
+
+
+def test_unknown_versions_are_refused():
+    log = committed((["a"], []), (["b"], []), (["c"], []), capacity=2)
+
+    assert log.parse(log.token()) == 3
+    assert log.parse("ab12-4") is None
+    assert log.parse("ffff-1") is None
+    assert log.parse("ab12-x") is None
+    # L'entrée de la version 1 est sortie du journal borné
+    assert log.since(0) is None
+    assert log.since(1) == (["c", "b"], [])
+
+    log.reset(7)
+    assert log.since(6) is None and log.since(7) == ([], [])
+    assert log.parse("ab12-7") == 7
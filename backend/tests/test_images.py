@@ -0,0 +1,72 @@
+"""ImagePipeline: derivatives shared by several worker processes"""
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Un worker gunicorn : son propre processus, le même dossier de cache
+SCAN = """
+import asyncio, sys
+from pathlib import Path
+from images import ImagePipeline
+pipeline = ImagePipeline(Path(sys.argv[1]), Path(sys.argv[2]), widths=(64, 128, 256), workers=1)
+print(asyncio.run(pipeline.scan()))
+pipeline.close()
+"""
+
+Image = pytest.importorskip("PIL.Image")
+
+from images import ImagePipeline  # noqa: E402
+
+WIDTHS = (64, 128, 256)
+
+
+def make_sources(directory: Path, count: int) -> None:
+    directory.mkdir()
+    for n in range(count):
+        Image.new("RGB", (300, 200), (40 * n, 120, 200)).save(directory / f"photo-{n}.jpg")
+
+
+def assert_complete(cache_dir: Path, count: int) -> None:
+    digests = [path for path in cache_dir.iterdir() if path.is_dir() and path.name != "uploads"]
+    assert len(digests) == count
+    for directory in digests:
+        manifest = json.loads((directory / "manifest.json").read_text())
+        for variant in manifest["variants"]:
+            assert (directory / variant["file"]).is_file()
+    assert not list(cache_dir.glob("*.tmp")) and not list(cache_dir.glob("**/*.tmp"))
+
+
+def test_concurrent_scans_publish_complete_sets(tmp_path):
+    make_sources(tmp_path / "sources", 8)
+    processes = [
+        subprocess.Popen([sys.executable, "-c", SCAN, str(tmp_path / "sources"), str(tmp_path / "cache")],
+                         cwd=BACKEND_DIR, stdout=subprocess.PIPE, text=True)
+        for _ in range(4)
+    ]
+
+    assert [process.communicate(timeout=120)[0].split() for process in processes] == [["8"]] * 4
+    assert_complete(tmp_path / "cache", 8)
+
+
+def test_incomplete_directory_is_replaced(tmp_path):
+    make_sources(tmp_path / "sources", 1)
+    pipeline = ImagePipeline(tmp_path / "sources", tmp_path / "cache", widths=WIDTHS, workers=1)
+    first = asyncio.run(pipeline.scan())
+    digest = next(path for path in (tmp_path / "cache").iterdir())
+    # Arrêt brutal d'une version qui écrivait directement dans le dossier final
+    (digest / "manifest.json").unlink()
+    (digest / "64.jpg").unlink()
+
+    pipeline = ImagePipeline(tmp_path / "sources", tmp_path / "cache", widths=WIDTHS, workers=1)
+    try:
+        assert asyncio.run(pipeline.scan()) == first == 1
+        assert pipeline.generated == 1
+    finally:
+        pipeline.close()
+    assert_complete(tmp_path / "cache", 1)
@@ -0,0 +1,100 @@
+"""Journal replay, compaction and several processes sharing one directory"""
+from pathlib import Path
+
+from journal import Journal
+
+
+class Replica:
+    """A list of items kept in a journal, the way server.py keeps the content"""
+
+    def __init__(self, directory: Path, compact_every: int = 1000):
+        self.items = []
+        self.journal = Journal(directory, lambda: {"items": list(self.items)},
+                               compact_every=compact_every, replicate=self.replicate)
+        state, records = self.journal.replay()
+        self.replicate(state, records, True)
+        self.journal.open()
+
+    def add(self, item) -> None:
+        self.items.append(item)
+        self.journal.append({"item": item})
+
+    def replicate(self, state, records, rebuild) -> None:
+        if rebuild or state is not None:
+            self.items = list(state["items"]) if state else []
+        self.items += [record["item"] for record in records]
+
+
+def test_restart_replays_every_record(tmp_path):
+    replica = Replica(tmp_path)
+    for item in "abc":
+        replica.add(item)
+    replica.journal.close()
+
+    assert Replica(tmp_path).items == ["a", "b", "c"]
+
+
+def test_torn_last_line_is_dropped_and_writing_resumes(tmp_path):
+    replica = Replica(tmp_path)
+    replica.add("a")
+    replica.add("b")
+    replica.journal.close()
+    with open(tmp_path / "journal.jsonl", "ab") as f:
+        f.write(b'{"item":"c","se')
+
+    restarted = Replica(tmp_path)
+    assert restarted.items == ["a", "b"]
+    restarted.add("d")
+    restarted.journal.close()
+
+    assert Replica(tmp_path).items == ["a", "b", "d"]
+    assert Replica(tmp_path).journal.seq == 3
+
+
+def test_compaction_then_restart(tmp_path):
+    replica = Replica(tmp_path)
+    replica.add("a")
+    replica.add("b")
+    replica.journal.compact()
+    replica.add("c")
+    replica.journal.close()
+
+    assert (tmp_path / "journal.jsonl").read_bytes().count(b"\n") == 1
+    restarted = Replica(tmp_path)
+    assert restarted.items == ["a", "b", "c"]
+    assert restarted.journal.seq == 3
+
+
+def test_automatic_compaction_on_close(tmp_path):
+    replica = Replica(tmp_path, compact_every=2)
+    for item in "abc":
+        replica.add(item)
+    replica.journal.close()
+
+    assert (tmp_path / "journal.jsonl").stat().st_size == 0
+    assert Replica(tmp_path).items == ["a", "b", "c"]
+
+
+def test_two_journals_on_one_directory_converge(tmp_path):
+    first, second = Replica(tmp_path), Replica(tmp_path)
+
+    first.add("a")
+    first.journal.flush()
+    # Le second écrit sans avoir lu "a" : il reconstruit dans l'ordre du fichier
+    second.add("b")
+    second.journal.flush()
+    first.journal.flush()
+    assert first.items == second.items == ["a", "b"]
+
+    # Compaction par l'un, enregistrements pas encore lus par l'autre
+    first.add("c")
+    first.journal.compact()
+    second.journal.flush()
+    second.add("d")
+    second.journal.flush()
+    first.journal.flush()
+    assert first.items == second.items == ["a", "b", "c", "d"]
+
+    first.journal.close()
+    second.journal.close()
+    assert Replica(tmp_path).items == ["a", "b", "c", "d"]
@@ -0,0 +1,58 @@
+"""MenuStore: load validation and atomic batches"""
+import json
+from pathlib import Path
+
+import pytest
+
+from menu_store import MenuError, MenuStore
+
+CONTENT = json.loads((Path(__file__).resolve().parent.parent / "data" / "content.json").read_text(encoding="utf-8"))
+
+
+def test_seed_items_get_stable_ids():
+    store = MenuStore(CONTENT["menu"])
+
+    assert store.item_id_at("entrees", 0) == "entrees-1"
+    assert MenuStore(store.snapshot()).snapshot() == store.snapshot()
+
+
+@pytest.mark.parametrize("menu", [
+    [{"id": "plats", "name": "Plats", "items": []}, {"id": "plats", "name": "Encore", "items": []}],
+    [{"id": "plats", "name": "Plats", "items": [
+        {"id": "bar", "name": "Bar", "description": "", "price": "30€"}, {"id": "bar", "name": "Bar", "description": "", "price": "31€"}]}],
+    [{"id": "plats", "name": "Plats", "items": [{"name": "Bar", "description": "", "price": "30€"}]},
+     {"id": "vins", "name": "Vins", "items": [{"id": "plats-1", "name": "Muscadet", "description": "", "price": "8€"}]}],
+])
+def test_duplicate_ids_are_rejected_on_load(menu):
+    store = MenuStore(CONTENT["menu"])
+    before = store.snapshot()
+
+    with pytest.raises(MenuError, match="en double"):
+        store.load(menu)
+    assert store.snapshot() == before
+
+
+def test_batch_with_an_invalid_operation_changes_nothing():
+    store = MenuStore(CONTENT["menu"])
+    before = store.snapshot()
+
+    errors = store.apply_batch([
+        {"op": "rename", "category_id": "plats", "name": "Plats du jour"},
+        {"op": "delete", "item_id": "entrees-1"},
+        {"op": "delete", "item_id": "inconnu"},
+    ])
+
+    assert len(errors) == 1 and errors[0].startswith("operation 2:")
+    assert store.snapshot() == before
+
+
+def test_valid_batch_is_applied():
+    store = MenuStore(CONTENT["menu"])
+
+    assert store.apply_batch([
+        {"op": "rename", "category_id": "plats", "name": "Plats du jour"},
+        {"op": "move", "item_id": "entrees-1", "target_category_id": "plats", "position": 0},
+    ]) == []
+    assert store.get_category("plats").name == "Plats du jour"
+    assert store.item_id_at("plats", 0) == "entrees-1"
+    assert not any(item["id"] == "entrees-1" for item in store.snapshot()[0]["items"])
@@ -0,0 +1,47 @@
+"""Token-bucket admission control, with a fake clock"""
+from ratelimit import TokenBucketLimiter
+
+
+def limiter(**options) -> (TokenBucketLimiter, list):
+    now = [0.0]
+    settings = dict(rate=1.0, burst=2, global_rate=100.0, global_burst=100)
+    settings.update(options)
+    return TokenBucketLimiter(clock=lambda: now[0], **settings), now
+
+
+def test_bucket_refills_at_the_configured_rate():
+    bucket, now = limiter()
+
+    assert bucket.check("a") is None and bucket.check("a") is None
+    assert bucket.check("a") == 1.0
+    now[0] += 0.5
+    assert bucket.check("a") == 0.5
+    now[0] += 0.5
+    assert bucket.check("a") is None
+    assert bucket.stats()["allowed"] == 3 and bucket.stats()["rejected_client"] == 2
+
+
+def test_clients_have_separate_buckets_under_a_global_one():
+    bucket, now = limiter(global_burst=3)
+
+    assert bucket.check("a") is None and bucket.check("a") is None
+    assert bucket.check("b") is None
+    assert bucket.check("c") == 0.01
+    assert bucket.stats()["rejected_global"] == 1
+
+
+def test_idle_clients_are_forgotten():
+    bucket, now = limiter(max_clients=2)
+    bucket.check("a")
+    bucket.check("b")
+    bucket.check("c")
+    assert bucket.stats()["tracked_clients"] == 2
+
+    now[0] += 2
+    bucket.check("d")
+    assert bucket.stats()["tracked_clients"] == 1 and bucket.stats()["expired"] == 3
+
+
+def test_retry_after_is_whole_seconds_and_never_zero():
+    assert TokenBucketLimiter.retry_after(0.01) == "1"
+    assert TokenBucketLimiter.retry_after(1.5) == "2"
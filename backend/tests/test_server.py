@@ -0,0 +1,62 @@
+"""API behaviour across session modes, through the ASGI app"""
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from ratelimit import TokenBucketLimiter
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(server.app) as client:
+        yield client
+
+
+@pytest.fixture
+def admin(client, monkeypatch):
+    # Limites de débit hors sujet ici : un test ne doit pas dépendre du nombre de connexions des autres
+    for name in ("access_limiter", "admin_limiter"):
+        monkeypatch.setattr(server, name, TokenBucketLimiter(1000, 1000, 1000, 1000))
+    session_id = client.post("/api/admin/login", json={"password": server.ADMIN_ACCESS_CODE}).json()["session_id"]
+    headers = {"Authorization": f"Bearer {session_id}"}
+    yield headers
+    client.put("/api/admin/site/settings", json={"is_locked": True}, headers=headers)
+
+
+def has_access(client, session_id: str) -> bool:
+    return client.get(f"/api/access/check/{session_id}").json()["hasAccess"]
+
+
+@pytest.mark.parametrize("mode", ["store", "token"])
+def test_locking_the_site_ends_visitor_sessions(client, admin, monkeypatch, mode):
+    monkeypatch.setattr(server, "SESSION_MODE", mode)
+    assert client.put("/api/admin/site/settings", json={"is_locked": False}, headers=admin).status_code == 200
+    visitor = client.post("/api/access/verify", json={"code": ""}).json()["session_id"]
+    assert has_access(client, visitor)
+
+    assert client.put("/api/admin/site/settings", json={"is_locked": True}, headers=admin).status_code == 200
+
+    assert not has_access(client, visitor)
+    # L'administrateur reste connecté, et le code donne une nouvelle session valide
+    assert client.get("/api/admin/sessions/stats", headers=admin).status_code == 200
+    renewed = client.post("/api/access/verify", json={"code": server.VALID_ACCESS_CODE}).json()["session_id"]
+    assert renewed != visitor and has_access(client, renewed)
+
+
+@pytest.mark.parametrize("token", ["é.abc", "x" * 40 + "é", "😀.😀"])
+def test_non_ascii_session_tokens_are_refused(client, admin, token):
+    assert client.get(f"/api/access/check/{token}").json() == {"hasAccess": False}
+    assert client.get(f"/api/admin/check/{token}").json() == {"hasAccess": False}
+    response = client.put("/api/admin/site/settings", json={"is_locked": True},
+                         headers={"Authorization": f"Bearer {token}".encode("utf-8")})
+    assert response.status_code == 401
+
+
+def test_clients_over_budget_get_429_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(server, "access_limiter", TokenBucketLimiter(0.01, 1, 1000, 1000))
+
+    assert client.post("/api/access/verify", json={"code": "0000"}).status_code != 429
+    response = client.post("/api/access/verify", json={"code": server.VALID_ACCESS_CODE})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "100"
@@ -0,0 +1,62 @@
+"""In-memory session store: LRU bound, expiry sweep, per-client reuse"""
+from datetime import datetime, timedelta
+
+from sessions import SessionStore
+
+
+def test_least_recently_used_session_is_evicted_first():
+    store = SessionStore(timedelta(hours=1), max_sessions=2)
+    first = store.create("10.0.0.1", "a")
+    second = store.create("10.0.0.2", "b")
+    assert store.verify(first)
+
+    third = store.create("10.0.0.3", "c")
+
+    assert first in store and third in store and second not in store
+    assert store.stats()["evicted_lru"] == 1
+
+
+def test_sweep_evicts_only_expired_sessions():
+    store = SessionStore(timedelta(minutes=1), max_sessions=10)
+    old = store.create("10.0.0.1", "a")
+    store.discard(store.create("10.0.0.2", "b"))
+    store.duration = timedelta(minutes=10)
+    fresh = store.create("10.0.0.3", "c")
+    later = datetime.utcnow() + timedelta(minutes=5)
+
+    assert store.sweep(later) == 1
+    assert old not in store and fresh in store
+    assert store.sweep(later) == 0
+    assert store.sweep(later + timedelta(minutes=10)) == 1
+    assert len(store) == 0 and store.stats()["evicted_expired"] == 2
+
+
+def test_reuse_returns_the_live_session_of_the_same_client():
+    store = SessionStore(timedelta(hours=1), max_sessions=10)
+    session_id = store.create("10.0.0.1", "firefox", reuse=True)
+
+    assert store.create("10.0.0.1", "firefox", reuse=True) == session_id
+    assert store.create("10.0.0.1", "chrome", reuse=True) != session_id
+    assert store.create("10.0.0.2", "firefox", reuse=True) != session_id
+    assert store.stats()["reused"] == 1
+
+    store.discard(session_id)
+    assert store.create("10.0.0.1", "firefox", reuse=True) != session_id
+
+
+def test_expired_session_is_not_reused():
+    store = SessionStore(timedelta(seconds=-1), max_sessions=10)
+    session_id = store.create("10.0.0.1", "firefox", reuse=True)
+
+    assert not store.verify(session_id)
+    assert store.create("10.0.0.1", "firefox", reuse=True) != session_id
+
+
+def test_revoke_created_before_keeps_newer_sessions():
+    store = SessionStore(timedelta(hours=1), max_sessions=10)
+    old = store.create("10.0.0.1", "a")
+    store._sessions[old]["created_at"] -= timedelta(minutes=1)
+    new = store.create("10.0.0.2", "b")
+
+    assert store.revoke_created_before(datetime.utcnow() - timedelta(seconds=30)) == 1
+    assert not store.verify(old) and store.verify(new)
@@ -0,0 +1,94 @@
+"""Signed session tokens: signature, expiry, revocations"""
+from datetime import timedelta
+
+import pytest
+
+import tokens
+from tokens import ROLE_ACCESS, ROLE_ADMIN, SessionTokenSigner, TokenRevocations
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(tokens.time, "time", lambda: now[0])
+    return now
+
+
+def signer(secret: bytes = b"k" * 32, revocations=None) -> SessionTokenSigner:
+    return SessionTokenSigner(secret, timedelta(hours=1), revocations)
+
+
+def test_issued_token_is_valid_for_its_role_only():
+    token = signer().issue(ROLE_ACCESS)
+
+    assert signer().verify(token, ROLE_ACCESS)
+    assert not signer().verify(token, ROLE_ADMIN)
+
+
+def test_tampered_or_forged_tokens_are_rejected():
+    token = signer().issue(ROLE_ACCESS)
+    payload, _, signature = token.partition(".")
+    admin_payload = signer().issue(ROLE_ADMIN).partition(".")[0]
+
+    assert not signer().verify(f"{admin_payload}.{signature}", ROLE_ADMIN)
+    assert not signer().verify(f"{payload}.{signature[:-1]}{'A' if signature[-1] != 'A' else 'B'}", ROLE_ACCESS)
+    assert not signer(b"autre" * 8).verify(token, ROLE_ACCESS)
+    assert not signer().verify(payload, ROLE_ACCESS)
+    assert not signer().verify(f"{payload}.", ROLE_ACCESS)
+
+
+@pytest.mark.parametrize("token", ["é.abc", "x" * 40 + "é", "😀.😀"])
+def test_non_ascii_tokens_are_rejected_without_error(token):
+    assert signer().decode(token, ROLE_ACCESS) is None
+
+
+def test_expired_token_is_rejected(clock):
+    token = signer().issue(ROLE_ACCESS)
+    clock[0] += 3599
+    assert signer().verify(token, ROLE_ACCESS)
+
+    clock[0] += 2
+    assert not signer().verify(token, ROLE_ACCESS)
+
+
+def test_revoked_token_stays_revoked_until_it_expires(clock):
+    tokens_signer = signer()
+    token, other = tokens_signer.issue(ROLE_ADMIN), tokens_signer.issue(ROLE_ADMIN)
+
+    assert tokens_signer.revoke(token, ROLE_ADMIN) is not None
+    assert not tokens_signer.verify(token, ROLE_ADMIN)
+    assert tokens_signer.verify(other, ROLE_ADMIN)
+    assert tokens_signer.revoke(token, ROLE_ADMIN) is None
+
+    clock[0] += 3601
+    tokens_signer.revocations.prune()
+    assert len(tokens_signer.revocations) == 0
+
+
+def test_revoke_role_rejects_tokens_issued_before_the_cutoff(clock):
+    tokens_signer = signer()
+    visitor, admin = tokens_signer.issue(ROLE_ACCESS), tokens_signer.issue(ROLE_ADMIN)
+    clock[0] += 1
+
+    cutoff = tokens_signer.revocations.revoke_role(ROLE_ACCESS)
+
+    assert cutoff == int(clock[0] * 1000)
+    assert not tokens_signer.verify(visitor, ROLE_ACCESS)
+    assert tokens_signer.verify(admin, ROLE_ADMIN)
+    assert tokens_signer.verify(tokens_signer.issue(ROLE_ACCESS), ROLE_ACCESS)
+
+
+def test_revocations_replayed_elsewhere_give_the_same_cutoff(clock):
+    tokens_signer = signer()
+    visitor = tokens_signer.issue(ROLE_ACCESS)
+    issued_ms = tokens_signer.decode(visitor, ROLE_ACCESS)["i"]
+    clock[0] += 60
+
+    # Un autre worker rejoue l'enregistrement : même seuil, pas l'heure de la relecture
+    replayed = TokenRevocations()
+    assert replayed.revoke_role(ROLE_ACCESS, issued_ms + 1) == issued_ms + 1
+    assert not signer(revocations=replayed).verify(visitor, ROLE_ACCESS)
+
+    restored = TokenRevocations()
+    restored.load(replayed.snapshot())
+    assert not signer(revocations=restored).verify(visitor, ROLE_ACCESS)
@@ -0,0 +1,156 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+ROLE_ACCESS = "v"
+ROLE_ADMIN = "a"
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def is_token(session_id: str) -> bool:
+    """Tokens are `<payload>.<signature>`, store session ids are plain UUIDs"""
+    return "." in session_id
+
+
+def load_or_create_secret(path: Path) -> bytes:
+    """Signing secret kept in `path`, created on first use
+
+    Every worker and every restart then verify the same tokens. Concurrent
+    first starts agree on one file: it is published with an atomic link.
+    """
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, secrets.token_bytes(32))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    try:
+        os.link(tmp, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(tmp)
+    return path.read_bytes()
+
+
+class TokenRevocations:
+    """Small revocation list for signed tokens
+
+    Individual tokens (admin logout) are revoked by id until they would have
+    expired anyway; a whole role (lock changes) is revoked by moving its
+    not-before mark, which rejects every token issued earlier.
+    """
+
+    def __init__(self):
+        self._revoked: Dict[str, int] = {}
+        self._not_before: Dict[str, int] = {}
+
+    def revoke(self, token_id: str, expires_at: int) -> None:
+        self._revoked[token_id] = expires_at
+        if len(self._revoked) > 256:
+            self.prune()
+
+    def revoke_role(self, role: str, issued_before_ms: Optional[int] = None) -> int:
+        self._not_before[role] = issued_before_ms or int(time.time() * 1000)
+        return self._not_before[role]
+
+    def is_revoked(self, token_id: str, role: str, issued_at_ms: int) -> bool:
+        if issued_at_ms < self._not_before.get(role, 0):
+            return True
+        return token_id in self._revoked
+
+    def prune(self, now: Optional[int] = None) -> None:
+        now = now or int(time.time())
+        self._revoked = {k: exp for k, exp in self._revoked.items() if exp > now}
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def snapshot(self) -> dict:
+        self.prune()
+        return {"tokens": dict(self._revoked), "not_before": dict(self._not_before)}
+
+    def load(self, state: dict) -> None:
+        self._revoked = dict(state.get("tokens", {}))
+        self._not_before = dict(state.get("not_before", {}))
+
+
+class SessionTokenSigner:
+    """Stateless HMAC-SHA256 signed session tokens
+
+    The payload carries the role, expiry, issue time and a token id, so a
+    token can be verified by any worker sharing the secret without touching
+    a session store.
+    """
+
+    def __init__(self, secret: bytes, duration: timedelta, revocations: Optional[TokenRevocations] = None):
+        self._secret = secret
+        self.duration = duration
+        self.revocations = revocations if revocations is not None else TokenRevocations()
+
+    def _sign(self, payload: str) -> str:
+        digest = hmac.new(self._secret, payload.encode("ascii"), hashlib.sha256).digest()
+        return _b64encode(digest)
+
+    def issue(self, role: str) -> str:
+        now_ms = int(time.time() * 1000)
+        claims = {
+            "r": role,
+            "e": now_ms // 1000 + int(self.duration.total_seconds()),
+            "i": now_ms,
+            "j": uuid.uuid4().hex[:16],
+        }
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("ascii"))
+        return f"{payload}.{self._sign(payload)}"
+
+    def decode(self, token: str, role: str) -> Optional[dict]:
+        """Return the claims of a valid, unexpired, unrevoked token of this role"""
+        # Les jetons émis sont en ASCII ; tout autre caractère ferait échouer la signature avec une exception
+        if not token.isascii():
+            return None
+        payload, _, signature = token.partition(".")
+        if not payload or not signature:
+            return None
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            return None
+        if claims.get("r") != role or claims.get("e", 0) < time.time():
+            return None
+        if self.revocations.is_revoked(claims.get("j", ""), role, claims.get("i", 0)):
+            return None
+        return claims
+
+    def verify(self, token: str, role: str) -> bool:
+        return self.decode(token, role) is not None
+
+    def revoke(self, token: str, role: str) -> Optional[dict]:
+        """Revoke a valid token; returns its claims, None if it was not valid"""
+        claims = self.decode(token, role)
+        if claims is None:
+            return None
+        self.revocations.revoke(claims["j"], claims["e"])
+        return claims
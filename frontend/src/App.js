@@ -23,30 +23,37 @@ function App() {
 
   useEffect(() => {
     checkInitialAccess();
+    // Verrouillage / déverrouillage du site appliqué sans recharger la page
+    return restaurantApi.subscribeToChanges({
+      site_settings: ({ is_locked }) => {
+        if (is_locked === undefined || is_locked) {
+          checkInitialAccess();
+        } else {
+          setSiteSettings((settings) => ({ ...settings, is_locked: false }));
+          setHasAccess(true);
+        }
+      }
+    });
   }, []);
 
   const checkInitialAccess = async () => {
     try {
-      // Récupérer les paramètres du site
-      const settingsResponse = await restaurantApi.getSiteSettings();
-      setSiteSettings(settingsResponse);
+      // Paramètres du site, session et contenu en un seul appel
+      const sessionId = localStorage.getItem('restaurant_session');
+      const bootstrap = await restaurantApi.getBootstrap(sessionId);
+      setSiteSettings(bootstrap.site);
 
       // Si le site n'est pas verrouillé, accès direct
-      if (!settingsResponse.is_locked) {
+      if (!bootstrap.site.is_locked) {
         setHasAccess(true);
-        setIsLoading(false);
         return;
       }
 
       // Sinon vérifier la session existante
-      const sessionId = localStorage.getItem('restaurant_session');
-      if (sessionId) {
-        const response = await restaurantApi.checkSession(sessionId);
-        if (response.hasAccess) {
-          setHasAccess(true);
-        } else {
-          localStorage.removeItem('restaurant_session');
-        }
+      if (bootstrap.session.hasAccess) {
+        setHasAccess(true);
+      } else if (sessionId) {
+        localStorage.removeItem('restaurant_session');
       }
     } catch (error) {
       console.error('Error checking initial access:', error);
@@ -64,6 +71,9 @@ function App() {
   };
 
   const handleAdminLogout = () => {
+    if (adminSession) {
+      restaurantApi.adminLogout(adminSession).catch(() => {});
+    }
     setAdminSession(null);
     localStorage.removeItem('admin_session');
   };
@@ -1,5 +1,6 @@
 import React from 'react';
 import { SectionLoader } from './LoadingSpinner';
+import ResponsiveImage from './ResponsiveImage';
 
 // images locales - uniquement celles qui commencent par "galery_"
 import gal1 from '../assets/images/galery_1.jpg';
@@ -42,11 +43,12 @@ const GallerySection = () => {
           {galleryData.map((item) => (
             <div key={item.id} className="relative group">
               <div className="aspect-w-16 aspect-h-12 overflow-hidden rounded-xl shadow-lg">
-                <img
+                <ResponsiveImage
+                  responsive={item.responsive}
                   src={item.image}
                   alt={item.alt}
+                  sizes="(min-width: 640px) 50vw, 100vw"
                   className="w-full h-60 sm:h-80 object-cover transition-all duration-700 group-hover:scale-110"
-                  loading="lazy"
                 />
                 <div className="absolute inset-0 bg-gradient-to-t from-black/70 via-black/20 to-transparent opacity-0 group-hover:opacity-100 transition-all duration-500 flex items-end justify-center">
                   <p className="text-white text-lg font-medium mb-4">{item.alt}</p>
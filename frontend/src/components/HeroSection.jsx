@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { restaurantApi } from '../services/api';
 import { SectionLoader } from './LoadingSpinner';
+import ResponsiveImage from './ResponsiveImage';
 
 const HeroSection = () => {
   const [heroData, setHeroData] = useState(null);
@@ -60,9 +61,11 @@ const HeroSection = () => {
       {/* Background Image with Parallax Effect */}
       <div className="absolute inset-0 z-0 parallax">
         <div className="image-hover-zoom h-full">
-          <img
+          <ResponsiveImage
+            responsive={heroData.responsive}
             src={heroData.image}
             alt="Vue du restaurant Les Embruns"
+            sizes="100vw"
             className="w-full h-full object-cover"
             loading="eager"
           />
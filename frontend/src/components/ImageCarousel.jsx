@@ -1,4 +1,5 @@
 import React, { useRef, useEffect, useState } from 'react';
+import ResponsiveImage from './ResponsiveImage';
 
 const ImageCarousel = ({ images, speed = 0.5 }) => {
   const containerRef = useRef(null);
@@ -67,9 +68,11 @@ const ImageCarousel = ({ images, speed = 0.5 }) => {
             className="flex-shrink-0 overflow-hidden"
             style={{ width: `${imageWidth}%`, height: '100%' }}
           >
-            <img
+            <ResponsiveImage
+              responsive={image.responsive}
               src={image.src}
               alt={image.alt}
+              sizes={`${Math.ceil(100 / visibleItems)}vw`}
               className="w-full h-full object-cover"
             />
           </div>
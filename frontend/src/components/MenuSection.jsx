@@ -20,6 +20,8 @@ const MenuSection = () => {
     };
 
     fetchMenuData();
+    // Recharger la carte quand l'admin la modifie
+    return restaurantApi.subscribeToChanges({ menu: fetchMenuData });
   }, []);
 
   if (loading) {
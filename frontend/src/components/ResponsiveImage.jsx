@@ -0,0 +1,27 @@
+import React from 'react';
+
+// Image servie par le backend avec ses dérivés (AVIF/WebP/JPEG par largeur) quand
+// `responsive` est fourni ; sinon l'image d'origine telle quelle
+const ResponsiveImage = ({ responsive, src, alt, sizes, className, loading = 'lazy' }) => {
+  if (!responsive) {
+    return <img src={src} alt={alt} className={className} loading={loading} />;
+  }
+  return (
+    <picture>
+      {responsive.sources.map((source) => (
+        <source key={source.type} type={source.type} srcSet={source.srcset} sizes={sizes} />
+      ))}
+      <img
+        src={responsive.src}
+        width={responsive.width}
+        height={responsive.height}
+        alt={alt}
+        className={className}
+        style={{ backgroundImage: `url(${responsive.placeholder})`, backgroundSize: 'cover' }}
+        loading={loading}
+      />
+    </picture>
+  );
+};
+
+export default ResponsiveImage;
@@ -1,6 +1,7 @@
 import axios from 'axios';
 
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || "http://10.64.137.82:8001";
+// Chaîne vide : API sur la même origine (nginx du docker-compose)
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL ?? "http://10.64.137.82:8001";
 const API = `${BACKEND_URL}/api`;
 
 // Create axios instance with default config
@@ -12,10 +13,78 @@ const apiClient = axios.create({
   },
 });
 
+// First-paint payload from /bootstrap, served to the section components
+// instead of one round-trip per resource
+let bootstrapData = null;
+
+// Menu kept between refreshes: only the categories changed since `version` are downloaded.
+// Without a version (first load, or a menu served by nginx from the static export)
+// the full menu is fetched, cacheable and revalidated with its ETag.
+const menuState = { version: null, categories: new Map() };
+
+const syncMenu = async () => {
+  const params = menuState.version ? { since: menuState.version } : {};
+  const response = await apiClient.get('/menu', { params });
+  if (Array.isArray(response.data)) {
+    // Menu complet : version inconnue de ce worker ou premier chargement
+    menuState.categories = new Map(response.data.map((category) => [category.id, category]));
+    menuState.version = response.headers['x-menu-version'] || null;
+    return response.data;
+  }
+  const delta = response.data;
+  delta.categories.forEach((category) => menuState.categories.set(category.id, category));
+  delta.deleted.forEach((categoryId) => menuState.categories.delete(categoryId));
+  menuState.version = delta.version;
+  return delta.order.map((categoryId) => menuState.categories.get(categoryId)).filter(Boolean);
+};
+
+// One EventSource shared by every component listening for content changes
+const CHANGE_EVENTS = ['restaurant_info', 'menu', 'gallery', 'site_settings'];
+const changeListeners = new Set();
+let eventSource = null;
+
+const notifyChange = (event, data) => {
+  // Le contenu a changé : ne plus servir le bootstrap mis en cache
+  bootstrapData = null;
+  changeListeners.forEach((listener) => {
+    if (listener[event]) {
+      listener[event](data);
+    }
+  });
+};
+
+const openEventSource = () => {
+  eventSource = new EventSource(`${API}/events`);
+  CHANGE_EVENTS.forEach((event) => {
+    eventSource.addEventListener(event, (message) => notifyChange(event, JSON.parse(message.data)));
+  });
+  // Trop d'événements manqués pendant la déconnexion : tout recharger
+  eventSource.addEventListener('resync', () => {
+    CHANGE_EVENTS.forEach((event) => notifyChange(event, {}));
+  });
+};
+
 // API service functions
 export const restaurantApi = {
+  // Get site settings, session validity and all public content in one call
+  getBootstrap: async (sessionId) => {
+    try {
+      const response = await apiClient.get('/bootstrap', {
+        params: sessionId ? { session_id: sessionId } : {}
+      });
+      bootstrapData = response.data;
+      return response.data;
+    } catch (error) {
+      console.error('Error fetching bootstrap data:', error);
+      throw error;
+    }
+  },
+
   // Get restaurant information
   getRestaurantInfo: async () => {
+    if (bootstrapData) {
+      return bootstrapData.restaurant;
+    }
     try {
       const response = await apiClient.get('/restaurant/info');
       return response.data;
@@ -27,17 +96,36 @@ export const restaurantApi = {
 
   // Get menu data
   getMenu: async () => {
+    if (bootstrapData) {
+      return bootstrapData.menu;
+    }
     try {
-      const response = await apiClient.get('/menu');
-      return response.data;
+      return await syncMenu();
     } catch (error) {
       console.error('Error fetching menu:', error);
       throw error;
     }
   },
 
+  // Search menu items ({ query, total, items }), optionally within a category
+  searchMenu: async (query, { category, limit } = {}) => {
+    try {
+      const params = { q: query };
+      if (category) params.category = category;
+      if (limit) params.limit = limit;
+      const response = await apiClient.get('/menu/search', { params });
+      return response.data;
+    } catch (error) {
+      console.error('Error searching menu:', error);
+      throw error;
+    }
+  },
+
   // Get gallery images
   getGallery: async () => {
+    if (bootstrapData) {
+      return bootstrapData.gallery;
+    }
     try {
       const response = await apiClient.get('/gallery');
       return response.data;
@@ -47,6 +135,20 @@ export const restaurantApi = {
     }
   },
 
+  // Get one page of gallery images ({ items, next_cursor }), optionally by category
+  getGalleryPage: async ({ category, cursor, limit = 24 } = {}) => {
+    try {
+      const params = { limit };
+      if (category) params.category = category;
+      if (cursor) params.cursor = cursor;
+      const response = await apiClient.get('/gallery', { params });
+      return response.data;
+    } catch (error) {
+      console.error('Error fetching gallery page:', error);
+      throw error;
+    }
+  },
+
   // Verify access code
   verifyAccess: async (code) => {
     try {
@@ -91,6 +193,21 @@ export const restaurantApi = {
     }
   },
 
+  // Admin logout
+  adminLogout: async (sessionId) => {
+    try {
+      const response = await apiClient.post('/admin/logout', null, {
+        headers: {
+          'Authorization': `Bearer ${sessionId}`
+        }
+      });
+      return response.data;
+    } catch (error) {
+      console.error('Error in admin logout:', error);
+      throw error;
+    }
+  },
+
   // Check admin session
   checkAdminSession: async (sessionId) => {
     try {
@@ -163,9 +280,9 @@ export const restaurantApi = {
   },
 
   // Delete menu item (admin)
-  deleteMenuItem: async (sessionId, categoryId, itemIndex) => {
+  deleteMenuItem: async (sessionId, categoryId, itemId) => {
     try {
-      const response = await apiClient.delete(`/admin/menu/${categoryId}/items/${itemIndex}`, {
+      const response = await apiClient.delete(`/admin/menu/${categoryId}/items/${itemId}`, {
         headers: {
           'Authorization': `Bearer ${sessionId}`
         }
@@ -177,6 +294,40 @@ export const restaurantApi = {
     }
   },
 
+  // Apply several menu operations in one atomic request (admin)
+  batchUpdateMenu: async (sessionId, operations) => {
+    try {
+      const response = await apiClient.post('/admin/menu/batch', { operations }, {
+        headers: {
+          'Authorization': `Bearer ${sessionId}`
+        }
+      });
+      return response.data;
+    } catch (error) {
+      console.error('Error applying menu batch:', error);
+      throw error;
+    }
+  },
+
+  // Listen for content changes pushed by the server; handlers are keyed by
+  // resource name and the returned function unsubscribes
+  subscribeToChanges: (handlers) => {
+    if (typeof EventSource === 'undefined') {
+      return () => {};
+    }
+    changeListeners.add(handlers);
+    if (!eventSource) {
+      openEventSource();
+    }
+    return () => {
+      changeListeners.delete(handlers);
+      if (!changeListeners.size && eventSource) {
+        eventSource.close();
+        eventSource = null;
+      }
+    };
+  },
+
   // Health check
   healthCheck: async () => {
     try {